@@ -0,0 +1,684 @@
+#!/usr/bin/env python
+###############################################################################
+#
+# file:     benchmark.py
+#
+# Purpose:  measures the cost of running Termsaver-Figlet screens
+#           refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A benchmark for the screens of termsaver-figlet plugin, run headlessly (no
+terminal involved): the cycles of `figlet-fly` (with one word, and with
+`BANNERS` words flying at once) and `figlet-stat` screens, and
+`FigletScreenBase.build_figlet_text` (with an empty render cache, so every
+call actually renders), are executed with all delays zeroed, and frames are
+written into a null sink (`os.devnull`).
+
+Each of them runs for a matrix of fonts, words and terminal sizes, reporting
+the median (p50) and 99th percentile (p99) of the time taken per frame, the
+throughput (frames per second), the bytes and write system calls per frame,
+and the number of processes spawned (figlet binary).
+
+The screens can also run in colors (see `COLORS`), reporting the bytes per
+frame compared to the ones without colors. This fails if any of them takes
+more than `MAX_COLOR_RATIO` times the bytes without colors.
+
+Alternatively (with --memory), the memory taken by each font is measured:
+parsed (`figfont.FigFont`), compiled in memory and compiled in a mapped file
+(`fontcache.CompiledFont`), after rendering the words with it. This fails if
+a compiled font takes more than `MAX_MEMORY_RATIO` of the parsed one.
+
+Or (with --startup), the startup time is measured, in new processes: the
+time taken to import the screens of plugins (as termsaver does, whichever
+screen is run), apart from its own screens, and then to display the first
+frame of `figlet-stat` with each font. This fails if the median of the
+plugin import or the first frame exceeds `STARTUP_BUDGET`.
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python extras/benchmark.py [options]
+
+Options:
+
+ -f, --fonts=LIST    comma separated fonts (default: standard,slant,banner)
+ -w, --words=LIST    comma separated words (default: a short, a medium and a
+                     long one)
+ -g, --sizes=LIST    comma separated terminal sizes, as WIDTHxHEIGHT (default:
+                     80x24,132x43,200x60)
+ -s, --screens=LIST  comma separated parts to run: fly, banners, stat, build
+                     (default: all of them)
+ -n, --frames=N      the number of frames measured per combination (default:
+                     200)
+ -k, --colors=LIST   comma separated colors to run the screens with: none,
+                     solid, gradient, rainbow (default: none)
+ -o, --output=FILE   saves the results into FILE (JSON)
+ -c, --compare=FILE  compares the results with the ones previously saved in
+                     FILE (JSON)
+ -m, --memory        measures the memory taken by the fonts, instead of the
+                     screens (sizes, screens and frames are ignored)
+ -t, --startup       measures the startup time, instead of the screens (only
+                     the first word is used, frames is the number of
+                     processes per font, default is 20)
+ -S, --shared-cache  enables the shared render cache in the processes
+                     measuring the startup time (the first one fills it)
+ -h, --help          displays this help message
+"""
+
+#
+# Python built-in modules
+#
+import os
+import sys
+import time
+import random
+import getopt
+import platform
+import subprocess
+import timeit
+
+try:
+    import json
+except ImportError:
+    json = None
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+from termsaverlib import exception
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import figfont, fontcache
+from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
+from termsaverlib.plugins.figlet.screen.fly import FigletFlyScreen
+from termsaverlib.plugins.figlet.screen.stat import FigletStatScreen
+from termsaverlib.plugins.figlet.sink import FrameSink
+
+RESULTS_VERSION = 1
+"""
+The version of the format of saved results.
+"""
+
+DEFAULT_FONTS = ['standard', 'slant', 'banner']
+"""
+The fonts used by default.
+"""
+
+DEFAULT_WORDS = ['Hi', 'TermSaver', 'The quick brown fox']
+"""
+The words used by default (short, medium and long).
+"""
+
+DEFAULT_SIZES = [(80, 24), (132, 43), (200, 60)]
+"""
+The terminal sizes (width, height) used by default.
+"""
+
+SCREENS = ['fly', 'banners', 'stat', 'build']
+"""
+The parts of the plugin that can be measured.
+"""
+
+BANNERS = 4
+"""
+The number of words flying at once, when measuring `figlet-fly` with more
+than one (banners).
+"""
+
+COLORS = {
+    'none': None,
+    'solid': ('color', 'bright-green'),
+    'gradient': ('gradient', 'blue,cyan,green,yellow'),
+    'rainbow': ('rainbow', None),
+}
+"""
+The colors the screens can run with (see `FigletScreenBase.set_color`).
+"""
+
+MAX_COLOR_RATIO = 2.5
+"""
+The maximum ratio between the bytes per frame of a screen in colors, and
+without them (see `COLORS`).
+"""
+
+MAX_MEMORY_RATIO = 0.5
+"""
+The maximum memory a compiled font (kept in memory) may take, relative to
+the same font parsed.
+"""
+
+STARTUP_BUDGET = {'import_ms': 20.0, 'first_frame_ms': 10.0}
+"""
+The maximum (median) time, in milliseconds, to import the screens of
+plugins, and to display the first frame after that.
+"""
+
+STARTUP_SCRIPT = """
+import os, sys, time
+started = time.time()
+import termsaverlib.screen
+find_plugins = termsaverlib.screen.get_available_plugin_screens
+termsaverlib.screen.get_available_plugin_screens = lambda: []
+termsaverlib.screen.get_available_screens()
+core = time.time()
+find_plugins()
+imported = time.time()
+from termsaverlib.plugins.figlet.screen.stat import FigletStatScreen
+from termsaverlib.plugins.figlet.sink import FrameSink
+screen = FigletStatScreen()
+options = [('-f', sys.argv[1]), ('-w', sys.argv[2])]
+if sys.argv[3:] == ['shared']:
+    options.append(('--shared-cache', ''))
+screen._parse_args((options, []))
+screen.delay = screen.line_delay = screen.freeze_delay = 0
+screen.geometry = {'x': 80, 'y': 24}
+screen.position = {'x': 0, 'y': 0}
+screen.get_terminal_size = lambda: None
+screen.output = FrameSink(os.open(os.devnull, os.O_WRONLY))
+screen._run_cycle()
+print (core - started) * 1000, (imported - core) * 1000, \\
+    (time.time() - imported) * 1000
+"""
+"""
+The script run (in a new process) to measure the startup time, printing
+the time taken to import termsaver screens, the screens of plugins, and then
+to display the first frame of the font and word in its arguments.
+"""
+
+
+class CountingPopen(subprocess.Popen):
+    """
+    A `subprocess.Popen` that counts the processes it creates (installed in
+    place of the original one while measuring).
+    """
+
+    count = 0
+    """
+    The number of processes created.
+    """
+
+    def __init__(self, *args, **kwargs):
+        CountingPopen.count += 1
+        subprocess.Popen.__init__(self, *args, **kwargs)
+
+
+def percentile(values, p):
+    """
+    Returns the `p` percentile (0-100, nearest rank) of sorted `values`.
+    """
+    if not values:
+        return 0.0
+    index = int(round(p / 100.0 * len(values) + 0.5)) - 1
+    return values[max(0, min(len(values) - 1, index))]
+
+
+def new_screen(kind, font, word, width, height, color='none'):
+    """
+    Creates a screen of `kind` (see `SCREENS`) ready to run headlessly,
+    with the terminal size fixed in `width` and `height`, and the `color`
+    (see `COLORS`).
+    """
+    if kind in ('fly', 'banners'):
+        screen = FigletFlyScreen()
+        if kind == 'banners':
+            screen.banners = BANNERS
+    else:
+        screen = FigletStatScreen()
+        screen.freeze_delay = 0
+        screen.line_delay = 0
+    screen.delay = 0
+    screen.font = font
+    screen.word = word
+    screen.geometry = {'x': width, 'y': height}
+    screen.position = {'x': 0, 'y': 0}
+    screen.get_terminal_size = lambda: None
+    screen.output = FrameSink(os.open(os.devnull, os.O_WRONLY))
+    if COLORS[color] is not None:
+        screen.set_color(*COLORS[color])
+    return screen
+
+
+def measure(kind, font, word, width, height, frames, color='none'):
+    """
+    Runs `frames` frames of `kind` (see `SCREENS`) in `color` (see
+    `COLORS`), returning a dictionary with the results (or the error
+    message, if the word does not fit, or the font can not be used).
+    """
+    screen = new_screen(kind, font, word, width, height, color)
+    # the same frames for every color
+    random.seed(0)
+    FigletScreenBase.render_cache.clear()
+    CountingPopen.count = 0
+    timer = timeit.default_timer
+
+    if kind == 'build':
+        def run():
+            FigletScreenBase.render_cache.clear()
+            screen.last_build = None
+            screen.build_figlet_text(word)
+    else:
+        run = screen._run_cycle
+
+    times = []
+    try:
+        if kind == 'fly':
+            # check it fits beforehand, instead of relying on the screen
+            screen.build_figlet_text(word)
+            if screen.figlet_geometry['y'] > height:
+                return "The word is too big for the terminal."
+            FigletScreenBase.render_cache.clear()
+            screen.last_build = None
+
+        # the first frame (loading fonts, etc) is reported apart
+        started = timer()
+        run()
+        first = timer() - started
+        for __ in xrange(frames):
+            started = timer()
+            run()
+            times.append(timer() - started)
+    except exception.TermSaverException, e:
+        return " ".join([str(a) for a in e.args]) or e.help_msg \
+            or e.__class__.__name__
+    finally:
+        screen.display_restore()
+        os.close(screen.output.fd)
+
+    total = sum(times)
+    times.sort()
+    sink = screen.output.stats()
+    return {
+        'screen': kind,
+        'font': font,
+        'word': word,
+        'width': width,
+        'height': height,
+        'color': color,
+        'frames': len(times),
+        'first_ms': first * 1000,
+        'p50_ms': percentile(times, 50) * 1000,
+        'p99_ms': percentile(times, 99) * 1000,
+        'mean_ms': total / max(1, len(times)) * 1000,
+        'fps': total and len(times) / total or 0.0,
+        'bytes_per_frame': sink['bytes_per_frame'],
+        'syscalls_per_frame': sink['syscalls_per_frame'],
+        'spawns': CountingPopen.count,
+    }
+
+
+def deep_size(obj, seen=None):
+    """
+    Returns the memory (in bytes) taken by `obj` and all objects it refers
+    to (through containers, instance dictionaries and slots), counting each
+    object only once. Memory mappings are not included.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_size(item, seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(obj.__dict__, seen)
+    for name in getattr(obj.__class__, '__slots__', ()):
+        if hasattr(obj, name):
+            size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+def measure_memory(font, words):
+    """
+    Measures the memory taken by `font` (see `deep_size`) parsed, compiled
+    in memory, and compiled in a mapped file (only the private memory, the
+    mapping is shared by all processes), after rendering `words` with each
+    of them. Returns a dictionary with the results (or the error message, if
+    the font can not be loaded).
+    """
+    screen = FigletStatScreen()
+    screen.font = font
+    path = screen.get_font_file()
+    if path is None:
+        return "Font not found (or only handled by figlet binary)."
+    try:
+        parsed = figfont.FigFont(path)
+        packed = fontcache.CompiledFont(path, None,
+                                        fontcache.pack_font(parsed))
+        mapped = fontcache.load_font(path)
+    except exception.TermSaverException, e:
+        return " ".join([str(a) for a in e.args]) or e.help_msg \
+            or e.__class__.__name__
+
+    sizes = []
+    for loaded in (parsed, packed, mapped):
+        for word in words:
+            figfont.render(loaded, word)
+        sizes.append(deep_size(loaded))
+    return {
+        'font': font,
+        'glyphs': len(parsed.codes()),
+        'parsed_bytes': sizes[0],
+        'packed_bytes': sizes[1],
+        'mapped_bytes': sizes[2],
+        'ratio': float(sizes[1]) / sizes[0],
+    }
+
+
+def run_memory(fonts, words):
+    """
+    Measures the memory taken by all `fonts`, printing each result, and
+    returning them all as a list (only the results exceeding
+    `MAX_MEMORY_RATIO` are flagged as failed).
+    """
+    results = []
+    print "%-12s %7s %11s %11s %11s %7s" % ('font', 'glyphs', 'parsed KB',
+        'packed KB', 'mapped KB', 'ratio')
+    for font in fonts:
+        result = measure_memory(font, words)
+        if not isinstance(result, dict):
+            print "%-12s failed: %s" % (font, result.strip().split("\n")[0])
+            continue
+        result['failed'] = result['ratio'] > MAX_MEMORY_RATIO
+        print "%-12s %7d %11.1f %11.1f %11.1f %6.1f%%%s" % (font,
+            result['glyphs'], result['parsed_bytes'] / 1024.0,
+            result['packed_bytes'] / 1024.0,
+            result['mapped_bytes'] / 1024.0, result['ratio'] * 100,
+            result['failed'] and " FAILED" or "")
+        sys.stdout.flush()
+        results.append(result)
+    return results
+
+
+def measure_startup(font, word, runs, shared=False):
+    """
+    Starts `runs` processes (see `STARTUP_SCRIPT`) displaying the first
+    frame of `word` with `font`, returning a dictionary with the results (or
+    the error message, if the font can not be used). If `shared` is set,
+    the processes use the shared render cache.
+    """
+    cores, imports, firsts, totals = [], [], [], []
+    args = [sys.executable, '-c', STARTUP_SCRIPT, font, word]
+    if shared:
+        args.append('shared')
+    for __ in xrange(runs):
+        started = timeit.default_timer()
+        process = subprocess.Popen(args, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+        out, err = process.communicate()
+        totals.append(timeit.default_timer() - started)
+        if process.returncode != 0:
+            return (err.strip().split("\n") or ["?"])[-1]
+        times = [float(t) for t in out.split()]
+        cores.append(times[0])
+        imports.append(times[1])
+        firsts.append(times[2])
+    cores.sort()
+    imports.sort()
+    firsts.sort()
+    totals.sort()
+    return {
+        'font': font,
+        'word': word,
+        'runs': runs,
+        'shared': shared,
+        'termsaver_ms': percentile(cores, 50),
+        'import_ms': percentile(imports, 50),
+        'first_frame_ms': percentile(firsts, 50),
+        'process_ms': percentile(totals, 50) * 1000,
+        'max_process_ms': totals[-1] * 1000,
+    }
+
+
+def run_startup(fonts, word, runs, shared=False):
+    """
+    Measures the startup time with all `fonts` (see `measure_startup`),
+    printing each result, and returning them all as a list (only the
+    results exceeding `STARTUP_BUDGET` are flagged as failed).
+    """
+    results = []
+    print "%-12s %10s %10s %10s %10s %10s" % ('font', 'termsaver',
+        'plugins', 'frame', 'process', 'max')
+    for font in fonts:
+        result = measure_startup(font, word, runs, shared)
+        if not isinstance(result, dict):
+            print "%-12s failed: %s" % (font, result)
+            continue
+        result['failed'] = [k for k in STARTUP_BUDGET
+                            if result[k] > STARTUP_BUDGET[k]]
+        print "%-12s %8.1fms %8.1fms %8.1fms %8.1fms %8.1fms%s" % (font,
+            result['termsaver_ms'], result['import_ms'],
+            result['first_frame_ms'], result['process_ms'],
+            result['max_process_ms'],
+            result['failed'] and " FAILED" or "")
+        sys.stdout.flush()
+        results.append(result)
+    return results
+
+
+def run(kinds, fonts, words, sizes, frames, colors=('none',)):
+    """
+    Measures all combinations of `kinds`, `fonts`, `words`, `sizes` and
+    `colors`, printing each result, and returning them all as a list.
+
+    Results in colors have the ratio of their bytes per frame to the ones
+    without colors (if these are measured as well), and are marked as
+    failed if it exceeds `MAX_COLOR_RATIO` (see `COLORS`).
+    """
+    results = []
+    original = subprocess.Popen
+    subprocess.Popen = CountingPopen
+    try:
+        print "%-7s %-10s %-20s %-8s %-8s %9s %9s %9s %9s %7s %6s" % (
+            'screen', 'font', 'word', 'size', 'color', 'p50 ms', 'p99 ms',
+            'fps', 'bytes/f', 'spawns', 'x none')
+        for kind in kinds:
+            for font in fonts:
+                for word in words:
+                    for width, height in sizes:
+                        size = "%dx%d" % (width, height)
+                        plain = None
+                        for color in colors:
+                            result = measure(kind, font, word, width,
+                                             height, frames, color)
+                            if not isinstance(result, dict):
+                                print "%-7s %-10s %-20s %-8s %-8s " \
+                                    "failed: %s" % (kind, font, word[:20],
+                                    size, color,
+                                    result.strip().split("\n")[0])
+                                continue
+                            if color == 'none':
+                                plain = result['bytes_per_frame']
+                            ratio = ""
+                            if color != 'none' and plain:
+                                result['color_ratio'] = \
+                                    result['bytes_per_frame'] / plain
+                                result['failed'] = \
+                                    result['color_ratio'] > MAX_COLOR_RATIO
+                                ratio = "%6.2f%s" % (result['color_ratio'],
+                                    result['failed'] and " FAILED" or "")
+                            print "%-7s %-10s %-20s %-8s %-8s %9.3f %9.3f " \
+                                "%9.1f %9.1f %7d %s" % (kind, font,
+                                word[:20], size, color, result['p50_ms'],
+                                result['p99_ms'], result['fps'],
+                                result['bytes_per_frame'], result['spawns'],
+                                ratio)
+                            sys.stdout.flush()
+                            results.append(result)
+    finally:
+        subprocess.Popen = original
+    return results
+
+
+def compare(results, previous):
+    """
+    Prints the differences (median and 99th percentile frame times) between
+    `results` and the `previous` ones, for the same combinations.
+    """
+    def key(r):
+        return (r['screen'], r['font'], r['word'], r['width'], r['height'],
+                r.get('color', 'none'))
+
+    old = dict([(key(r), r) for r in previous])
+    print
+    print "%-7s %-10s %-20s %-8s %9s %9s %8s %9s %9s %8s" % ('screen',
+        'font', 'word', 'size', 'p50 old', 'p50 new', 'change', 'p99 old',
+        'p99 new', 'change')
+    for result in results:
+        before = old.get(key(result))
+        if before is None:
+            continue
+        changes = []
+        for name in ('p50_ms', 'p99_ms'):
+            if before[name]:
+                changes.append("%+7.1f%%" % ((result[name] - before[name])
+                                            / before[name] * 100))
+            else:
+                changes.append("%8s" % '-')
+        print "%-7s %-10s %-20s %-8s %9.3f %9.3f %s %9.3f %9.3f %s" % (
+            result['screen'], result['font'], result['word'][:20],
+            "%dx%d" % (result['width'], result['height']),
+            before['p50_ms'], result['p50_ms'], changes[0],
+            before['p99_ms'], result['p99_ms'], changes[1])
+
+
+def split_list(value):
+    """
+    Splits a comma separated command-line value.
+    """
+    return [v.strip() for v in value.split(',') if v.strip()]
+
+
+def main(args):
+    """
+    Parses the command-line `args` and runs the benchmark.
+    """
+    try:
+        optlist = getopt.getopt(args, 'hf:w:g:s:n:k:o:c:mtS', ['help',
+            'fonts=', 'words=', 'sizes=', 'screens=', 'frames=', 'colors=',
+            'output=', 'compare=', 'memory', 'startup', 'shared-cache'])[0]
+    except getopt.GetoptError, e:
+        print >> sys.stderr, "%s (see --help)" % e
+        return 2
+
+    fonts, words, sizes = DEFAULT_FONTS, DEFAULT_WORDS, DEFAULT_SIZES
+    kinds, frames, output, previous = SCREENS, None, None, None
+    colors = ['none']
+    memory = startup = shared = False
+    try:
+        for o, a in optlist:
+            if o in ('-h', '--help'):
+                print __doc__
+                return 0
+            elif o in ('-f', '--fonts'):
+                fonts = split_list(a)
+            elif o in ('-w', '--words'):
+                words = split_list(a)
+            elif o in ('-g', '--sizes'):
+                sizes = [tuple([int(n) for n in s.lower().split('x')])
+                         for s in split_list(a)]
+            elif o in ('-s', '--screens'):
+                kinds = split_list(a)
+                for kind in kinds:
+                    if kind not in SCREENS:
+                        raise ValueError("unknown screen %s" % kind)
+            elif o in ('-n', '--frames'):
+                frames = int(a)
+            elif o in ('-k', '--colors'):
+                colors = split_list(a)
+                for color in colors:
+                    if color not in COLORS:
+                        raise ValueError("unknown color %s" % color)
+            elif o in ('-o', '--output'):
+                output = a
+            elif o in ('-c', '--compare'):
+                previous = a
+            elif o in ('-m', '--memory'):
+                memory = True
+            elif o in ('-t', '--startup'):
+                startup = True
+            elif o in ('-S', '--shared-cache'):
+                shared = True
+    except ValueError, e:
+        print >> sys.stderr, "Invalid option %s: %s" % (o, e)
+        return 2
+
+    if json is None and (output or previous):
+        print >> sys.stderr, "JSON results require Python 2.6+"
+        return 2
+
+    if memory or startup:
+        if memory:
+            key, results = 'memory', run_memory(fonts, words)
+        else:
+            key, results = 'startup', run_startup(fonts, words[0],
+                                                  frames or 20, shared)
+        if output:
+            f = open(output, 'w')
+            try:
+                json.dump({
+                    'version': RESULTS_VERSION,
+                    'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    key: results,
+                }, f, indent=1, sort_keys=True)
+            finally:
+                f.close()
+        return [r for r in results if r['failed']] and 1 or 0
+
+    frames = frames or 200
+    results = run(kinds, fonts, words, sizes, frames, colors)
+
+    if previous:
+        f = open(previous)
+        try:
+            compare(results, json.load(f)['results'])
+        finally:
+            f.close()
+
+    if output:
+        f = open(output, 'w')
+        try:
+            json.dump({
+                'version': RESULTS_VERSION,
+                'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'frames': frames,
+                'results': results,
+            }, f, indent=1, sort_keys=True)
+        finally:
+            f.close()
+    return [r for r in results if r.get('failed')] and 1 or 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
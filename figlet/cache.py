@@ -0,0 +1,184 @@
+###############################################################################
+#
+# file:     cache.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Simple caching structures used by termsaver-figlet screens to avoid repeating
+expensive work between cycles.
+
+The classes available here are:
+
+    * `RenderCache`: a least-recently-used (LRU) cache bounded by the
+      (estimated) memory taken by its entries
+"""
+
+#
+# Python built-in modules
+#
+import threading
+
+
+class RenderCache(object):
+    """
+    A least-recently-used cache, bounded by the size (in bytes, as estimated
+    by whoever adds the entries) of its contents. When adding a new entry
+    exceeds `max_size`, the least recently used entries are evicted.
+
+    The cache can be shared with background threads (see `prerender`
+    module), as all changes are made holding a lock.
+
+    The usage is accounted in the following properties:
+
+        * `hits`: the number of successful lookups
+
+        * `misses`: the number of lookups for entries not in the cache
+
+        * `evictions`: the number of entries removed to make room for new
+          ones
+    """
+
+    max_size = 0
+    """
+    The maximum size (in bytes) of all entries held by the cache.
+    """
+
+    size = 0
+    """
+    The current size (in bytes) of all entries held by the cache.
+    """
+
+    hits = 0
+    """
+    The number of successful lookups.
+    """
+
+    misses = 0
+    """
+    The number of lookups for entries not in the cache.
+    """
+
+    evictions = 0
+    """
+    The number of entries removed to make room for new ones.
+    """
+
+    def __init__(self, max_size):
+        """
+        Creates a new cache holding up to `max_size` bytes.
+        """
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """
+        Removes all entries from the cache (counters are kept).
+        """
+        # each link is [previous, next, key, value, size], in a circular
+        # list where the root's next is the least recently used entry
+        self._lock.acquire()
+        try:
+            self._root = root = []
+            root[:] = [root, root, None, None, 0]
+            self._links = {}
+            self.size = 0
+        finally:
+            self._lock.release()
+
+    def __len__(self):
+        return len(self._links)
+
+    def __contains__(self, key):
+        return key in self._links
+
+    def get(self, key, default=None):
+        """
+        Retrieves the value of `key`, marking it as the most recently used
+        entry, or `default` if it is not in the cache.
+        """
+        self._lock.acquire()
+        try:
+            link = self._links.get(key)
+            if link is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._unlink(link)
+            self._append(link)
+            return link[3]
+        finally:
+            self._lock.release()
+
+    def put(self, key, value, size):
+        """
+        Adds (or replaces) the entry `key`, which takes about `size` bytes.
+        Entries larger than the cache itself are not stored.
+        """
+        self._lock.acquire()
+        try:
+            link = self._links.pop(key, None)
+            if link is not None:
+                self._unlink(link)
+                self.size -= link[4]
+            if size > self.max_size:
+                return
+            while self._links and self.size + size > self.max_size:
+                oldest = self._root[1]
+                self._unlink(oldest)
+                del self._links[oldest[2]]
+                self.size -= oldest[4]
+                self.evictions += 1
+            link = [None, None, key, value, size]
+            self._append(link)
+            self._links[key] = link
+            self.size += size
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        """
+        Returns a dictionary with the usage counters of this cache.
+        """
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._links),
+            'size': self.size,
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': total and float(self.hits) / total or 0.0,
+        }
+
+    def _unlink(self, link):
+        link[0][1] = link[1]
+        link[1][0] = link[0]
+
+    def _append(self, link):
+        last = self._root[0]
+        link[0] = last
+        link[1] = self._root
+        last[1] = link
+        self._root[0] = link
@@ -0,0 +1,311 @@
+###############################################################################
+#
+# file:     color.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Colors for the text displayed by termsaver-figlet screens, encoded with as
+few escape sequences (SGR) as possible.
+
+The classes and functions available here are:
+
+    * `Colorizer`: assigns a color to each column of the screen (a solid
+      color, a gradient or a rainbow), and inserts the escape sequences
+      into the text written
+
+    * `parse_color`: parses a color informed by users
+"""
+
+COLOR_NAMES = {
+    'black': (30, (0, 0, 0)),
+    'red': (31, (205, 0, 0)),
+    'green': (32, (0, 205, 0)),
+    'yellow': (33, (205, 205, 0)),
+    'blue': (34, (0, 0, 238)),
+    'magenta': (35, (205, 0, 205)),
+    'cyan': (36, (0, 205, 205)),
+    'white': (37, (229, 229, 229)),
+    'bright-black': (90, (127, 127, 127)),
+    'bright-red': (91, (255, 0, 0)),
+    'bright-green': (92, (0, 255, 0)),
+    'bright-yellow': (93, (255, 255, 0)),
+    'bright-blue': (94, (92, 92, 255)),
+    'bright-magenta': (95, (255, 0, 255)),
+    'bright-cyan': (96, (0, 255, 255)),
+    'bright-white': (97, (255, 255, 255)),
+}
+"""
+The colors known by name, with their SGR codes (as the terminal theme
+displays them) and approximate RGB values (for gradients).
+"""
+
+RAINBOW = [196, 202, 208, 214, 220, 226, 190, 154, 118, 82, 46, 47, 48, 49,
+           50, 51, 45, 39, 33, 27, 21, 57, 93, 129, 165, 201, 200, 199, 198,
+           197]
+"""
+The colors (of the 256 colors palette) of the rainbow, around the color
+wheel, so it can be cycled.
+"""
+
+ESC_RESET = "\x1b[0m"
+"""
+Escape sequence to restore the default colors (and other attributes).
+"""
+
+BAND = 10
+"""
+The minimum number of columns of each color, in gradients and rainbows (each
+change of color costs an escape sequence as long as a few characters).
+"""
+
+CUBE_LEVELS = [0, 95, 135, 175, 215, 255]
+"""
+The intensity levels of each component in the color cube of the 256 colors
+palette (colors 16 to 231).
+"""
+
+
+def parse_color(value):
+    """
+    Parses a color, informed as a name (see `COLOR_NAMES`), a number of the
+    256 colors palette, or #RRGGBB (the nearest of the 256 colors is used).
+    Returns the SGR escape sequence and the RGB value of the color, or
+    raises ValueError if it is not valid.
+    """
+    value = value.strip().lower()
+    if value in COLOR_NAMES:
+        code, rgb = COLOR_NAMES[value]
+        return "\x1b[%dm" % code, rgb
+    if value.startswith('#') and len(value) == 7:
+        rgb = tuple([int(value[i:i + 2], 16) for i in (1, 3, 5)])
+        return "\x1b[38;5;%dm" % nearest_color(rgb), rgb
+    index = int(value)
+    if not 0 <= index <= 255:
+        raise ValueError("color out of range: %d" % index)
+    return "\x1b[38;5;%dm" % index, color_rgb(index)
+
+
+def color_rgb(index):
+    """
+    Returns the (approximate) RGB value of the color `index` of the 256
+    colors palette.
+    """
+    if index < 16:
+        return sorted(COLOR_NAMES.values())[index][1]
+    if index < 232:
+        index -= 16
+        return (CUBE_LEVELS[index // 36], CUBE_LEVELS[index // 6 % 6],
+                CUBE_LEVELS[index % 6])
+    level = 8 + 10 * (index - 232)
+    return (level, level, level)
+
+
+def nearest_color(rgb):
+    """
+    Returns the index of the color of the 256 colors palette (from the color
+    cube or the grays, which do not depend on the terminal theme) nearest to
+    the `rgb` value.
+    """
+    cube = [min(range(6), key=lambda i: abs(CUBE_LEVELS[i] - c)) for c in rgb]
+    best = 16 + 36 * cube[0] + 6 * cube[1] + cube[2]
+    gray = 232 + max(0, min(23, (sum(rgb) // 3 - 3) // 10))
+    if distance(color_rgb(gray), rgb) < distance(color_rgb(best), rgb):
+        best = gray
+    return best
+
+
+def distance(a, b):
+    """
+    Returns the (squared) distance between the RGB values `a` and `b`.
+    """
+    return sum([(x - y) ** 2 for x, y in zip(a, b)])
+
+
+class Colorizer(object):
+    """
+    Assigns a color to each column of the screen, in one of these modes:
+
+        * solid: a single color
+
+        * gradient: colors blended from the left to the right edge of the
+          screen, in bands of `BAND` columns (at least)
+
+        * rainbow: the colors of the rainbow (`RAINBOW`), in bands of `BAND`
+          columns, moving one step every frame (see `advance`)
+
+    Colors belong to screen columns (not to the text), so a moving text is
+    only written again where it actually changed, as if it was monochrome.
+
+    The text is colored by `encode`, which only inserts an escape sequence
+    where a non-blank character needs a color different from the current
+    one of the terminal (blanks look the same in any color), so adjacent
+    characters of the same color are written as a single run. The escape
+    sequences are built once, for each color in use.
+    """
+
+    mode = None
+    """
+    The mode of this colorizer: solid, gradient or rainbow.
+    """
+
+    palette = None
+    """
+    Holds the escape sequences of the colors in use (solid and rainbow), or
+    the colors of the gradient (escape sequence and RGB value).
+    """
+
+    columns = None
+    """
+    Holds the escape sequence of each column of the screen.
+    """
+
+    width = 0
+    """
+    The number of columns `columns` was built for.
+    """
+
+    phase = 0
+    """
+    The current step of the rainbow (see `advance`).
+    """
+
+    generation = 0
+    """
+    A counter of changes of the colors of columns, so everything displayed
+    can be written again (in the new colors) when this changes.
+    """
+
+    current = None
+    """
+    Holds the escape sequence of the color currently set in the terminal,
+    or None if unknown (the colors were not set yet, or were reset).
+    """
+
+    def __init__(self, colors=None, rainbow=False):
+        """
+        Creates a new colorizer, with a solid color (a single one in
+        `colors`, see `parse_color`), a gradient (more than one), or the
+        `rainbow` colors.
+        """
+        if rainbow:
+            self.mode = 'rainbow'
+            self.palette = ["\x1b[38;5;%dm" % c for c in RAINBOW]
+        elif len(colors) == 1:
+            self.mode = 'solid'
+            self.palette = [colors[0][0]]
+        else:
+            self.mode = 'gradient'
+            self.palette = list(colors)
+
+    def set_width(self, width):
+        """
+        Builds the escape sequence of each column, for a screen with `width`
+        columns (only if it changed).
+        """
+        if width == self.width and self.columns is not None:
+            return
+        self.width = width
+        self._build()
+
+    def advance(self):
+        """
+        Moves the rainbow one step (called at the end of every frame). This
+        does nothing in the other modes.
+        """
+        if self.mode == 'rainbow':
+            self.phase = (self.phase + 1) % len(self.palette)
+            self._build()
+
+    def _build(self):
+        """
+        Builds `columns` for the current width, mode and phase.
+        """
+        self.generation += 1
+        width = max(1, self.width)
+        if self.mode == 'solid':
+            self.columns = self.palette * width
+        elif self.mode == 'rainbow':
+            count = len(self.palette)
+            self.columns = [self.palette[(col // BAND + self.phase) % count]
+                            for col in xrange(width)]
+        else:
+            escapes = {}
+            stops = len(self.palette) - 1
+            bands = max(2, width // BAND)
+            self.columns = []
+            for col in xrange(width):
+                position = float(col * bands // width) * stops / (bands - 1)
+                index = min(int(position), stops - 1)
+                rgb = self.blend(self.palette[index][1],
+                                 self.palette[index + 1][1], position - index)
+                code = nearest_color(rgb)
+                if code not in escapes:
+                    escapes[code] = "\x1b[38;5;%dm" % code
+                self.columns.append(escapes[code])
+
+    def blend(self, a, b, ratio):
+        """
+        Returns the RGB value between `a` and `b`, at `ratio` (0 to 1).
+        """
+        return tuple([int(round(x + (y - x) * ratio)) for x, y in zip(a, b)])
+
+    def encode(self, col, text):
+        """
+        Returns the `text` (written from column `col` on) with the escape
+        sequences of the colors of its columns, only where a non-blank
+        character needs a color different from the current one.
+        """
+        current = self.current
+        if self.mode == 'solid':
+            if current is not self.columns[0] and text.strip():
+                self.current = self.columns[0]
+                return self.current + text
+            return text
+
+        columns = self.columns
+        chunks = []
+        start = 0
+        for i in xrange(len(text)):
+            if text[i] != ' ':
+                escape = columns[col + i]
+                if escape is not current:
+                    chunks.append(text[start:i])
+                    chunks.append(escape)
+                    current = escape
+                    start = i
+        if not chunks:
+            return text
+        self.current = current
+        chunks.append(text[start:])
+        return "".join(chunks)
+
+    def reset(self):
+        """
+        Returns the escape sequence restoring the default colors (if they
+        were changed at all), forgetting the current color.
+        """
+        if self.current is None:
+            return ""
+        self.current = None
+        return ESC_RESET
@@ -0,0 +1,122 @@
+###############################################################################
+#
+# file:     common.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Holds common functionality used by termsaver-figlet plugin, complementing the
+ones available in `termsaverlib.common`.
+"""
+
+#
+# Python built-in modules
+#
+import os
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import constants
+
+
+def get_cache_dir():
+    """
+    Retrieves the directory where termsaver-figlet keeps its cache files
+    (which can be safely removed at any time), creating it if applicable.
+
+    Unless overriden by `Settings.CACHE_DIR`, this will be:
+
+        $XDG_CACHE_HOME/termsaver-figlet (~/.cache/termsaver-figlet)
+
+    Returns None if the directory can not be used.
+    """
+    path = constants.Settings.CACHE_DIR
+    if not path:
+        base = os.environ.get('XDG_CACHE_HOME') or \
+            os.path.join(os.path.expanduser('~'), '.cache')
+        path = os.path.join(base, constants.Plugin.NAME)
+
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path)
+        except OSError:
+            return None
+    return path
+
+
+def get_runtime_dir():
+    """
+    Retrieves the directory where termsaver-figlet keeps the files shared by
+    its running processes (such as the shared render cache), creating it if
+    applicable:
+
+        $XDG_RUNTIME_DIR/termsaver-figlet (usually kept in memory)
+
+    If XDG_RUNTIME_DIR is not set, the cache directory is used instead (see
+    `get_cache_dir`). Returns None if the directory can not be used.
+    """
+    base = os.environ.get('XDG_RUNTIME_DIR')
+    if not base or not os.path.isdir(base):
+        return get_cache_dir()
+
+    path = os.path.join(base, constants.Plugin.NAME)
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path, 0700)
+        except OSError:
+            return None
+    return path
+
+
+def write_file(path, data):
+    """
+    Writes `data` into the file `path` atomically (through a temporary file
+    renamed over it), so concurrent readers never see partial contents.
+    Errors are ignored, as this is only used for cache files.
+    """
+    import tempfile
+    try:
+        fd, temp = tempfile.mkstemp(dir=os.path.dirname(path))
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+        os.rename(temp, path)
+    except (IOError, OSError):
+        return False
+    return True
+
+
+def decode_output(output):
+    """
+    Decodes a figlet `output` into unicode, so its lines can be measured and
+    positioned by character (instead of by byte). Output is utf-8 (tlf fonts,
+    or figlet binary), or latin-1 (flf fonts), if it is not valid utf-8.
+    """
+    if isinstance(output, unicode):
+        return output
+    try:
+        return output.decode('utf-8')
+    except UnicodeDecodeError:
+        return output.decode('latin-1')
@@ -0,0 +1,193 @@
+###############################################################################
+#
+# file:     compositor.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Composition of blocks of text (sprites) moving over the terminal, for
+termsaver-figlet screens that display more than one of them at once.
+
+The classes available here are:
+
+    * `Sprite`: a block of lines drawn at a position of the screen
+
+    * `Compositor`: keeps the cells displayed on screen, and composes only
+      the areas where sprites moved from or to, since the previous frame
+"""
+
+
+class Sprite(object):
+    """
+    A block of lines (all with the same length) drawn at a position of the
+    screen, which can be partially (or completely) out of it. Sprites are
+    opaque: their blank characters cover whatever is underneath.
+
+    Sprites are just changed in place (`lines`, `x` and `y`), and the
+    `Compositor` finds out what changed since they were last drawn.
+    """
+
+    lines = ()
+    """
+    Holds the lines of this sprite (a tuple of strings, all with the same
+    length).
+    """
+
+    x = 0
+    """
+    The column (0-based) of the left edge of this sprite.
+    """
+
+    y = 0
+    """
+    The row (0-based) of the top edge of this sprite.
+    """
+
+    def __init__(self, lines=(), x=0, y=0):
+        """
+        Creates a new sprite with `lines` at column `x` and row `y`.
+        """
+        self.lines = lines
+        self.x = x
+        self.y = y
+
+
+class Compositor(object):
+    """
+    Keeps the cells displayed on a screen of `width` and `height` (a fixed
+    buffer, one list of characters per row), and composes the sprites over
+    it, frame by frame.
+
+    Only the areas touched since the previous frame (dirty rectangles) are
+    composed: for each sprite that moved or changed, the area it was drawn
+    on before, and the one it is drawn on now, clipped at the screen edges.
+    So the cost of a frame depends on the area that moved, instead of the
+    size of the screen.
+    """
+
+    width = 0
+    """
+    The number of columns of the screen.
+    """
+
+    height = 0
+    """
+    The number of rows of the screen.
+    """
+
+    cells = None
+    """
+    Holds the characters displayed on screen, one list per row.
+    """
+
+    drawn = None
+    """
+    Holds the sprites drawn in the previous frame, in order, each with the
+    state (lines, x and y) it was drawn with.
+    """
+
+    def __init__(self, width, height):
+        """
+        Creates a new compositor for a blank screen of `width` columns and
+        `height` rows.
+        """
+        self.width = width
+        self.height = height
+        self.cells = [[" "] * width for __ in xrange(height)]
+        self.drawn = []
+
+    def compose(self, sprites):
+        """
+        Composes the `sprites` (in order, the last one on top) over a blank
+        screen, returning the areas that changed since the previous frame,
+        as a list of (row, column, old text, new text) spans.
+        """
+        dirty = {}
+        states = [(s, (s.lines, s.x, s.y)) for s in sprites]
+        if [s for s, __ in states] != [s for s, __ in self.drawn]:
+            # sprites added, removed or reordered: redo all of them
+            for __, state in self.drawn + states:
+                self._mark(dirty, state)
+        else:
+            for (__, old), (__, new) in zip(self.drawn, states):
+                if old[1:] != new[1:] or (old[0] is not new[0]
+                                          and old[0] != new[0]):
+                    self._mark(dirty, old)
+                    self._mark(dirty, new)
+        self.drawn = states
+
+        changes = []
+        for row in sorted(dirty):
+            cells = self.cells[row]
+            for start, end in self._merge(dirty[row]):
+                new = self._compose_span(states, row, start, end)
+                old = "".join(cells[start:end])
+                if new != old:
+                    cells[start:end] = new
+                    changes.append((row, start, old, new))
+        return changes
+
+    def _mark(self, dirty, state):
+        """
+        Adds the area of a sprite `state` (lines, x and y), clipped at the
+        screen edges, to the `dirty` spans of each row.
+        """
+        lines, x, y = state
+        if not lines:
+            return
+        start = max(0, x)
+        end = min(self.width, x + len(lines[0]))
+        if start >= end:
+            return
+        for row in xrange(max(0, y), min(self.height, y + len(lines))):
+            dirty.setdefault(row, []).append((start, end))
+
+    def _merge(self, spans):
+        """
+        Returns the `spans` (start and end columns) sorted, with the ones
+        overlapping (or touching) merged.
+        """
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1] = (merged[-1][0], end)
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _compose_span(self, states, row, start, end):
+        """
+        Returns the text of `row` between the columns `start` and `end`,
+        with the sprite `states` drawn over a blank background.
+        """
+        cells = [" "] * (end - start)
+        for __, (lines, x, y) in states:
+            if not y <= row < y + len(lines):
+                continue
+            line = lines[row - y]
+            left = max(start, x)
+            right = min(end, x + len(line))
+            if left < right:
+                cells[left - start:right - start] = line[left - x:right - x]
+        return "".join(cells)
@@ -95,4 +95,71 @@ class Settings(PropertyClass):
     \"\"\"
 
     """
-    pass
+
+    FONT_PATHS = [
+        '/usr/share/figlet',
+        '/usr/local/share/figlet',
+        '/usr/share/figlet/fonts',
+        '/usr/local/share/figlet/fonts',
+        '/opt/local/share/figlet',
+    ]
+    """
+    Defines the directories where FIGfont files are searched for, in order,
+    before asking the figlet binary for its own font directory (with
+    `figlet -I2`). The environment variable FIGLET_FONTDIR, if set, takes
+    precedence over all of them.
+    """
+
+    EXTRA_FONT_PATHS = [
+        '~/.local/share/figlet',
+        '~/.figlet',
+    ]
+    """
+    Defines additional directories (with less preference than the ones in
+    `FONT_PATHS`) where FIGfont files are searched for, useful for fonts
+    installed by users themselves.
+    """
+
+    CACHE_DIR = None
+    """
+    Defines the directory where cache files (such as the font index) are
+    kept. If not set, $XDG_CACHE_HOME/termsaver-figlet is used (defaults to
+    ~/.cache/termsaver-figlet).
+    """
+
+    RENDER_CACHE_SIZE = 1048576
+    """
+    Defines the maximum memory (in bytes, roughly estimated) used to keep the
+    figlet outputs already rendered, so they are not rendered again in every
+    cycle. The least recently used outputs are discarded first.
+    """
+
+    SHARED_CACHE_SIZE = 1048576
+    """
+    Defines the size (in bytes) of the render cache shared by the screens
+    running at once (when enabled with --shared-cache), kept in a file in
+    $XDG_RUNTIME_DIR/termsaver-figlet (or in `CACHE_DIR`, if not set).
+    Entries larger than 8KB are not shared.
+    """
+
+    USE_RENDER_DAEMON = True
+    """
+    Defines if the screens ask the renderer daemon (the figlet-daemon
+    screen) to render the texts, when it is running, instead of loading the
+    fonts and rendering on their own. They fall back to rendering on their
+    own whenever the daemon is not running, or stops responding.
+    """
+
+    DISMISS_ON_KEY = True
+    """
+    Defines if pressing any key (not only Ctrl+C) dismisses the screens,
+    when displayed on a terminal. Keys are watched while waiting for frames,
+    so the screen is dismissed right away, whatever its delay is.
+    """
+
+    PLAYLIST_QUEUE_DEPTH = 3
+    """
+    Defines how many of the next words of a playlist (when more than one
+    word is displayed in turns) are rendered ahead of time, in background,
+    so switching words never waits for them to be rendered.
+    """
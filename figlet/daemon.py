@@ -0,0 +1,413 @@
+###############################################################################
+#
+# file:     daemon.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A renderer daemon for termsaver-figlet screens: a single process (see
+`figlet-daemon` screen) loads the fonts and renders the texts for all screens
+running (such as in many terminal sessions), which ask it over a local Unix
+socket.
+
+The daemon serves figlet outputs, not composed frames: each screen still
+lays out, colors, diffs and writes its own frames, as these depend on its
+terminal (size, colors and timing), so what is shared is the fonts loaded,
+and the texts rendered, once for all screens.
+
+The classes and functions available here are:
+
+    * `RenderServer`: serves the rendering requests of many screens at once,
+      in a single thread
+
+    * `RenderClient`: asks the daemon to render texts
+
+    * `get_socket_path`: the path of the socket of the daemon
+"""
+
+#
+# Python built-in modules
+#
+import os
+import errno
+import select
+import socket
+import struct
+import threading
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import common
+
+SOCKET_NAME = 'daemon.sock'
+"""
+The name of the socket of the daemon, in the runtime directory (see
+`common.get_runtime_dir`).
+"""
+
+REQUEST_FORMAT = '!I'
+"""
+The header of requests: the length of the data that follows (font, width
+and text, separated by NUL characters).
+"""
+
+REQUEST_SIZE = struct.calcsize(REQUEST_FORMAT)
+"""
+The size (in bytes) of the header of requests.
+"""
+
+RESPONSE_FORMAT = '!BI'
+"""
+The header of responses: a status (`OK` or `ERROR`) and the length of the
+data that follows (the figlet output, or an error message).
+"""
+
+RESPONSE_SIZE = struct.calcsize(RESPONSE_FORMAT)
+"""
+The size (in bytes) of the header of responses.
+"""
+
+OK = 0
+"""
+The status of responses with the figlet output.
+"""
+
+ERROR = 1
+"""
+The status of responses to requests that could not be rendered.
+"""
+
+MAX_REQUEST = 4096
+"""
+The maximum length (in bytes) of requests. Clients sending larger ones are
+disconnected.
+"""
+
+TIMEOUT = 2.0
+"""
+The time (in seconds) clients wait for each response, before giving up the
+daemon (and rendering on their own).
+"""
+
+
+def get_socket_path():
+    """
+    Returns the path of the socket of the daemon, or None if the runtime
+    directory can not be used.
+    """
+    path = common.get_runtime_dir()
+    if path is None:
+        return None
+    return os.path.join(path, SOCKET_NAME)
+
+
+class RenderServer(object):
+    """
+    Serves rendering requests on a Unix socket, from any number of clients
+    (each keeps its connection open), in a single thread: all sockets are
+    non-blocking, and `serve` handles whatever is ready.
+
+    Rendering is done by the function informed (`render`), which is called
+    with the font, width and text of each request, and should return the
+    figlet output (keeping its own cache, so each distinct text is rendered
+    only once, whatever the number of clients asking for it), or raise an
+    exception if it can not be rendered (the client renders it on its own).
+
+    The usage is accounted in the following properties:
+
+        * `requests`: the number of requests served
+
+        * `errors`: the number of requests that could not be rendered
+    """
+
+    path = None
+    """
+    The path of the socket.
+    """
+
+    requests = 0
+    """
+    The number of requests served.
+    """
+
+    errors = 0
+    """
+    The number of requests that could not be rendered.
+    """
+
+    def __init__(self, path, render):
+        """
+        Listens on the Unix socket `path` (replacing it, if left behind by a
+        daemon no longer running), serving requests with `render`. Raises
+        socket.error if it can not be used, or another daemon is running.
+        """
+        self.path = path
+        self.render = render
+        self.clients = {}
+        if os.path.exists(path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                try:
+                    probe.connect(path)
+                except socket.error:
+                    os.unlink(path)
+                else:
+                    raise socket.error(errno.EADDRINUSE,
+                        "a daemon is already running on %s" % path)
+            finally:
+                probe.close()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        os.chmod(path, 0600)
+        self.sock.listen(socket.SOMAXCONN)
+        self.sock.setblocking(0)
+        self.poller = None
+        if hasattr(select, 'poll'):
+            # not limited to FD_SETSIZE descriptors, as select is
+            self.poller = select.poll()
+            self.poller.register(self.sock.fileno(), select.POLLIN)
+
+    def close(self):
+        """
+        Disconnects all clients, and removes the socket.
+        """
+        for fd in self.clients.keys():
+            self._drop(fd)
+        self.sock.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+    def serve(self, timeout):
+        """
+        Waits up to `timeout` seconds for clients to connect, send requests,
+        or receive responses, and handles them.
+        """
+        listener = self.sock.fileno()
+        if self.poller is not None:
+            try:
+                events = self.poller.poll(timeout * 1000)
+            except select.error, e:
+                if e.args[0] == errno.EINTR:
+                    return
+                raise
+            readable = [fd for fd, event in events
+                        if event & (select.POLLIN | select.POLLHUP
+                                    | select.POLLERR)]
+            writable = [fd for fd, event in events
+                        if event & select.POLLOUT]
+        else:
+            writing = [fd for fd in self.clients if self.clients[fd][2]]
+            try:
+                readable, writable, __ = select.select(
+                    [listener] + self.clients.keys(), writing, [], timeout)
+            except select.error, e:
+                if e.args[0] == errno.EINTR:
+                    return
+                raise
+
+        for fd in readable:
+            if fd == listener:
+                self._accept()
+            elif fd in self.clients:
+                self._receive(fd)
+        for fd in writable:
+            if fd in self.clients:
+                self._send(fd)
+
+    def stats(self):
+        """
+        Returns a dictionary with the usage counters of this server.
+        """
+        return {
+            'clients': len(self.clients),
+            'requests': self.requests,
+            'errors': self.errors,
+        }
+
+    def _accept(self):
+        """
+        Accepts the clients waiting to connect.
+        """
+        while True:
+            try:
+                conn = self.sock.accept()[0]
+            except socket.error, e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK,
+                                 errno.EINTR):
+                    return
+                raise
+            conn.setblocking(0)
+            # socket, data received, data to be sent
+            self.clients[conn.fileno()] = [conn, "", ""]
+            if self.poller is not None:
+                self.poller.register(conn.fileno(), select.POLLIN)
+
+    def _receive(self, fd):
+        """
+        Reads what the client `fd` sent, and handles its complete requests.
+        """
+        client = self.clients[fd]
+        try:
+            data = client[0].recv(65536)
+        except socket.error, e:
+            if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR):
+                return
+            data = ""
+        if not data:
+            self._drop(fd)
+            return
+        client[1] += data
+        while len(client[1]) >= REQUEST_SIZE:
+            length = struct.unpack(REQUEST_FORMAT,
+                                   client[1][:REQUEST_SIZE])[0]
+            if length > MAX_REQUEST:
+                self._drop(fd)
+                return
+            if len(client[1]) < REQUEST_SIZE + length:
+                break
+            request = client[1][REQUEST_SIZE:REQUEST_SIZE + length]
+            client[1] = client[1][REQUEST_SIZE + length:]
+            client[2] += self._handle(request)
+        self._send(fd)
+
+    def _handle(self, request):
+        """
+        Renders the `request` (font, width and text), returning the response.
+        """
+        self.requests += 1
+        try:
+            font, width, text = request.split('\0', 2)
+            output = self.render(font, int(width), text)
+            if not isinstance(output, str):
+                raise ValueError("not a byte string")
+        except Exception, e:
+            self.errors += 1
+            message = str(e)
+            return struct.pack(RESPONSE_FORMAT, ERROR, len(message)) + message
+        return struct.pack(RESPONSE_FORMAT, OK, len(output)) + output
+
+    def _send(self, fd):
+        """
+        Sends what is pending to the client `fd` (as much as it takes).
+        """
+        client = self.clients[fd]
+        if client[2]:
+            try:
+                sent = client[0].send(client[2])
+            except socket.error, e:
+                if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK,
+                                 errno.EINTR):
+                    sent = 0
+                else:
+                    self._drop(fd)
+                    return
+            client[2] = client[2][sent:]
+        if self.poller is not None:
+            self.poller.modify(fd, client[2] and select.POLLIN
+                               | select.POLLOUT or select.POLLIN)
+
+    def _drop(self, fd):
+        """
+        Disconnects the client `fd`.
+        """
+        client = self.clients.pop(fd)
+        if self.poller is not None:
+            self.poller.unregister(fd)
+        client[0].close()
+
+
+class RenderClient(object):
+    """
+    Asks the daemon (see `RenderServer`) to render texts, over a connection
+    kept open. This can be used by several threads at once.
+    """
+
+    path = None
+    """
+    The path of the socket of the daemon.
+    """
+
+    def __init__(self, path, timeout=TIMEOUT):
+        """
+        Connects to the daemon listening on `path`, waiting up to `timeout`
+        seconds for each response. Raises socket.error if it is not running.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path)
+        except socket.error:
+            self.sock.close()
+            raise
+
+    def close(self):
+        """
+        Disconnects from the daemon.
+        """
+        self.sock.close()
+
+    def render(self, font, width, text):
+        """
+        Returns the figlet output of `text`, in `font`, for a terminal with
+        `width` columns, or None if the daemon could not render it. Raises
+        socket.error if the daemon is gone (or does not respond in time),
+        and from then on, as the connection is closed.
+        """
+        request = "%s\0%d\0%s" % (font, width, text)
+        self._lock.acquire()
+        try:
+            try:
+                self.sock.sendall(struct.pack(REQUEST_FORMAT, len(request))
+                                  + request)
+                status, length = struct.unpack(RESPONSE_FORMAT,
+                                               self._receive(RESPONSE_SIZE))
+                data = self._receive(length)
+            except socket.error:
+                # a late response would be taken for the one of the next
+                # request, so the connection is not used anymore
+                self.sock.close()
+                raise
+        finally:
+            self._lock.release()
+        if status != OK:
+            return None
+        return data
+
+    def _receive(self, size):
+        """
+        Receives exactly `size` bytes from the daemon.
+        """
+        chunks = []
+        while size > 0:
+            data = self.sock.recv(min(size, 65536))
+            if not data:
+                raise socket.error(errno.ECONNRESET,
+                                   "the daemon closed the connection")
+            chunks.append(data)
+            size -= len(data)
+        return "".join(chunks)
@@ -0,0 +1,207 @@
+###############################################################################
+#
+# file:     events.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Waiting for frames while watching the terminal, used by termsaver-figlet
+screens.
+
+The classes available here are:
+
+    * `EventWaiter`: waits for the deadlines of frames (in place of
+      `time.sleep`), while watching for key presses and terminal resizes at
+      the same time, so they are handled right away
+"""
+
+#
+# Python built-in modules
+#
+import os
+import time
+import errno
+import fcntl
+import signal
+import select
+
+try:
+    import termios
+except ImportError:
+    termios = None
+
+
+class EventWaiter(object):
+    """
+    Waits for the deadlines of frames (see `timing.FrameClock`, which takes
+    `sleep` in place of `time.sleep`), watching at the same time for:
+
+        * a key pressed in the terminal, which dismisses the screen (the
+          same way Ctrl+C does, raising `KeyboardInterrupt`)
+
+        * a signal (such as SIGWINCH, when the terminal is resized), which
+          ends the waiting early, so the screen is drawn again right away
+
+    Everything is waited for with a single `select` call, so nothing is
+    polled, and there is no thread involved: a key press is noticed within
+    milliseconds, instead of after the delay of the screen (which can be
+    several seconds).
+
+    The terminal is put in cbreak mode (keys are read one at a time, and not
+    echoed), until `stop` is called. Signals are noticed through a pipe
+    (see `signal.set_wakeup_fd`), so one arriving right before the waiting
+    starts is not missed.
+    """
+
+    fd = None
+    """
+    The file descriptor of the terminal watched for key presses, or None if
+    only signals are watched.
+    """
+
+    wakeup = None
+    """
+    Holds the pipe (read and write file descriptors) signals are written
+    into, while started.
+    """
+
+    attributes = None
+    """
+    Holds the terminal attributes (see `termios.tcgetattr`) to be restored
+    by `stop`.
+    """
+
+    previous_wakeup = -1
+    """
+    Holds the file descriptor signals were written into, before `start`.
+    """
+
+    interrupted = 0
+    """
+    The number of times waiting ended early because of a signal.
+    """
+
+    def __init__(self, fd=None):
+        """
+        Creates a new instance of this class, watching the terminal in `fd`
+        for key presses (if it is a terminal at all).
+        """
+        if fd is not None and termios is not None and os.isatty(fd):
+            self.fd = fd
+
+    def start(self):
+        """
+        Starts watching: puts the terminal in cbreak mode, and creates the
+        pipe signals are written into.
+        """
+        if self.fd is not None and self.attributes is None:
+            try:
+                self.attributes = termios.tcgetattr(self.fd)
+                mode = termios.tcgetattr(self.fd)
+                mode[3] &= ~(termios.ECHO | termios.ICANON)
+                mode[6][termios.VMIN] = 1
+                mode[6][termios.VTIME] = 0
+                termios.tcsetattr(self.fd, termios.TCSANOW, mode)
+            except termios.error:
+                self.fd = self.attributes = None
+
+        if self.wakeup is None and hasattr(signal, 'set_wakeup_fd'):
+            self.wakeup = os.pipe()
+            for fd in self.wakeup:
+                fcntl.fcntl(fd, fcntl.F_SETFL,
+                            fcntl.fcntl(fd, fcntl.F_GETFL) | os.O_NONBLOCK)
+            self.previous_wakeup = signal.set_wakeup_fd(self.wakeup[1])
+
+    def stop(self):
+        """
+        Stops watching, restoring the terminal mode, and the previous
+        destination of signals.
+        """
+        if self.attributes is not None:
+            try:
+                termios.tcsetattr(self.fd, termios.TCSADRAIN,
+                                  self.attributes)
+            except termios.error:
+                pass
+            self.attributes = None
+
+        if self.wakeup is not None:
+            signal.set_wakeup_fd(self.previous_wakeup)
+            for fd in self.wakeup:
+                os.close(fd)
+            self.wakeup = None
+
+    def sleep(self, seconds):
+        """
+        Waits for `seconds`, or until a signal arrives (returning earlier).
+        Raises `KeyboardInterrupt` if a key is pressed meanwhile.
+        """
+        deadline = time.time() + seconds
+        while True:
+            wait = deadline - time.time()
+            if wait <= 0:
+                return
+            fds = [fd for fd in (self.fd, self.wakeup and self.wakeup[0])
+                   if fd is not None]
+            if not fds:
+                time.sleep(wait)
+                return
+            try:
+                ready = select.select(fds, [], [], wait)[0]
+            except select.error, e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                # the signal is in the pipe as well
+                continue
+            if self.fd in ready and self.read_keys():
+                # dismissed, the same way Ctrl+C does
+                raise KeyboardInterrupt
+            if self.wakeup is not None and self.wakeup[0] in ready:
+                self.read_pipe()
+                self.interrupted += 1
+                return
+
+    def read_keys(self):
+        """
+        Reads (discards) the keys pressed, so they are not left behind in
+        the terminal, returning True if there were any.
+        """
+        try:
+            if os.read(self.fd, 64):
+                return True
+        except OSError, e:
+            if e.errno in (errno.EAGAIN, errno.EINTR):
+                return False
+        # not readable anymore (closed), stop watching it
+        self.fd = None
+        return False
+
+    def read_pipe(self):
+        """
+        Empties the pipe signals are written into.
+        """
+        try:
+            while os.read(self.wakeup[0], 64):
+                pass
+        except OSError:
+            pass
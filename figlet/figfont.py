@@ -0,0 +1,806 @@
+###############################################################################
+#
+# file:     figfont.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A pure python implementation of FIGfont (flf2a/tlf2a) parsing and rendering,
+so termsaver-figlet screens can draw banners without spawning the `figlet`
+command for every cycle.
+
+The rendering algorithm is a direct port of the one found in figlet 2.2 C
+sources (`smushamt`, `smushem`, `addchar`, `splitline` and the main input
+loop), so the output is expected to be the same as the one from:
+
+    figlet -f <font> -w <width> <text>
+
+The classes available here are:
+
+    * `FigFont`: holds a parsed FIGfont file (header and glyphs)
+
+    * `FigletRenderer`: renders a text with a `FigFont`, handling layout
+      modes (full width, fitting, smushing) and line wrapping
+
+    * `LineComposer`: renders single lines incrementally, laying out only
+      the characters that changed at the end of the text
+
+    * `StreamComposer`: lays out an endless stream of characters, handing
+      out the columns that are finished
+
+And the functions:
+
+    * `find_font`: locates a font file by its name in a list of directories
+
+    * `load_font`: parses (once per process) a font file
+
+    * `render`: shortcut to render a text with a font (or font file)
+"""
+
+#
+# Python built-in modules
+#
+import os
+import sys
+
+#
+# Internal modules
+#
+from termsaverlib import exception
+
+SM_EQUAL = 1
+"""
+Horizontal smushing rule 1: equal characters.
+"""
+
+SM_LOWLINE = 2
+"""
+Horizontal smushing rule 2: underscores are replaced by borders.
+"""
+
+SM_HIERARCHY = 4
+"""
+Horizontal smushing rule 3: hierarchy of border characters.
+"""
+
+SM_PAIR = 8
+"""
+Horizontal smushing rule 4: opposite brackets become a vertical bar.
+"""
+
+SM_BIGX = 16
+"""
+Horizontal smushing rule 5: slashes become a big X.
+"""
+
+SM_HARDBLANK = 32
+"""
+Horizontal smushing rule 6: two hardblanks become one.
+"""
+
+SM_KERN = 64
+"""
+Horizontal fitting (kerning) layout.
+"""
+
+SM_SMUSH = 128
+"""
+Horizontal smushing layout.
+"""
+
+FONT_EXTENSIONS = ('.flf', '.tlf')
+"""
+The font file extensions understood by this module, in order of preference.
+"""
+
+ZIP_MAGIC = 'PK\x03\x04'
+"""
+The signature zipped font files start with (figlet reads those as well).
+"""
+
+DEUTSCH_CODES = [196, 214, 220, 228, 246, 252, 223]
+"""
+The additional (required) characters every FIGfont must define after the
+printable ASCII ones.
+"""
+
+_fonts = {}
+"""
+Private cache of parsed fonts, indexed by their file path.
+"""
+
+
+class FigFont(object):
+    """
+    Holds the contents of a FIGfont file: its header information and the
+    glyphs (as lists of rows, with hardblanks still in place), indexed by
+    their character code.
+
+    Fonts are decoded as latin-1 (flf, byte oriented) or utf-8 (tlf), so all
+    rows are unicode strings, and the `encoding` property tells how to get the
+    original bytes back.
+    """
+
+    path = ''
+    """
+    The path of the font file.
+    """
+
+    encoding = 'latin-1'
+    """
+    The encoding of the font file.
+    """
+
+    hardblank = '$'
+    """
+    The sub-character used for blanks that must not be smushed.
+    """
+
+    height = 0
+    """
+    The number of rows of each glyph.
+    """
+
+    baseline = 0
+    """
+    The number of rows from the top of a glyph to its baseline.
+    """
+
+    max_length = 0
+    """
+    The maximum length of a glyph row in the font file (endmarks included).
+    """
+
+    old_layout = 0
+    """
+    The (legacy) layout value from the header.
+    """
+
+    full_layout = 0
+    """
+    The layout value from the header, calculated from `old_layout` if the
+    font does not define it.
+    """
+
+    print_direction = 0
+    """
+    The print direction of the font: 0 for left-to-right, 1 for
+    right-to-left.
+    """
+
+    comment = ''
+    """
+    The comment lines of the font file.
+    """
+
+    glyphs = None
+    """
+    The glyphs of the font, as a dictionary of character codes to their
+    list of rows.
+    """
+
+    def __init__(self, path):
+        """
+        Creates a new instance of this class, parsing the font file informed
+        in `path`.
+        """
+        self.path = path
+        self.glyphs = {}
+        if os.path.splitext(path)[1].lower() == '.tlf':
+            self.encoding = 'utf-8'
+        self._parse(self._read(path))
+
+    def _read(self, path):
+        """
+        Reads the contents of the font file, which can also be zipped (only
+        its first entry is considered, as figlet does).
+        """
+        try:
+            f = open(path, 'rb')
+            try:
+                data = f.read()
+            finally:
+                f.close()
+            if data[:4] == ZIP_MAGIC:
+                data = self._unzip(path)
+        except (IOError, OSError, IndexError), e:
+            raise exception.PathNotFoundException(path, str(e))
+        return data.decode(self.encoding, 'replace')
+
+    def _unzip(self, path):
+        """
+        Reads the first entry of the zipped font file (`zipfile` is only
+        imported here, as few fonts are zipped).
+        """
+        import zipfile
+        try:
+            z = zipfile.ZipFile(path)
+            try:
+                return z.read(z.namelist()[0])
+            finally:
+                z.close()
+        except zipfile.BadZipfile, e:
+            raise IOError(str(e))
+
+    def _parse(self, data):
+        """
+        Parses the font data (already decoded), populating the header
+        properties and the glyphs of this instance.
+        """
+        lines = data.replace('\r\n', '\n').split('\n')
+        header = lines[0]
+        if header[:4] not in ('flf2', 'tlf2') or len(header) < 6:
+            raise exception.TermSaverException(
+                "Invalid FIGfont header in %s" % self.path)
+        self.hardblank = header[5]
+        try:
+            values = [int(x) for x in header[6:].split()]
+            self.height, self.baseline, self.max_length, self.old_layout, \
+                comment_lines = values[:5]
+        except ValueError:
+            raise exception.TermSaverException(
+                "Invalid FIGfont header in %s" % self.path)
+        if self.height < 1:
+            raise exception.TermSaverException(
+                "Invalid FIGfont height in %s" % self.path)
+        if len(values) > 5:
+            self.print_direction = values[5]
+        if len(values) > 6:
+            self.full_layout = values[6]
+        elif self.old_layout == 0:
+            self.full_layout = SM_KERN
+        elif self.old_layout < 0:
+            self.full_layout = 0
+        else:
+            self.full_layout = (self.old_layout & 31) | SM_SMUSH
+
+        self.comment = "\n".join(lines[1:1 + comment_lines])
+        pos = 1 + comment_lines
+
+        # required characters
+        for code in range(32, 127) + DEUTSCH_CODES:
+            if pos + self.height > len(lines):
+                return
+            self.glyphs[code] = self._read_glyph(lines, pos)
+            pos += self.height
+
+        # code tagged characters
+        while pos + self.height < len(lines):
+            tag = lines[pos].split(None, 1)
+            pos += 1
+            try:
+                code = int(tag[0], 0)
+            except (ValueError, IndexError):
+                # skip the glyph of a broken tag, as figlet does
+                pos += self.height
+                continue
+            self.glyphs[code] = self._read_glyph(lines, pos)
+            pos += self.height
+
+    def _read_glyph(self, lines, pos):
+        """
+        Reads the rows of a glyph starting at `pos`, removing their trailing
+        blanks and endmarks.
+        """
+        rows = []
+        for line in lines[pos:pos + self.height]:
+            line = line.rstrip(' \t\r\n\x0b\x0c')
+            if line:
+                line = line.rstrip(line[-1])
+            rows.append(line)
+        return rows
+
+    def get_glyph(self, code):
+        """
+        Returns the rows of the glyph for character `code`, or None if the
+        font does not define it.
+        """
+        return self.glyphs.get(code)
+
+    def codes(self):
+        """
+        Returns the sorted list of character codes defined in this font.
+        """
+        codes = self.glyphs.keys()
+        codes.sort()
+        return codes
+
+    def encode(self, text):
+        """
+        Converts a rendered (unicode) text back into the font encoding.
+        """
+        return text.encode(self.encoding, 'replace')
+
+
+class FigletRenderer(object):
+    """
+    Renders a text using a `FigFont` (or any object with the same
+    properties and `get_glyph` method, see `fontcache.CompiledFont`),
+    replicating figlet's behavior for its
+    default options (layout from the font, left justified for left-to-right
+    fonts, right justified otherwise).
+    """
+
+    def __init__(self, font, width=80):
+        """
+        Creates a new renderer for the informed `font` (a `FigFont`
+        instance), wrapping lines at `width` columns (same as `figlet -w`).
+        """
+        self.font = font
+        self.width = width
+        self.smush_mode = font.full_layout & 255
+        self.right2left = font.print_direction == 1
+        self.line_limit = width - 1
+        self.input_limit = width * 4 + 100
+        self.lines = []
+        self._clear()
+        self.current = [''] * font.height
+        self.current_width = 0
+        self.previous_width = 0
+
+    def _clear(self):
+        """
+        Clears the output line being built.
+        """
+        self.output = [''] * self.font.height
+        self.output_len = 0
+        self.input_line = []
+
+    def _get_letter(self, c):
+        """
+        Sets the current glyph to be the one of character code `c`, or the
+        missing character (code 0, or an empty glyph) if not available.
+        """
+        glyph = self.font.get_glyph(c)
+        if glyph is None:
+            glyph = self.font.get_glyph(0)
+            if glyph is None:
+                glyph = [''] * self.font.height
+        self.current = glyph
+        self.previous_width = self.current_width
+        self.current_width = len(glyph[0])
+
+    def _smushem(self, lch, rch):
+        """
+        Returns the character resulting of smushing `lch` and `rch`, or an
+        empty string if they can not be smushed.
+        """
+        if lch == ' ':
+            return rch
+        if rch == ' ':
+            return lch
+        if self.previous_width < 2 or self.current_width < 2:
+            return ''
+        mode = self.smush_mode
+        if not mode & SM_SMUSH:
+            return ''
+        hardblank = self.font.hardblank
+        if not mode & 63:
+            # universal overlapping
+            if lch == hardblank:
+                return rch
+            if rch == hardblank:
+                return lch
+            if self.right2left:
+                return lch
+            return rch
+        if mode & SM_HARDBLANK:
+            if lch == hardblank and rch == hardblank:
+                return lch
+        if lch == hardblank or rch == hardblank:
+            return ''
+        if mode & SM_EQUAL:
+            if lch == rch:
+                return lch
+        if mode & SM_LOWLINE:
+            if lch == '_' and rch in "|/\\[]{}()<>":
+                return rch
+            if rch == '_' and lch in "|/\\[]{}()<>":
+                return lch
+        if mode & SM_HIERARCHY:
+            for left, right in (("|", "/\\[]{}()<>"), ("/\\", "[]{}()<>"),
+                                ("[]", "{}()<>"), ("{}", "()<>"),
+                                ("()", "<>")):
+                if lch in left and rch in right:
+                    return rch
+                if rch in left and lch in right:
+                    return lch
+        if mode & SM_PAIR:
+            if lch + rch in ("[]", "][", "{}", "}{", "()", ")("):
+                return '|'
+        if mode & SM_BIGX:
+            if lch == '/' and rch == '\\':
+                return '|'
+            if lch == '\\' and rch == '/':
+                return 'Y'
+            if lch == '>' and rch == '<':
+                return 'X'
+        return ''
+
+    def _smush_amount(self):
+        """
+        Calculates how many columns the current glyph can be moved into the
+        output line being built.
+        """
+        if not self.smush_mode & (SM_SMUSH | SM_KERN):
+            return 0
+        max_smush = self.current_width
+        for row in range(self.font.height):
+            if self.right2left:
+                line = self.current[row]
+                other = self.output[row]
+            else:
+                line = self.output[row]
+                other = self.current[row]
+            stripped = line.rstrip(' ')
+            if stripped:
+                bound = len(stripped) - 1
+                ch1 = line[bound]
+            else:
+                bound = 0
+                ch1 = line[:1]
+            start = len(other) - len(other.lstrip(' '))
+            ch2 = other[start:start + 1]
+            if self.right2left:
+                amt = start + self.current_width - 1 - bound
+            else:
+                amt = start + self.output_len - 1 - bound
+            if not ch1 or ch1 == ' ':
+                amt += 1
+            elif ch2:
+                if self._smushem(ch1, ch2):
+                    amt += 1
+            if amt < max_smush:
+                max_smush = amt
+        return max_smush
+
+    def _add_char(self, c):
+        """
+        Adds the character code `c` to the output line being built, returning
+        False if it does not fit into it.
+        """
+        self._get_letter(c)
+        amount = self._smush_amount()
+        if self.output_len + self.current_width - amount > self.line_limit \
+                or len(self.input_line) + 1 > self.input_limit:
+            return False
+        for row in range(self.font.height):
+            glyph = self.current[row]
+            line = self.output[row]
+            if self.right2left:
+                temp = list(glyph)
+                for k in range(amount):
+                    col = self.current_width - amount + k
+                    if 0 <= col < len(temp) and k < len(line):
+                        temp[col] = self._smushem(temp[col], line[k]) \
+                            or temp[col]
+                self.output[row] = "".join(temp) + line[amount:]
+            else:
+                if line:
+                    temp = list(line)
+                    for k in range(amount):
+                        col = max(0, self.output_len - amount + k)
+                        if col < len(temp) and k < len(glyph):
+                            temp[col] = self._smushem(temp[col], glyph[k]) \
+                                or temp[col]
+                    line = "".join(temp)
+                self.output[row] = line + glyph[amount:]
+        self.output_len = len(self.output[0])
+        self.input_line.append(c)
+        return True
+
+    def _put_string(self, text):
+        """
+        Adds a finished row to the rendered lines, applying justification,
+        truncation and replacing hardblanks by spaces.
+        """
+        if self.width > 1:
+            text = text[:self.width - 1]
+            if self.right2left:
+                text = " " * (self.width - 1 - len(text)) + text
+        self.lines.append(text.replace(self.font.hardblank, ' '))
+
+    def _print_line(self):
+        """
+        Flushes the output line being built into the rendered lines.
+        """
+        for row in self.output:
+            self._put_string(row)
+        self._clear()
+
+    def _split_line(self):
+        """
+        Splits the output line being built at its last word boundary, flushing
+        the first part and keeping the second one.
+        """
+        chars = self.input_line
+        got_space = False
+        last_space = len(chars) - 1
+        i = len(chars) - 1
+        while i >= 0:
+            if not got_space and chars[i] == 32:
+                got_space = True
+                last_space = i
+            if got_space and chars[i] != 32:
+                break
+            i -= 1
+        part1 = chars[:i + 1]
+        part2 = chars[last_space + 1:]
+        self._clear()
+        for c in part1:
+            self._add_char(c)
+        self._print_line()
+        for c in part2:
+            self._add_char(c)
+
+    def render(self, text):
+        """
+        Renders the `text` (unicode, or utf-8/latin-1 encoded string),
+        returning the list of rendered lines.
+        """
+        if not isinstance(text, unicode):
+            try:
+                text = text.decode('utf-8')
+            except UnicodeDecodeError:
+                text = text.decode('latin-1')
+
+        self.lines = []
+        self._clear()
+        word_break = 0
+
+        # figlet always sees a new line at the end of command-line input
+        for c in [ord(x) for x in text + '\n']:
+            if c < 128 and unichr(c).isspace():
+                if c in (9, 32):
+                    c = 32
+                else:
+                    c = 10
+            if (0 < c < 32 and c != 10) or c == 127:
+                continue
+
+            char_not_added = True
+            while char_not_added:
+                char_not_added = False
+
+                if word_break == -1:
+                    if c == 32:
+                        break
+                    elif c == 10:
+                        word_break = 0
+                        break
+                    word_break = 0
+
+                if c == 10:
+                    self._print_line()
+                    word_break = 0
+                elif self._add_char(c):
+                    if c != 32:
+                        word_break = (word_break >= 2) and 3 or 1
+                    else:
+                        word_break = (word_break > 0) and 2 or 0
+                elif self.output_len == 0:
+                    # a single glyph larger than the line
+                    for row in self.current:
+                        if self.right2left and self.width > 1:
+                            row = row[max(0, len(row) - self.line_limit):]
+                        self._put_string(row)
+                    word_break = -1
+                elif c == 32:
+                    if word_break == 2:
+                        self._split_line()
+                    else:
+                        self._print_line()
+                    word_break = -1
+                else:
+                    if word_break >= 2:
+                        self._split_line()
+                    else:
+                        self._print_line()
+                    word_break = (word_break == 3) and 1 or 0
+                    char_not_added = True
+
+        if self.output_len:
+            self._print_line()
+        return self.lines
+
+
+class LineComposer(FigletRenderer):
+    """
+    Composes a single line of text (see `FigletRenderer`) incrementally: the
+    layout state after each character is kept, so composing a text that
+    shares a prefix with the previous one only lays out (and smushes) the
+    characters after that prefix. This makes the cost of texts that change
+    only at the end (such as a clock) roughly constant.
+    """
+
+    def __init__(self, font, width=80):
+        """
+        Creates a new composer for the informed `font`, for lines of up to
+        `width` columns.
+        """
+        FigletRenderer.__init__(self, font, width)
+        self.codes = []
+        self.states = [self._get_state()]
+
+    def _get_state(self):
+        """
+        Returns the state of the output line being built.
+        """
+        return (tuple(self.output), self.output_len, self.current,
+                self.current_width)
+
+    def _set_state(self, index):
+        """
+        Restores the state of the output line after the first `index`
+        characters.
+        """
+        output, self.output_len, self.current, self.current_width = \
+            self.states[index]
+        self.output = list(output)
+        del self.states[index + 1:]
+        del self.codes[index:]
+        self.input_line = list(self.codes)
+
+    def compose(self, text):
+        """
+        Composes the `text` (unicode, or utf-8/latin-1 encoded string, in a
+        single line), returning the list of rendered lines (the same as
+        `FigletRenderer.render` would), or None if it does not fit the width
+        (or has more than one line).
+        """
+        if not isinstance(text, unicode):
+            try:
+                text = text.decode('utf-8')
+            except UnicodeDecodeError:
+                text = text.decode('latin-1')
+
+        codes = []
+        for c in [ord(x) for x in text]:
+            if c in (9, 32):
+                c = 32
+            elif c < 128 and unichr(c).isspace():
+                return None
+            if (0 < c < 32) or c == 127:
+                continue
+            codes.append(c)
+
+        common = 0
+        for old, new in zip(self.codes, codes):
+            if old != new:
+                break
+            common += 1
+        self._set_state(common)
+        for c in codes[common:]:
+            if not self._add_char(c):
+                self._set_state(common)
+                return None
+            self.codes.append(c)
+            self.states.append(self._get_state())
+
+        self.lines = []
+        for row in self.output:
+            self._put_string(row)
+        return self.lines
+
+
+class StreamComposer(FigletRenderer):
+    """
+    Lays out an endless stream of characters in a single line (always from
+    left to right, without wrapping), handing out the columns that are
+    finished as soon as possible: smushing a glyph only changes the last
+    columns of the line (up to the width of a glyph), so only these are
+    kept, no matter how long the stream is.
+    """
+
+    def __init__(self, font):
+        """
+        Creates a new composer for the informed `font`.
+        """
+        FigletRenderer.__init__(self, font)
+        self.right2left = False
+        self.line_limit = self.input_limit = sys.maxint
+        self.keep = max(1, font.max_length)
+
+    def add(self, text):
+        """
+        Adds the characters of `text` (unicode, control characters are
+        ignored) to the line, returning the finished columns (one string per
+        row), or None if there are none yet.
+        """
+        for c in [ord(x) for x in text]:
+            if c == 9:
+                c = 32
+            if (0 < c < 32) or c == 127:
+                continue
+            self._add_char(c)
+        del self.input_line[:]
+        return self._take(self.output_len - self.keep)
+
+    def flush(self):
+        """
+        Returns all the remaining columns (or None, if there are none), and
+        starts the line over.
+        """
+        columns = self._take(self.output_len)
+        self._clear()
+        return columns
+
+    def _take(self, count):
+        """
+        Removes the first `count` columns of the line, returning them.
+        """
+        if count <= 0:
+            return None
+        columns = []
+        for row in range(self.font.height):
+            line = self.output[row]
+            if len(line) < self.output_len:
+                line += " " * (self.output_len - len(line))
+            columns.append(line[:count].replace(self.font.hardblank, ' '))
+            self.output[row] = line[count:]
+        self.output_len -= count
+        return columns
+
+
+def find_font(name, paths):
+    """
+    Locates the font file for the font `name` (with or without extension, or
+    even a full path) within the list of directories `paths`. Returns None if
+    it could not be found.
+    """
+    if os.path.dirname(name):
+        candidates = [name]
+    else:
+        candidates = [os.path.join(path, name) for path in paths]
+    for candidate in candidates:
+        if os.path.splitext(candidate)[1].lower() in FONT_EXTENSIONS \
+                and os.path.isfile(candidate):
+            return candidate
+        for ext in FONT_EXTENSIONS:
+            if os.path.isfile(candidate + ext):
+                return candidate + ext
+    return None
+
+
+def load_font(path):
+    """
+    Returns the `FigFont` for the font file in `path`, parsing it only once
+    per process.
+    """
+    font = _fonts.get(path)
+    if font is None:
+        font = FigFont(path)
+        _fonts[path] = font
+    return font
+
+
+def render(font, text, width=80):
+    """
+    Renders the `text` with `font` (a font object, or the path of a font
+    file), wrapping lines at `width` columns, and returns the output as a
+    string in the font encoding (the same figlet would print).
+    """
+    if isinstance(font, basestring):
+        font = load_font(font)
+    return font.encode(
+        "\n".join(FigletRenderer(font, width).render(text)))
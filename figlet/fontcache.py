@@ -0,0 +1,357 @@
+###############################################################################
+#
+# file:     fontcache.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A cache of compiled FIGfonts, so fonts are parsed only once (per font file
+change), instead of every time a screen starts.
+
+A compiled font is a single binary file holding the font header, a sorted
+table of character codes (plus a direct lookup table for codes below 256),
+and all glyph rows in one contiguous block, addressed by an offset table.
+These files are memory-mapped (read-only), so glyphs are read straight from
+the mapping when needed, and concurrent processes share the same pages.
+Without a cache directory, fonts are still compiled, but kept in memory, as
+a single string (a fraction of the memory taken by the parsed font).
+
+The file format (all values little-endian) is:
+
+    * header (see `HEADER_FORMAT`)
+    * sorted character codes (int32 each)
+    * direct lookup table for codes 0-255 (int16 glyph index, -1 if none)
+    * row offsets, `height + 1` per glyph (uint32, relative to the rows)
+    * glyph rows (encoded in the font encoding)
+    * font comment (encoded in the font encoding)
+
+The classes available here are:
+
+    * `CompiledFont`: a font loaded from a compiled font file
+
+And the functions:
+
+    * `pack_font`: returns the compiled version of a `figfont.FigFont`
+
+    * `compile_font`: writes a compiled font file from a `figfont.FigFont`
+
+    * `load_font`: loads a font file, through its compiled version
+"""
+
+#
+# Python built-in modules
+#
+import os
+import mmap
+import struct
+import zlib
+
+#
+# Internal modules
+#
+from termsaverlib import exception
+from termsaverlib.plugins.figlet import common, figfont
+
+MAGIC = 'TSFC'
+"""
+The signature of compiled font files.
+"""
+
+VERSION = 1
+"""
+The version of the compiled font format.
+"""
+
+HEADER_FORMAT = '<4sHBxiiiiiiIdqIIIIIII'
+"""
+The struct format of the compiled font header: magic, version, encoding,
+height, baseline, max length, old layout, full layout, print direction,
+hardblank, source mtime, source size, glyph count, and the offsets of the
+code table, dense table, row offsets, rows and comment (plus the comment
+length).
+"""
+
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+"""
+The size of the compiled font header, in bytes.
+"""
+
+DENSE_CODES = 256
+"""
+The number of character codes with direct lookup (no searching).
+"""
+
+ENCODINGS = ['latin-1', 'utf-8']
+"""
+The encodings supported in compiled fonts (stored by their index).
+"""
+
+_fonts = {}
+"""
+Private cache of loaded fonts, indexed by their file path.
+"""
+
+
+class CompiledFont(object):
+    """
+    Holds a font loaded from a compiled font file (or its contents), with the
+    same properties of `figfont.FigFont` and the `get_glyph` method (so it
+    can be used by `figfont.FigletRenderer`). Glyphs are only decoded from
+    the mapping when first used.
+
+    Instances hold nothing but the header values and the glyphs already
+    decoded (there is no instance dictionary), as many fonts may be loaded
+    at once.
+    """
+
+    __slots__ = ('path', 'cache_file', 'encoding', 'hardblank', 'height',
+                 'baseline', 'max_length', 'old_layout', 'full_layout',
+                 'print_direction', 'comment', 'source_mtime', 'source_size',
+                 'count', '_map', '_codes_off', '_dense_off', '_table_off',
+                 '_rows_off', '_glyphs')
+
+    def __init__(self, path, cache_file, data=None):
+        """
+        Creates a new instance of this class, mapping the `cache_file` holding
+        the compiled version of the font file in `path`, or using `data` (the
+        compiled version itself, see `pack_font`), if informed.
+        """
+        self.path = path
+        self.cache_file = cache_file
+        if data is not None:
+            self._map = data
+        else:
+            fd = os.open(cache_file, os.O_RDONLY)
+            try:
+                self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+            finally:
+                os.close(fd)
+        if len(self._map) < HEADER_SIZE:
+            raise exception.TermSaverException(
+                "Invalid compiled font %s" % cache_file)
+        magic, version, encoding, self.height, self.baseline, \
+            self.max_length, self.old_layout, self.full_layout, \
+            self.print_direction, hardblank, self.source_mtime, \
+            self.source_size, self.count, self._codes_off, \
+            self._dense_off, self._table_off, self._rows_off, \
+            comment_off, comment_len = struct.unpack(HEADER_FORMAT,
+                                                     self._map[:HEADER_SIZE])
+        if magic != MAGIC or version != VERSION:
+            raise exception.TermSaverException(
+                "Invalid compiled font %s" % cache_file)
+        self.encoding = ENCODINGS[encoding]
+        self.hardblank = unichr(hardblank)
+        self.comment = self._map[comment_off:comment_off + comment_len] \
+            .decode(self.encoding)
+        self._glyphs = {}
+
+    def is_current(self):
+        """
+        Returns True if the source font file did not change since it was
+        compiled.
+        """
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return st.st_mtime == self.source_mtime \
+            and st.st_size == self.source_size
+
+    def _find(self, code):
+        """
+        Returns the index of the glyph of character `code`, or -1 if the
+        font does not define it.
+        """
+        if 0 <= code < DENSE_CODES:
+            offset = self._dense_off + 2 * code
+            return struct.unpack('<h', self._map[offset:offset + 2])[0]
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            offset = self._codes_off + 4 * middle
+            value = struct.unpack('<i', self._map[offset:offset + 4])[0]
+            if value < code:
+                low = middle + 1
+            elif value > code:
+                high = middle
+            else:
+                return middle
+        return -1
+
+    def get_glyph(self, code):
+        """
+        Returns the rows of the glyph for character `code`, or None if the
+        font does not define it.
+        """
+        glyph = self._glyphs.get(code)
+        if glyph is None and code not in self._glyphs:
+            index = self._find(code)
+            if index >= 0:
+                size = 4 * (self.height + 1)
+                offset = self._table_off + size * index
+                offsets = struct.unpack('<%dI' % (self.height + 1),
+                                        self._map[offset:offset + size])
+                base = self._rows_off
+                glyph = [self._map[base + offsets[i]:base + offsets[i + 1]]
+                         .decode(self.encoding)
+                         for i in range(self.height)]
+            self._glyphs[code] = glyph
+        return glyph
+
+    def codes(self):
+        """
+        Returns the sorted list of character codes defined in this font.
+        """
+        return list(struct.unpack('<%di' % self.count, self._map[
+            self._codes_off:self._codes_off + 4 * self.count]))
+
+    def encode(self, text):
+        """
+        Converts a rendered (unicode) text back into the font encoding.
+        """
+        return text.encode(self.encoding, 'replace')
+
+    def close(self):
+        """
+        Releases the memory mapping of this font.
+        """
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+def get_cache_file(path):
+    """
+    Returns the path of the compiled version of the font file `path`, or None
+    if there is no cache directory available.
+    """
+    cache_dir = common.get_cache_dir()
+    if cache_dir is None:
+        return None
+    cache_dir = os.path.join(cache_dir, 'fonts')
+    if not os.path.isdir(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            return None
+    path = os.path.abspath(path)
+    return os.path.join(cache_dir, "%s-%08x.fc" % (
+        os.path.splitext(os.path.basename(path))[0],
+        zlib.crc32(path) & 0xffffffff))
+
+
+def pack_font(font):
+    """
+    Returns the compiled version of `font` (a `figfont.FigFont`), as a
+    string (see the file format in the module documentation).
+    """
+    st = os.stat(font.path)
+    codes = font.codes()
+    dense = [-1] * DENSE_CODES
+    offsets = []
+    rows = []
+    size = 0
+    for index, code in enumerate(codes):
+        if 0 <= code < DENSE_CODES:
+            dense[code] = index
+        glyph = font.get_glyph(code)
+        for i in range(font.height):
+            row = font.encode(i < len(glyph) and glyph[i] or u'')
+            offsets.append(size)
+            rows.append(row)
+            size += len(row)
+        offsets.append(size)
+    rows = "".join(rows)
+    comment = font.encode(font.comment)
+
+    codes_off = HEADER_SIZE
+    dense_off = codes_off + 4 * len(codes)
+    table_off = dense_off + 2 * DENSE_CODES
+    rows_off = table_off + 4 * len(offsets)
+    comment_off = rows_off + len(rows)
+    header = struct.pack(HEADER_FORMAT, MAGIC, VERSION,
+        ENCODINGS.index(font.encoding), font.height, font.baseline,
+        font.max_length, font.old_layout, font.full_layout,
+        font.print_direction, ord(font.hardblank), st.st_mtime, st.st_size,
+        len(codes), codes_off, dense_off, table_off, rows_off, comment_off,
+        len(comment))
+    return "".join([header,
+        struct.pack('<%di' % len(codes), *codes),
+        struct.pack('<%dh' % DENSE_CODES, *dense),
+        struct.pack('<%dI' % len(offsets), *offsets),
+        rows, comment])
+
+
+def compile_font(font, cache_file):
+    """
+    Writes the compiled version of `font` (a `figfont.FigFont`) into
+    `cache_file`. Returns False if it could not be compiled, or written.
+    """
+    try:
+        data = pack_font(font)
+    except (struct.error, ValueError):
+        return False
+    return common.write_file(cache_file, data)
+
+
+def load_font(path):
+    """
+    Returns the font for the font file in `path`, loaded from its compiled
+    version (compiling it first, if it does not exist or is outdated). If
+    the cache directory is not available, the compiled version is kept in
+    memory instead (or the parsed font, if it can not be compiled at all).
+
+    Fonts are loaded only once per process.
+    """
+    font = _fonts.get(path)
+    if font is not None:
+        return font
+
+    cache_file = get_cache_file(path)
+    if cache_file is not None:
+        try:
+            font = CompiledFont(path, cache_file)
+            if not font.is_current():
+                font.close()
+                font = None
+        except (exception.TermSaverException, EnvironmentError,
+                struct.error, ValueError):
+            font = None
+
+    if font is None:
+        parsed = figfont.FigFont(path)
+        if cache_file is not None and compile_font(parsed, cache_file):
+            try:
+                font = CompiledFont(path, cache_file)
+            except (exception.TermSaverException, EnvironmentError,
+                    struct.error, ValueError):
+                pass
+        if font is None:
+            # the parsed font is discarded, only its compiled version is kept
+            try:
+                font = CompiledFont(path, None, pack_font(parsed))
+            except (exception.TermSaverException, struct.error, ValueError):
+                # unless it can not be compiled at all
+                font = parsed
+
+    _fonts[path] = font
+    return font
@@ -0,0 +1,221 @@
+###############################################################################
+#
+# file:     fontindex.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+An index of the figlet fonts installed in the system, built by scanning the
+font directories in-process and persisted in a cache file, so listing or
+validating fonts does not require scanning directories (or executing figlet)
+again, until any of those directories change.
+
+The classes available here are:
+
+    * `FontIndex`
+"""
+
+#
+# Python built-in modules
+#
+import os
+import cPickle
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import common, figfont
+
+CONTROL_EXTENSION = '.flc'
+"""
+The extension of figlet control files (character mappings).
+"""
+
+INDEX_VERSION = 1
+"""
+The version of the index file format, to discard files from older versions.
+"""
+
+
+class FontIndex(object):
+    """
+    Holds the font files (flf, tlf) and control files (flc) found in a list
+    of directories (and their sub-directories), indexed by their names
+    (without extension). When the same name is found more than once, the
+    first directory wins, and flf files are preferred over tlf ones.
+
+    The index is validated against the modification times of all scanned
+    directories, so adding or removing fonts is noticed without scanning
+    them again.
+    """
+
+    paths = None
+    """
+    The directories scanned for fonts, in order of preference.
+    """
+
+    fonts = None
+    """
+    A dictionary of font names to their file paths.
+    """
+
+    controls = None
+    """
+    A dictionary of control file names to their file paths.
+    """
+
+    cache_file = None
+    """
+    The file where this index is persisted (optional).
+    """
+
+    def __init__(self, paths, cache_file=None):
+        """
+        Creates a new index of the directories in `paths`, persisted in
+        `cache_file` (if informed). The index is loaded from the cache file if
+        it is still valid, or built from scratch otherwise.
+        """
+        self.paths = list(paths)
+        self.cache_file = cache_file
+        self.fonts = {}
+        self.controls = {}
+        self._mtimes = {}
+        if not self._load():
+            self.scan()
+
+    def get_font(self, name):
+        """
+        Returns the file path of the font `name`, or None if not available.
+        """
+        return self.fonts.get(name)
+
+    def get_control(self, name):
+        """
+        Returns the file path of the control file `name`, or None if not
+        available.
+        """
+        return self.controls.get(name)
+
+    def font_names(self):
+        """
+        Returns the sorted list of available font names.
+        """
+        names = self.fonts.keys()
+        names.sort()
+        return names
+
+    def add_path(self, path):
+        """
+        Adds a directory to the ones scanned by this index (with the least
+        preference), updating the index accordingly.
+        """
+        if path not in self.paths:
+            self.paths.append(path)
+            self.scan()
+
+    def scan(self):
+        """
+        Scans all directories for font and control files, and persists the
+        results in the cache file (if applicable).
+        """
+        self.fonts = {}
+        self.controls = {}
+        self._mtimes = {}
+        for path in self.paths:
+            for root, dirs, files in os.walk(path):
+                try:
+                    self._mtimes[root] = os.stat(root).st_mtime
+                except OSError:
+                    continue
+                dirs.sort()
+                files.sort()
+                for ext in figfont.FONT_EXTENSIONS:
+                    for f in files:
+                        name, e = os.path.splitext(f)
+                        if e.lower() == ext and name not in self.fonts:
+                            self.fonts[name] = os.path.join(root, f)
+                for f in files:
+                    name, e = os.path.splitext(f)
+                    if e.lower() == CONTROL_EXTENSION \
+                            and name not in self.controls:
+                        self.controls[name] = os.path.join(root, f)
+
+            # also watch directories that do not exist (yet)
+            if path not in self._mtimes:
+                self._mtimes[path] = None
+        self._save()
+
+    def is_valid(self):
+        """
+        Returns True if none of the scanned directories changed since the
+        index was built.
+        """
+        for path, mtime in self._mtimes.iteritems():
+            try:
+                if os.stat(path).st_mtime != mtime:
+                    return False
+            except OSError:
+                if mtime is not None:
+                    return False
+        return True
+
+    def _load(self):
+        """
+        Loads the index from the cache file, returning False if it does not
+        exist, or if it is no longer valid.
+        """
+        if not self.cache_file:
+            return False
+        try:
+            f = open(self.cache_file, 'rb')
+            try:
+                data = cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            return False
+        if not isinstance(data, dict) \
+                or data.get('version') != INDEX_VERSION \
+                or data['paths'][:len(self.paths)] != self.paths:
+            return False
+        self._mtimes = data['mtimes']
+        if not self.is_valid():
+            return False
+        self.paths = data['paths']
+        self.fonts = data['fonts']
+        self.controls = data['controls']
+        return True
+
+    def _save(self):
+        """
+        Persists the index in the cache file, if applicable.
+        """
+        if not self.cache_file:
+            return
+        common.write_file(self.cache_file, cPickle.dumps({
+            'version': INDEX_VERSION,
+            'paths': self.paths,
+            'mtimes': self._mtimes,
+            'fonts': self.fonts,
+            'controls': self.controls,
+        }, 2))
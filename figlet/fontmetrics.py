@@ -0,0 +1,647 @@
+###############################################################################
+#
+# file:     fontmetrics.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Metrics of figlet fonts (sizes, and the profile of the edges of each glyph),
+so the size of a figlet text can be calculated without rendering it, and
+persisted in a cache file, so the metrics of all fonts are available without
+even loading them.
+
+The classes available here are:
+
+    * `FontMetrics`: the metrics of a font, and the size of texts in it
+
+    * `MetricsRenderer`: lays out texts from the metrics of a font (instead
+      of its glyphs), replicating `figfont.FigletRenderer`
+
+    * `MetricsIndex`: the metrics of a list of fonts, persisted in a file,
+      and the tallest of them a text fits in
+"""
+
+#
+# Python built-in modules
+#
+import os
+import zlib
+import bisect
+import array
+import cPickle
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import common, figfont, fontcache
+
+INDEX_VERSION = 2
+"""
+The version of the metrics index file format, to discard files from older
+versions.
+"""
+
+INDEX_CODES = [0] + range(32, 127) + figfont.DEUTSCH_CODES
+"""
+The character codes of the glyphs kept in the metrics of each font (the
+missing character, and the ones every font must define).
+"""
+
+INDEX_POSITIONS = dict([(code, pos) for pos, code in enumerate(INDEX_CODES)])
+"""
+The position of each of the `INDEX_CODES`, in `FontMetrics.advances`.
+"""
+
+
+class FontMetrics(object):
+    """
+    Holds the header values of a font, and the profile of each of its glyphs
+    (see `INDEX_CODES`): the width, and for each row, its length, where its
+    first and last non-blank characters are (and which they are), and where
+    its last visible character (neither blank nor hardblank) is.
+
+    These are all that figlet needs to know to lay out (smush) a text, so
+    the size of the output can be calculated exactly (see `measure`), as
+    long as the font is `regular`.
+
+    When pickled, the profiles are packed into compressed arrays, which are
+    only unpacked when the glyphs are first needed, so loading the metrics
+    of many fonts at once is fast.
+    """
+
+    height = 0
+    """
+    The number of rows of each glyph.
+    """
+
+    baseline = 0
+    """
+    The number of rows from the top of a glyph to its baseline.
+    """
+
+    hardblank = '$'
+    """
+    The sub-character used for blanks that must not be smushed.
+    """
+
+    full_layout = 0
+    """
+    The layout value of the font (see `figfont.FigFont`).
+    """
+
+    print_direction = 0
+    """
+    The print direction of the font: 0 for left-to-right, 1 for
+    right-to-left.
+    """
+
+    regular = True
+    """
+    Defines if the size of texts can be calculated exactly: the font is
+    left-to-right, and all rows of each glyph have the same length.
+    """
+
+    glyphs = None
+    """
+    The profiles of the glyphs, as a dictionary of character codes to tuples
+    (width, rows), where each row is a tuple (length, start, first, bound,
+    last, visible): the position of the first non-blank character (or the
+    length, if none) and the character itself, the position of the last one
+    (or -1) and the character, and the position of the last visible one (or
+    -1).
+    """
+
+    _packed = None
+    """
+    Holds the packed glyph profiles (see `_pack`), until they are unpacked.
+    """
+
+    advances = None
+    """
+    The bounds of the advance of each glyph (see `INDEX_POSITIONS`), as an
+    array of pairs: the glyph width, which is the most it can widen the
+    output line, and the length of its visible part in `ink_row`, which is
+    the least (but for the column smushing can overlap). These are never
+    packed, so texts can be ruled in or out without the glyph profiles
+    (see `fits`).
+    """
+
+    ink_row = 0
+    """
+    The row in which the glyphs have the widest visible parts (see
+    `advances`).
+    """
+
+    def __init__(self, font):
+        """
+        Creates a new instance of this class, with the metrics of `font` (a
+        `figfont.FigFont` or `fontcache.CompiledFont`).
+        """
+        self.height = font.height
+        self.baseline = font.baseline
+        self.hardblank = font.hardblank
+        self.full_layout = font.full_layout
+        self.print_direction = font.print_direction
+        self.regular = font.print_direction == 0
+        self.glyphs = {}
+        inks = {}
+        for code in INDEX_CODES:
+            glyph = font.get_glyph(code)
+            if glyph is not None:
+                self.glyphs[code] = self._profile(glyph)
+                inks[code] = [len(row.replace(self.hardblank, ' ').strip(' '))
+                              for row in glyph]
+        self._set_advances(inks)
+
+    def _profile(self, glyph):
+        """
+        Returns the profile (width, rows) of the `glyph` rows.
+        """
+        rows = []
+        for row in glyph:
+            start = len(row) - len(row.lstrip(' '))
+            bound = len(row.rstrip(' ')) - 1
+            visible = len(row.replace(self.hardblank, ' ').rstrip(' ')) - 1
+            rows.append((len(row), start, row[start:start + 1], bound,
+                         bound >= 0 and row[bound] or '', visible))
+            if len(row) != len(glyph[0]):
+                self.regular = False
+        return len(glyph[0]), tuple(rows)
+
+    def _set_advances(self, inks):
+        """
+        Sets the `advances` of the glyphs, from their `inks` (a dictionary of
+        character codes to the length of the visible part of each row).
+        """
+        totals = [0] * self.height
+        for lengths in inks.values():
+            for row in range(min(self.height, len(lengths))):
+                totals[row] += lengths[row]
+        self.ink_row = totals.index(max(totals))
+        self.advances = array.array('i')
+        for code in INDEX_CODES:
+            if code not in self.glyphs:
+                # rendered as the missing character (see `MetricsRenderer`)
+                code = 0
+            if code in self.glyphs:
+                lengths = inks[code]
+                self.advances.extend((self.glyphs[code][0],
+                                      len(lengths) > self.ink_row
+                                      and lengths[self.ink_row] or 0))
+            else:
+                self.advances.extend((0, 0))
+
+    def get_glyph(self, code):
+        """
+        Returns the profile of the glyph for character `code`, or None if the
+        font does not define it.
+        """
+        if self.glyphs is None:
+            self.glyphs = self._unpack(self._packed)
+            self._packed = None
+        return self.glyphs.get(code)
+
+    def __getstate__(self):
+        """
+        Returns the state of this instance to be pickled, with the glyph
+        profiles packed (see `_pack`).
+        """
+        state = self.__dict__.copy()
+        state['glyphs'] = None
+        state['_packed'] = self._packed or self._pack()
+        return state
+
+    def _pack(self):
+        """
+        Packs the glyph profiles into a tuple of compressed strings: the
+        numbers (code and width of each glyph, and length, start, bound and
+        visible of each row), and the characters (first and last of each
+        row, or NUL if none), encoded as UTF-8.
+        """
+        numbers = array.array('i')
+        chars = []
+        for code in sorted(self.glyphs):
+            width, rows = self.glyphs[code]
+            numbers.extend((code, width))
+            for length, start, first, bound, last, visible in rows:
+                numbers.extend((length, start, bound, visible))
+                chars.append((first or u'\0') + (last or u'\0'))
+        return (zlib.compress(numbers.tostring()),
+                zlib.compress(u"".join(chars).encode('utf-8')))
+
+    def _unpack(self, packed):
+        """
+        Returns the glyph profiles packed by `_pack`.
+        """
+        numbers = array.array('i')
+        numbers.fromstring(zlib.decompress(packed[0]))
+        chars = zlib.decompress(packed[1]).decode('utf-8')
+        glyphs = {}
+        pos = char = 0
+        while pos < len(numbers):
+            code, width = numbers[pos:pos + 2]
+            pos += 2
+            rows = []
+            for __ in range(self.height):
+                length, start, bound, visible = numbers[pos:pos + 4]
+                pos += 4
+                first, last = [c != u'\0' and c or u''
+                               for c in chars[char:char + 2]]
+                rows.append((length, start, first, bound, last, visible))
+                char += 2
+            glyphs[code] = (width, tuple(rows))
+        return glyphs
+
+    def can_measure(self, text):
+        """
+        Returns True if the size of `text` can be calculated exactly.
+        """
+        if not self.regular:
+            return False
+        for c in text:
+            if ord(c) >= 32 and ord(c) not in INDEX_CODES:
+                return False
+        return True
+
+    def fits(self, text, width=80):
+        """
+        Tells if `text` fits in a single line of `width` columns from the
+        `advances` of its glyphs alone: True if even the widest it can get
+        fits, False if even the narrowest it can get does not, or None if
+        it must be measured to tell (see `measure`), or can not be at all.
+        """
+        text = common.decode_output(text)
+        if not self.regular or len(text) >= width * 4 + 100:
+            return None
+        widest = narrowest = inked = 0
+        for c in text:
+            pos = INDEX_POSITIONS.get(ord(c))
+            if pos is None or ord(c) < 32:
+                return None
+            widest += self.advances[2 * pos]
+            ink = self.advances[2 * pos + 1]
+            if ink:
+                # the visible parts of two glyphs overlap one column at most
+                narrowest += ink - 1
+                inked += 1
+        if widest <= width - 1:
+            return True
+        # a single glyph wider than the line is truncated into it instead
+        if inked > 1 and narrowest + 1 > width - 1:
+            return False
+        return None
+
+    def measure(self, text, width=80):
+        """
+        Returns the size (a tuple of columns and rows) of the figlet output
+        of `text` wrapped at `width` columns (with trailing blanks stripped,
+        as `FigletScreenBase.build_figlet_text` does), or None if it can not
+        be calculated exactly (see `can_measure` and
+        `MetricsRenderer.exact`).
+        """
+        if not isinstance(text, unicode):
+            try:
+                text = text.decode('utf-8')
+            except UnicodeDecodeError:
+                text = text.decode('latin-1')
+        if not self.can_measure(text):
+            return None
+        renderer = MetricsRenderer(self, width)
+        rows = renderer.render(text)
+        if not renderer.exact:
+            return None
+
+        # strip trailing blanks (rows, and columns of the last row)
+        while rows and rows[-1][1] == 0:
+            rows.pop()
+        if not rows:
+            return 0, 1
+        rows[-1] = (rows[-1][1], rows[-1][1])
+        return max([r[0] for r in rows]), len(rows)
+
+
+class MetricsRenderer(figfont.FigletRenderer):
+    """
+    Lays out a text the same way `figfont.FigletRenderer` does, but from the
+    profiles of the glyphs (see `FontMetrics`), keeping only the profile of
+    the right edge of each output row, instead of its characters. Rendering
+    results in a list of tuples (length, visible length) for each row.
+
+    Only left-to-right fonts are supported.
+    """
+
+    exact = True
+    """
+    Defines if the visible lengths rendered are exact: not when a glyph
+    wider than the line is truncated through its visible part, as the
+    profile does not tell where the visible characters before the
+    truncation end.
+    """
+
+    def _clear(self):
+        """
+        Clears the output line being built.
+        """
+        self.output_len = 0
+        self.input_line = []
+        # for each row, the position and character of its last non-blank
+        # character (-1 and '' if none), and its visible length
+        self.edges = [(-1, '', 0)] * self.font.height
+
+    def _get_letter(self, c):
+        """
+        Sets the current glyph to be the one of character code `c`, or the
+        missing character (code 0, or an empty glyph) if not available.
+        """
+        glyph = self.font.get_glyph(c)
+        if glyph is None:
+            glyph = self.font.get_glyph(0)
+            if glyph is None:
+                glyph = (0, ((0, 0, '', -1, '', -1),) * self.font.height)
+        self.previous_width = self.current_width
+        self.current_width, self.current = glyph
+
+    def _smush_amount(self):
+        """
+        Calculates how many columns the current glyph can be moved into the
+        output line being built.
+        """
+        if not self.smush_mode & (figfont.SM_SMUSH | figfont.SM_KERN):
+            return 0
+        max_smush = self.current_width
+        for row in range(self.font.height):
+            bound, ch1 = self.edges[row][:2]
+            start, ch2 = self.current[row][1:3]
+            amt = start + self.output_len - 1 - max(bound, 0)
+            if not ch1:
+                amt += 1
+            elif ch2:
+                if self._smushem(ch1, ch2):
+                    amt += 1
+            if amt < max_smush:
+                max_smush = amt
+        return max_smush
+
+    def _add_char(self, c):
+        """
+        Adds the character code `c` to the output line being built, returning
+        False if it does not fit into it.
+        """
+        self._get_letter(c)
+        amount = self._smush_amount()
+        if self.output_len + self.current_width - amount > self.line_limit \
+                or len(self.input_line) + 1 > self.input_limit:
+            return False
+        offset = self.output_len - amount
+        for row in range(self.font.height):
+            bound, ch1, visible = self.edges[row]
+            length, __, __, gbound, gch, gvisible = self.current[row]
+            if gbound >= amount:
+                # the glyph ends after the overlap
+                bound, ch1 = offset + gbound, gch
+            elif gbound >= 0 and self.output_len:
+                # the glyph ends within the overlap (smushed)
+                col = max(0, offset + gbound)
+                if col > bound and col < self.output_len:
+                    bound, ch1 = col, gch
+                elif col == bound:
+                    ch1 = self._smushem(ch1, gch) or ch1
+            if gvisible >= 0 and (gvisible >= amount or self.output_len):
+                visible = max(visible, max(0, offset + gvisible) + 1)
+            self.edges[row] = (bound, ch1, visible)
+        self.output_len += self.current_width - amount
+        self.input_line.append(c)
+        return True
+
+    def _put_string(self, row):
+        """
+        Adds a finished row (the profile of a glyph row) to the rendered
+        lines, applying truncation.
+        """
+        length = row[0]
+        visible = row[5] + 1
+        if self.width > 1 and length > self.width - 1:
+            length = self.width - 1
+            if row[1] >= length:
+                # only blanks are left before the truncation
+                visible = 0
+            elif visible > length:
+                self.exact = False
+        self.lines.append((length, min(length, visible)))
+
+    def _print_line(self):
+        """
+        Flushes the output line being built into the rendered lines.
+        """
+        length = self.output_len
+        if self.width > 1:
+            length = min(length, self.width - 1)
+        for bound, ch1, visible in self.edges:
+            self.lines.append((length, min(length, visible)))
+        self._clear()
+
+
+class MetricsIndex(object):
+    """
+    Holds the `FontMetrics` of a list of fonts, persisted in a cache file,
+    and validated against the modification time (and size) of each font
+    file.
+
+    Fonts that are new (or changed) are not loaded until their metrics are
+    needed (see `get_metrics`): only their height is read from their
+    header, so the fonts can still be sorted by size (see `fit`).
+
+    Fonts that can not be loaded are not in the index.
+    """
+
+    cache_file = None
+    """
+    The file where the metrics are persisted (optional).
+    """
+
+    changed = False
+    """
+    Defines if the index changed since it was last persisted (see `save`).
+    """
+
+    def __init__(self, fonts, cache_file=None):
+        """
+        Creates a new index of `fonts` (a list of tuples (name, path)),
+        persisted in `cache_file` (if informed).
+        """
+        self.cache_file = cache_file
+        self.fonts = {}
+        self.heights = {}
+        self._pending = {}
+        self._stamps = {}
+        previous = self._load()
+        paths = {}
+        for name, path in fonts:
+            paths[path] = name
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamp = (st.st_mtime, st.st_size)
+            entry = previous.get(path)
+            if entry is not None and entry[0] == stamp:
+                self._stamps[path] = entry
+                if entry[1] is not None:
+                    self.fonts[name] = entry[1]
+                    self.heights[name] = entry[1].height
+                continue
+            self._pending[name] = (path, stamp)
+            height = _read_height(path)
+            if height is None:
+                self._add(name)
+            else:
+                self.heights[name] = height
+        self._sizes = [(-height, name)
+                       for name, height in self.heights.items()]
+        self._sizes.sort()
+        for path in previous:
+            if path not in paths:
+                # forget the fonts that were removed
+                self.changed = True
+        self.save()
+
+    def _add(self, name):
+        """
+        Loads the font `name` (one of the pending ones), adding its metrics
+        to the index.
+        """
+        path, stamp = self._pending.pop(name)
+        try:
+            metrics = FontMetrics(fontcache.load_font(path))
+        except Exception:
+            metrics = None
+        self._stamps[path] = (stamp, metrics)
+        self.changed = True
+        if metrics is not None:
+            self.fonts[name] = metrics
+            self.heights[name] = metrics.height
+        else:
+            self.heights.pop(name, None)
+
+    def get_metrics(self, name):
+        """
+        Returns the `FontMetrics` of font `name` (loading the font, if it is
+        new), or None if not available.
+        """
+        if name in self._pending:
+            self._add(name)
+        return self.fonts.get(name)
+
+    def by_size(self):
+        """
+        Returns the names of the fonts in the index, from the tallest to the
+        shortest (and by name, for the same height).
+        """
+        return [name for __, name in self._sizes]
+
+    def fit(self, text, columns, rows):
+        """
+        Returns the name of the tallest font (see `by_size`) in which `text`
+        fits in a single line, in a screen of `columns` x `rows`, or None
+        if it fits in none.
+
+        Fonts taller than the screen are skipped altogether, and the others
+        are ruled in or out from the advances of their glyphs (see
+        `FontMetrics.fits`): only the ones these can not tell about are
+        measured.
+        """
+        pos = bisect.bisect_left(self._sizes, (-rows, ''))
+        for __, name in self._sizes[pos:]:
+            metrics = self.get_metrics(name)
+            if metrics is None or metrics.height > rows:
+                continue
+            fits = metrics.fits(text, columns)
+            if fits is None:
+                size = metrics.measure(text, columns)
+                fits = size is not None and size[1] <= metrics.height
+            if fits:
+                return name
+        return None
+
+    def save(self):
+        """
+        Persists the index in the cache file, if it changed since last time
+        (see `changed`).
+        """
+        if self.changed:
+            self._save()
+            self.changed = False
+
+    def _load(self):
+        """
+        Returns the metrics persisted in the cache file, indexed by font
+        file path, or an empty dictionary if there are none.
+        """
+        if not self.cache_file:
+            return {}
+        try:
+            f = open(self.cache_file, 'rb')
+            try:
+                data = cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            return {}
+        if not isinstance(data, dict) \
+                or data.get('version') != INDEX_VERSION:
+            return {}
+        return data['fonts']
+
+    def _save(self):
+        """
+        Persists the index in the cache file, if applicable.
+        """
+        if not self.cache_file:
+            return
+        common.write_file(self.cache_file, cPickle.dumps({
+            'version': INDEX_VERSION,
+            'fonts': self._stamps,
+        }, 2))
+
+
+def _read_height(path):
+    """
+    Returns the height of the glyphs of the font file in `path`, read from
+    its header alone, or None if it can not be (the file is zipped, or its
+    header is invalid).
+    """
+    try:
+        f = open(path, 'rb')
+        try:
+            header = f.readline(256)
+        finally:
+            f.close()
+    except EnvironmentError:
+        return None
+    if header[:4] not in ('flf2', 'tlf2'):
+        return None
+    try:
+        height = int(header[6:].split()[0])
+    except (ValueError, IndexError):
+        return None
+    return height > 0 and height or None
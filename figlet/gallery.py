@@ -0,0 +1,245 @@
+###############################################################################
+#
+# file:     gallery.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A gallery of figlet fonts, with a sample text rendered in each of them, used
+by `--help-fonts --preview`. Fonts are rendered in parallel (by a pool of
+processes, one per core), and the samples are kept in a cache file, so they
+are only rendered again when the font file changes.
+
+The classes available here are:
+
+    * `PreviewCache`: the samples already rendered, persisted in a file
+
+And the functions:
+
+    * `render_preview`: renders a sample in a font (in a worker process)
+
+    * `iter_previews`: renders a sample in every font, yielding them as soon
+      as they are ready
+"""
+
+#
+# Python built-in modules
+#
+import os
+import signal
+import cPickle
+import itertools
+
+try:
+    import multiprocessing
+except ImportError:
+    multiprocessing = None
+
+#
+# Termsaver modules
+#
+from termsaverlib import common as termsaver_common
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import common, figfont, fontcache
+
+CACHE_VERSION = 1
+"""
+The version of the preview cache file format, to discard files from older
+versions.
+"""
+
+WAIT_TIMEOUT = 600
+"""
+The maximum time (in seconds) to wait for the next sample from the worker
+processes (waiting without a timeout would hold interruptions until the
+end).
+"""
+
+
+class PreviewCache(object):
+    """
+    Holds the samples rendered in each font file, indexed by font file,
+    sample text and width, and validated against the modification time (and
+    size) of the font file, so a font changed (or reinstalled) is rendered
+    again.
+    """
+
+    cache_file = None
+    """
+    The file where the samples are persisted (optional).
+    """
+
+    changed = False
+    """
+    Defines if samples were added since the cache was loaded.
+    """
+
+    def __init__(self, cache_file=None):
+        """
+        Creates a new cache persisted in `cache_file` (if informed), loading
+        the samples already there.
+        """
+        self.cache_file = cache_file
+        self._previews = {}
+        self._load()
+
+    def get(self, path, text, width):
+        """
+        Returns the sample `text` rendered in the font `path` with `width`
+        columns, or None if it is not in the cache (or the font changed).
+        """
+        entry = self._previews.get((path, text, width))
+        if entry is None:
+            return None
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if entry[0] != (st.st_mtime, st.st_size):
+            return None
+        return entry[1]
+
+    def put(self, path, text, width, stamp, output):
+        """
+        Adds the sample `text` rendered in the font `path` with `width`
+        columns, when the font file had the `stamp` (modification time and
+        size).
+        """
+        self._previews[(path, text, width)] = (stamp, output)
+        self.changed = True
+
+    def save(self):
+        """
+        Persists the samples in the cache file (if applicable and changed).
+        """
+        if not self.cache_file or not self.changed:
+            return
+        common.write_file(self.cache_file, cPickle.dumps({
+            'version': CACHE_VERSION,
+            'previews': self._previews,
+        }, 2))
+        self.changed = False
+
+    def _load(self):
+        """
+        Loads the samples from the cache file, if there is a valid one.
+        """
+        if not self.cache_file:
+            return
+        try:
+            f = open(self.cache_file, 'rb')
+            try:
+                data = cPickle.load(f)
+            finally:
+                f.close()
+        except Exception:
+            return
+        if isinstance(data, dict) and data.get('version') == CACHE_VERSION:
+            self._previews = data['previews']
+
+
+def render_preview(item):
+    """
+    Renders a sample in a font, where `item` is a tuple (name, path, text,
+    width), returning a tuple (name, path, text, width, stamp, output). The
+    output is None if the font could not be rendered at all.
+
+    Fonts that can not be parsed are rendered by the figlet binary. This is
+    meant to run in worker processes, so no errors are raised.
+    """
+    name, path, text, width = item
+    stamp = output = None
+    try:
+        st = os.stat(path)
+        stamp = (st.st_mtime, st.st_size)
+        try:
+            output = figfont.render(fontcache.load_font(path), text,
+                                    width).rstrip()
+        except Exception:
+            output = termsaver_common.execute_shell(["figlet", "-f", path,
+                "-w", str(width), text])
+    except Exception:
+        pass
+    return name, path, text, width, stamp, output
+
+
+def _init_worker():
+    """
+    Prepares a worker process, leaving interruptions (Ctrl+C) to the main
+    process, which terminates the pool.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def iter_previews(fonts, text, width, cache_file=None, processes=None):
+    """
+    Renders the sample `text` (or the font name itself, if None) in every
+    font of `fonts` (a list of tuples (name, path)), with `width` columns,
+    yielding tuples (name, output) as soon as each is ready (so not in the
+    same order), starting with the ones already in the cache.
+
+    Fonts are rendered by a pool of `processes` (defaults to the number of
+    cores), or in this process, if multiprocessing is not available.
+    """
+    cache = PreviewCache(cache_file)
+    items = []
+    try:
+        for name, path in fonts:
+            output = cache.get(path, text or name, width)
+            if output is None:
+                items.append((name, path, text or name, width))
+            else:
+                yield name, output
+
+        if not items:
+            return
+        if multiprocessing is None or len(items) == 1:
+            results = itertools.imap(render_preview, items)
+            pool = None
+        else:
+            pool = multiprocessing.Pool(processes, _init_worker)
+            results = pool.imap_unordered(render_preview, items)
+        try:
+            while True:
+                try:
+                    if pool is None:
+                        result = results.next()
+                    else:
+                        result = results.next(WAIT_TIMEOUT)
+                except StopIteration:
+                    break
+                name, path, sample, size, stamp, output = result
+                if stamp is not None and output is not None:
+                    cache.put(path, sample, size, stamp, output)
+                yield name, output
+            if pool is not None:
+                pool.close()
+                pool.join()
+        finally:
+            if pool is not None:
+                pool.terminate()
+    finally:
+        cache.save()
@@ -0,0 +1,138 @@
+###############################################################################
+#
+# file:     prerender.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Background rendering used by termsaver-figlet screens, so texts that will be
+displayed next are ready (in the render cache) before they are needed, and
+the animation never stops to wait for them.
+
+The classes available here are:
+
+    * `Prerenderer`: calls a function for each item scheduled, in order, in
+      a background thread
+"""
+
+#
+# Python built-in modules
+#
+import Queue
+import threading
+from collections import deque
+
+
+class Prerenderer(object):
+    """
+    Calls `function` for each item scheduled (a tuple of arguments), in
+    order, in a background (daemon) thread, so the caller never waits for
+    it. The function is expected to keep its results somewhere the caller
+    can find them (such as a `cache.RenderCache`), and any errors are
+    ignored (the caller will find them when doing the same work itself).
+    What the function returns is kept until taken by the caller (see
+    `results`), so it can account it in its own thread.
+
+    The usage is accounted in the following properties:
+
+        * `scheduled`: the number of items scheduled
+
+        * `rendered`: the number of items processed
+
+    Each of them is only changed by a single thread (the caller, and the
+    background one, respectively), so no locks are needed to read them.
+    """
+
+    scheduled = 0
+    """
+    The number of items scheduled.
+    """
+
+    rendered = 0
+    """
+    The number of items processed.
+    """
+
+    def __init__(self, function):
+        """
+        Creates a new instance of this class, starting its thread.
+        """
+        self.function = function
+        self._queue = Queue.Queue()
+        self._results = deque()
+        self._thread = threading.Thread(target=self._run,
+                                        name="figlet-prerender")
+        self._thread.setDaemon(True)
+        self._thread.start()
+
+    def schedule(self, *args):
+        """
+        Schedules a call to `function` with `args`.
+        """
+        self.scheduled += 1
+        self._queue.put(args)
+
+    def busy(self):
+        """
+        Returns True if there are items scheduled not yet processed.
+        """
+        return self.rendered < self.scheduled
+
+    def results(self):
+        """
+        Returns (and forgets) the values returned by `function` since the
+        last call, oldest first.
+        """
+        results = []
+        while self._results:
+            results.append(self._results.popleft())
+        return results
+
+    def stop(self, timeout=1.0):
+        """
+        Stops the thread, after the items already scheduled, waiting at most
+        `timeout` seconds for it.
+        """
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def stats(self):
+        """
+        Returns a dictionary with the usage counters of this instance.
+        """
+        return {
+            'rendered': self.rendered,
+            'pending': self._queue.qsize(),
+        }
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            if args is None:
+                return
+            try:
+                self._results.append(self.function(*args))
+            except Exception:
+                # left to be found (and reported) by the caller
+                pass
+            self.rendered += 1
@@ -0,0 +1,208 @@
+###############################################################################
+#
+# file:     recording.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Compact recordings of screen animations, holding only what changes from one
+frame to the next (the runs of changed characters found by the display), so
+an animation computed once can be replayed at almost no cost.
+
+The file format (all values little-endian) is:
+
+    * header (see `HEADER_FORMAT`)
+    * events, each one with a header (see `EVENT_FORMAT`), followed by its
+      runs of changed characters: a run header (see `RUN_FORMAT`) and the
+      text (UTF-8)
+
+The classes available here are:
+
+    * `FrameRecorder`: writes a recording, as the frames are displayed
+
+And the functions:
+
+    * `load_recording`: reads a recording
+"""
+
+#
+# Python built-in modules
+#
+import os
+import time
+import struct
+
+#
+# Termsaver modules
+#
+from termsaverlib import exception
+
+MAGIC = 'TSFD'
+"""
+The signature of recording files.
+"""
+
+VERSION = 1
+"""
+The version of the recording format.
+"""
+
+HEADER_FORMAT = '<4sHHHd'
+"""
+The struct format of the recording header: magic, version, width, height
+and duration (seconds).
+"""
+
+EVENT_FORMAT = '<dBH'
+"""
+The struct format of an event header: time (seconds, since the beginning),
+flags (see `FLAG_CLEAR`) and number of runs.
+"""
+
+RUN_FORMAT = '<HHH'
+"""
+The struct format of a run header: row, column (0-based) and length of the
+text (in bytes).
+"""
+
+FLAG_CLEAR = 1
+"""
+Event flag: the screen is cleared before the runs are drawn.
+"""
+
+
+class FrameRecorder(object):
+    """
+    Writes a recording into a file descriptor: every time the display is
+    flushed, the runs added since the previous flush (see `add`) are written
+    as an event, with the time taken from the `clock` function. Flushes
+    without changes are not recorded.
+
+    The recording must be finished with `close`.
+    """
+
+    def __init__(self, fd, width, height, clock=time.time):
+        """
+        Creates a new recorder writing into file descriptor `fd` (which must
+        be seekable), for a screen of `width` columns and `height` rows.
+        """
+        self.fd = fd
+        self.width = width
+        self.height = height
+        self.clock = clock
+        self.started = clock()
+        self.events = 0
+        self._clear = False
+        self._runs = []
+        self._write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, width,
+                                height, 0))
+
+    def _write(self, data):
+        """
+        Writes all `data` into the file descriptor.
+        """
+        while data:
+            data = data[os.write(self.fd, data):]
+
+    def clear(self):
+        """
+        Records that the screen was cleared (discarding the runs added
+        before it, in the same event).
+        """
+        self._clear = True
+        self._runs = []
+
+    def add(self, row, col, text):
+        """
+        Records the `text` written at `row` and `col` (0-based).
+        """
+        if isinstance(text, unicode):
+            text = text.encode('utf-8')
+        self._runs.append(struct.pack(RUN_FORMAT, row, col, len(text)) + text)
+
+    def flush(self):
+        """
+        Writes the runs added since the last flush, as an event.
+        """
+        if not self._runs and not self._clear:
+            return
+        self._write(struct.pack(EVENT_FORMAT, self.clock() - self.started,
+            self._clear and FLAG_CLEAR or 0, len(self._runs))
+            + "".join(self._runs))
+        self.events += 1
+        self._clear = False
+        self._runs = []
+
+    def close(self):
+        """
+        Finishes the recording, writing its duration (until now) into the
+        header.
+        """
+        self.flush()
+        # back to the start (os.SEEK_SET is not available on Python 2.4)
+        os.lseek(self.fd, 0, 0)
+        self._write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.width,
+                                self.height, self.clock() - self.started))
+
+
+def load_recording(path):
+    """
+    Reads the recording in `path`, returning a tuple (width, height,
+    duration, events), where each event is a tuple (time, clear, runs), and
+    the runs are tuples (row, column, text).
+    """
+    f = open(path, 'rb')
+    try:
+        data = f.read()
+    finally:
+        f.close()
+
+    header_size = struct.calcsize(HEADER_FORMAT)
+    event_size = struct.calcsize(EVENT_FORMAT)
+    run_size = struct.calcsize(RUN_FORMAT)
+    try:
+        magic, version, width, height, duration = \
+            struct.unpack(HEADER_FORMAT, data[:header_size])
+        if magic != MAGIC or version != VERSION:
+            raise ValueError
+        events = []
+        offset = header_size
+        while offset < len(data):
+            when, flags, count = struct.unpack(EVENT_FORMAT,
+                data[offset:offset + event_size])
+            offset += event_size
+            runs = []
+            for __ in xrange(count):
+                row, col, length = struct.unpack(RUN_FORMAT,
+                    data[offset:offset + run_size])
+                offset += run_size
+                text = data[offset:offset + length]
+                if len(text) != length:
+                    raise ValueError
+                runs.append((row, col, text.decode('utf-8')))
+                offset += length
+            events.append((when, bool(flags & FLAG_CLEAR), runs))
+    except (struct.error, ValueError, UnicodeError):
+        raise exception.TermSaverException(
+            help="Invalid recording %s" % path)
+    return width, height, duration, events
@@ -41,23 +41,43 @@ The base classes available in this package are:
 # Python built-in modules
 #
 import os
+import sys
+import time
+import random
+import signal
 import textwrap
 
+try:
+    import json
+except ImportError:
+    json = None
+
 #
-# Internal modules
+# Internal modules (the fonts, and the helpers of specific options, are only
+# imported when first used, as termsaver imports all screens at startup,
+# whichever one is run)
 #
 from termsaverlib.screen.base import ScreenBase
 from termsaverlib import common, exception
 from termsaverlib.screen.helper.position import PositionHelperBase
 from termsaverlib.i18n import _, set_app
+from termsaverlib.plugins.figlet import cache, constants, events, timing
+from termsaverlib.plugins.figlet import common as figlet_common
+from termsaverlib.plugins.figlet.sink import FrameSink
+from termsaverlib.plugins.figlet.screen.helper.display import DisplayHelperBase
 
 #
 # Override termsavr default i18n (reuired for plugins with own i18n files)
 #
 set_app("termsaver-figlet")
 
+EXPORT_FORMATS = ['asciicast', 'delta']
+"""
+The formats available to export frames (see `FigletScreenBase.export`).
+"""
 
-class FigletScreenBase(ScreenBase, PositionHelperBase):
+
+class FigletScreenBase(ScreenBase, PositionHelperBase, DisplayHelperBase):
     """
     """
 
@@ -74,12 +94,935 @@ class FigletScreenBase(ScreenBase, PositionHelperBase):
 
     figlet_text = ""
     """
+    Holds the figlet output last built (utf-8 encoded).
+    """
+
+    figlet_lines = ()
+    """
+    Holds the lines of `figlet_text` (decoded into unicode), all padded to
+    the same length.
+    """
+
+    render_cache = cache.RenderCache(constants.Settings.RENDER_CACHE_SIZE)
+    """
+    Holds the figlet outputs already built by `build_figlet_text` (shared by
+    all screens), indexed by font, width and text. Refer to its `stats`
+    method for hit/miss counters.
+    """
+
+    font_files = {}
+    """
+    Holds the font files already located for each font name (shared by all
+    screens), or False for fonts that must be handled by the figlet binary.
+    """
+
+    font_index = None
+    """
+    Holds the `fontindex.FontIndex` of all available fonts (shared by all
+    screens). Refer to `get_font_index` method.
+    """
+
+    font_metrics = {}
+    """
+    Holds the `fontmetrics.FontMetrics` already calculated for each font
+    name (shared by all screens), or None for fonts without metrics.
+    """
+
+    metrics_index = None
+    """
+    Holds the `fontmetrics.MetricsIndex` of all available fonts (shared by
+    all screens). Refer to `get_metrics_index` method.
+    """
+
+    auto_font = False
+    """
+    Defines if the font is picked automatically (see `fit_font`), as the
+    largest one in which the text fits the screen.
+    """
+
+    auto_font_key = None
+    """
+    Holds the text and `geometry_generation` the font was last picked for.
+    """
+
+    last_measure = None
+    """
+    Holds the key (font, text and `geometry_generation`) and the result of
+    the last `measure_figlet_text`.
+    """
+
+    show_fonts = False
+    """
+    Defines if the available fonts are displayed (see `help_fonts`), instead
+    of running the screen.
+    """
+
+    preview = False
+    """
+    Defines if `help_fonts` displays a sample rendered in every font,
+    instead of just their names.
+    """
+
+    preview_text = None
+    """
+    Holds the sample text displayed by `help_fonts` in every font (if
+    `preview` is set), or None for the name of each font.
+    """
+
+    frame_clock = None
+    """
+    Holds the `timing.FrameClock` scheduling the frames of this screen
+    (refer to `wait_frame` method).
+    """
+
+    event_waiter = None
+    """
+    Holds the `events.EventWaiter` all waiting is done with, while the
+    screen runs (see `autorun`), so key presses and terminal resizes are
+    handled right away, or None (plain `time.sleep`).
+    """
+
+    geometry_generation = 0
+    """
+    Holds a counter of terminal size changes, so anything built for a given
+    terminal size can be kept until this changes (refer to `update_geometry`
+    method).
+    """
+
+    geometry_pending = True
+    """
+    Defines if the terminal size must be read again, which is only the case
+    when the terminal was resized (SIGWINCH received), or the size can not be
+    watched with signals.
+    """
+
+    geometry_watched = False
+    """
+    Defines if the terminal size is being watched with SIGWINCH, while the
+    screen runs (see `autorun`).
+    """
+
+    geometry_fixed = False
+    """
+    Defines if the terminal size is fixed (virtual, see `export`), and should
+    never be read.
+    """
+
+    last_build = None
+    """
+    Holds the key (font, text and `geometry_generation`) of the figlet text
+    last built by `build_figlet_text`.
+    """
+
+    composer = None
+    """
+    Holds the `figfont.LineComposer` used by `compose_figlet_text`, or None
+    if the font is handled by the figlet binary.
+    """
+
+    composer_key = None
+    """
+    Holds the font and terminal width `composer` was created for.
+    """
+
+    stats = None
+    """
+    Holds the `stats.RuntimeStats` of this screen, only when enabled (refer
+    to `enable_stats` method). Nothing is accounted otherwise.
+    """
+
+    stats_overlay = False
+    """
+    Defines if the runtime statistics are displayed on screen.
+    """
+
+    stats_file = None
+    """
+    Holds the path of the file where runtime statistics are saved when the
+    screen exits, if any.
     """
 
+    stats_hook = None
+    """
+    Holds a function called with the screen and the dictionary of runtime
+    statistics (see `get_stats`), every time they are recalculated.
+    """
+
+    export_file = None
+    """
+    Holds the path of the file where frames are exported, instead of being
+    displayed (refer to `export` method).
+    """
+
+    export_count = 0
+    """
+    Holds the number of frames to be exported, or zero for a full pass of
+    the animation (see `get_pass_frames`).
+    """
+
+    export_geometry = (80, 24)
+    """
+    Holds the terminal size (columns, rows) used to export frames.
+    """
+
+    export_format = 'asciicast'
+    """
+    Holds the format of exported frames (see `EXPORT_FORMATS`).
+    """
+
+    replay_file = None
+    """
+    Holds the path of a recording (see `recording` module) to be displayed
+    instead of the screen (refer to `replay` method).
+    """
+
+    virtual_clock = None
+    """
+    Holds the `timing.VirtualClock` used instead of real time, while frames
+    are exported.
+    """
+
+    playlist = None
+    """
+    Holds the list of words displayed in turns (refer to `next_word`
+    method), if more than the default word was informed.
+    """
+
+    playlist_index = 0
+    """
+    Holds the position of the current `word` in `playlist`.
+    """
+
+    queue_depth = constants.Settings.PLAYLIST_QUEUE_DEPTH
+    """
+    Holds how many of the next words of `playlist` are rendered ahead of
+    time (refer to `prerender_words` method), or zero for none.
+    """
+
+    prerenderer = None
+    """
+    Holds the `prerender.Prerenderer` rendering the next words of
+    `playlist` in background, once started.
+    """
+
+    prerender_key = None
+    """
+    Holds the `playlist_index` and `geometry_generation` the next words
+    were last scheduled to be rendered for.
+    """
+
+    shared_cache = None
+    """
+    Holds the `sharedcache.SharedRenderCache` shared with other screens
+    running at once (refer to `enable_shared_cache` method), or None.
+    """
+
+    render_daemon = None
+    """
+    Holds the `daemon.RenderClient` connected to the renderer daemon, if it
+    is running (refer to `get_render_daemon` method), or None.
+    """
+
+    render_daemon_checked = False
+    """
+    Defines if the renderer daemon was already looked for (it is only looked
+    for once, and given up when it stops responding).
+    """
+
+    def enable_stats(self, overlay=False, path=None, hook=None):
+        """
+        Enables the collection of runtime statistics: per-phase timings (see
+        `stats.PHASES`), render cache usage and process spawns. These can be
+        displayed on screen (`overlay`), saved into a file at exit (`path`),
+        and passed to a function (`hook`), periodically.
+        """
+        if self.stats is None:
+            from termsaverlib.plugins.figlet import stats
+            self.stats = stats.RuntimeStats()
+        self.stats_overlay = self.stats_overlay or overlay
+        if path is not None:
+            # make sure it can be written, before anything is displayed
+            try:
+                open(path, 'a').close()
+            except IOError, e:
+                raise exception.PathNotFoundException(path,
+                    _("Could not write the runtime statistics: %s") % e)
+            self.stats_file = path
+        if hook is not None:
+            self.stats_hook = hook
+
+    def set_color(self, option, value=None):
+        """
+        Sets the colors of the text (see `color.Colorizer`), from the
+        `option` informed: "color" (a single color), "gradient" (a comma
+        separated list of colors) or "rainbow" (no `value`).
+        """
+        from termsaverlib.plugins.figlet import color
+        if option == 'rainbow':
+            self.colorizer = color.Colorizer(rainbow=True)
+            return
+        try:
+            colors = [color.parse_color(c) for c in value.split(',')]
+        except (ValueError, AttributeError):
+            raise exception.InvalidOptionException(option,
+                _("Colors are names (such as red or bright-blue), numbers "
+                  "(0 to 255) or #RRGGBB"))
+        if option == 'gradient' and len(colors) < 2:
+            raise exception.InvalidOptionException(option,
+                _("A gradient requires at least two colors"))
+        if option == 'color' and len(colors) > 1:
+            raise exception.InvalidOptionException(option,
+                _("Only one color is allowed (see --gradient)"))
+        self.colorizer = color.Colorizer(colors)
+
+    def enable_shared_cache(self):
+        """
+        Enables the render cache shared with the other screens running at
+        once (see `sharedcache.SharedRenderCache`), so the texts rendered by
+        any of them are not rendered again by the others. As this is only an
+        optimization, nothing is done if the cache file can not be used.
+        """
+        if self.shared_cache is not None:
+            return
+        path = figlet_common.get_runtime_dir()
+        if path is None:
+            return
+        from termsaverlib.plugins.figlet import sharedcache
+        size = constants.Settings.SHARED_CACHE_SIZE
+        try:
+            self.shared_cache = sharedcache.SharedRenderCache(
+                os.path.join(path, sharedcache.get_filename(size)), size)
+        except EnvironmentError:
+            pass
+
+    def get_render_daemon(self):
+        """
+        Returns the `render_daemon`, connecting to it on first use, or None
+        if it is not running (or `Settings.USE_RENDER_DAEMON` is not set), or
+        can not be used at all.
+        """
+        if not self.render_daemon_checked:
+            self.render_daemon_checked = True
+            if not constants.Settings.USE_RENDER_DAEMON:
+                return None
+            try:
+                from termsaverlib.plugins.figlet import daemon
+                path = daemon.get_socket_path()
+                if path is not None and os.path.exists(path):
+                    self.render_daemon = daemon.RenderClient(path)
+            except Exception:
+                # whatever the reason, the screen renders on its own
+                self.render_daemon = None
+        return self.render_daemon
+
+    def render_remote(self, font, width, text):
+        """
+        Asks the renderer daemon (see `get_render_daemon`) for the figlet
+        output of `text`, returning None if it is not running, or could not
+        render it (the screen renders it on its own, then). The daemon is
+        given up, for good, if it stops responding.
+        """
+        client = self.get_render_daemon()
+        if client is None or not isinstance(text, str):
+            return None
+        if os.path.dirname(font):
+            # font files are informed relative to this process
+            font = os.path.abspath(font)
+        try:
+            output = client.render(font, width, text)
+        except EnvironmentError:
+            client.close()
+            self.render_daemon = None
+            return None
+        if output is not None and self.stats is not None:
+            self.stats.count('remote')
+        return output
+
+    def get_stats(self):
+        """
+        Returns a dictionary with all runtime statistics of the screen (see
+        `enable_stats`), including the render cache, the frame clock and the
+        output usage.
+        """
+        result = {}
+        if self.stats is not None:
+            result.update(self.stats.as_dict())
+        result['cache'] = self.render_cache.stats()
+        if self.shared_cache is not None:
+            result['shared_cache'] = self.shared_cache.stats()
+        if self.frame_clock is not None:
+            result['clock'] = self.frame_clock.stats()
+        if self.output is not None:
+            result['output'] = self.output.stats()
+        if self.prerenderer is not None:
+            result['prerender'] = self.prerenderer.stats()
+        return result
+
+    def save_stats(self):
+        """
+        Writes the runtime statistics into `stats_file` (JSON, if available).
+        """
+        data = self.get_stats()
+        if json is not None:
+            data = json.dumps(data, indent=1, sort_keys=True)
+        else:
+            data = repr(data)
+        try:
+            f = open(self.stats_file, 'w')
+            try:
+                f.write(data + "\n")
+            finally:
+                f.close()
+        except IOError, e:
+            raise exception.PathNotFoundException(self.stats_file,
+                _("Could not write the runtime statistics: %s") % e)
+
+    def _parse_common_option(self, option, value, args):
+        """
+        Handles the command-line `option` (with its `value`), if it is one
+        of the options shared by the figlet screens (see
+        `_usage_common_options`), returning True, or False if it must be
+        handled by the screen itself. The remaining arguments (`args`) are
+        the text of --preview.
+
+        Actions that replace running the screen (such as --help-fonts or
+        --export) are only taken once all options are parsed, by
+        `_apply_common_options`.
+        """
+        if option in ("-h", "--help"):
+            self.usage()
+            self.screen_exit()
+        elif option == "--help-fonts":
+            self.show_fonts = True
+        elif option == "--preview":
+            self.preview = True
+            self.preview_text = " ".join(args) or None
+        elif option in ("-f", "--font"):
+            # make sure argument is a valid value (exists)
+            self.font = str(value)
+            if not self.has_font(self.font):
+                raise exception.InvalidOptionException("font",
+                    _("Font does not exist"))
+        elif option == "--auto-font":
+            self.auto_font = True
+        elif option == "--word-file":
+            self.load_words(value)
+        elif option == "--queue-depth":
+            try:
+                # make sure argument is a valid value (int)
+                self.queue_depth = int(value)
+                if self.queue_depth < 0:
+                    raise ValueError
+            except:
+                raise exception.InvalidOptionException("queue-depth",
+                    _("Use a number of words (0 or more)"))
+        elif option == "--stats":
+            self.enable_stats(overlay=True)
+        elif option == "--stats-file":
+            self.enable_stats(path=value)
+        elif option in ("--color", "--gradient", "--rainbow"):
+            self.set_color(option[2:], value)
+        elif option == "--shared-cache":
+            self.enable_shared_cache()
+        elif option == "--export":
+            self.export_file = value
+        elif option == "--frames":
+            try:
+                # make sure argument is a valid value (int)
+                self.export_count = int(value)
+                if self.export_count <= 0:
+                    raise ValueError
+            except:
+                raise exception.InvalidOptionException("frames",
+                    _("Use a number of frames (1 or more)"))
+        elif option == "--geometry":
+            self.export_geometry = self.parse_geometry(value)
+        elif option == "--format":
+            if value not in EXPORT_FORMATS:
+                raise exception.InvalidOptionException("format",
+                    _("Use one of: %s") % ", ".join(EXPORT_FORMATS))
+            self.export_format = value
+        elif option == "--replay":
+            self.replay_file = value
+        else:
+            return False
+        return True
+
+    def _apply_common_options(self):
+        """
+        Takes the actions of the options parsed by `_parse_common_option`
+        that replace running the screen: displaying the fonts, exporting
+        frames or replaying them, exiting afterwards.
+        """
+        if self.show_fonts:
+            self.help_fonts()
+            self.screen_exit()
+
+        if self.export_file is not None:
+            self.export()
+            self.screen_exit()
+        elif self.replay_file is not None:
+            self.replay()
+            self.screen_exit()
+
+    def _usage_common_options(self, pass_frames=None):
+        """
+        Returns the help text of the options handled by
+        `_parse_common_option`, only for the ones this screen accepts (see
+        `cli_opts`), to be placed in its `_usage_options_example`. The
+        default number of frames exported is described by `pass_frames`.
+        """
+        options = [
+            ('font=', _("""\
+ -f, --font   the figlet font to be used, default is the figlet default
+              (see `figlet -I3` command for details or figler man pages)""")),
+            ('help', _("""\
+ -h, --help   Displays this help message""")),
+            ('auto-font', _("""\
+     --auto-font
+              Uses the tallest font in which the word fits the screen
+              (in a single line), instead of -f/--font, picked again
+              when the screen is resized""")),
+            ('word-file=', _("""\
+     --word-file=FILE
+              Displays the words in FILE (one per line) in turns""")),
+            ('queue-depth=', _("""\
+     --queue-depth=N
+              The number of next words rendered ahead of time (in the
+              background), default is %(queue_depth)s, 0 disables it""")
+                % {'queue_depth': self.queue_depth}),
+            ('help-fonts', _("""\
+     --help-fonts
+              Displays the available fonts that can be used with
+              the -f/--font option.""")),
+            ('preview', _("""\
+     --help-fonts --preview [TEXT]
+              Displays TEXT (default is the name of each font) rendered
+              in every available font""")),
+            ('stats', _("""\
+     --stats  Displays runtime statistics (frame rate, time spent in
+              each phase of the frames, cache usage and processes
+              spawned) on the top right corner of the screen""")),
+            ('stats-file=', _("""\
+     --stats-file=FILE
+              Saves the runtime statistics into FILE (JSON) on exit""")),
+            ('color=', _("""\
+     --color=COLOR
+              Displays the text in COLOR: a name (black, red, green,
+              yellow, blue, magenta, cyan or white, optionally prefixed
+              by bright-), a number (0 to 255) or #RRGGBB""")),
+            ('gradient=', _("""\
+     --gradient=COLOR,COLOR[,...]
+              Displays the text in a gradient of colors, from the left
+              to the right of the screen""")),
+            ('rainbow', _("""\
+     --rainbow
+              Displays the text in the colors of the rainbow, moving
+              on every frame""")),
+            ('shared-cache', _("""\
+     --shared-cache
+              Shares the rendered text with the other screens running
+              at once (such as in other terminal panes), so the same
+              text is rendered only once""")),
+            ('export=', _("""\
+     --export=FILE
+              Renders the frames into FILE, as fast as possible, instead
+              of displaying them (see options below)""")),
+            ('frames=', _("""\
+     --frames=N
+              The number of frames to export, default is
+              %(pass_frames)s""")
+                % {'pass_frames': pass_frames
+                   or _("a full pass of the animation")}),
+            ('geometry=', _("""\
+     --geometry=WIDTHxHEIGHT
+              The terminal size used to export frames, default is 80x24""")),
+            ('format=', _("""\
+     --format=FORMAT
+              The format of exported frames: asciicast (default), which
+              can be played with asciinema, or delta (compact, only the
+              changes of each frame), which can be played with --replay""")),
+            ('replay=', _("""\
+     --replay=FILE
+              Displays the frames exported into FILE (delta format) over
+              and over, instead of rendering them""")),
+        ]
+        accepted = self.cli_opts.get('long_opts') or []
+        return "\n".join([text for name, text in options if name in accepted])
+
+    def parse_geometry(self, value):
+        """
+        Parses a terminal size from the command-line, in the format
+        WIDTHxHEIGHT, returning a tuple (width, height).
+        """
+        try:
+            width, height = [int(v) for v in value.lower().split('x')]
+            if width <= 0 or height <= 0:
+                raise ValueError
+        except ValueError:
+            raise exception.InvalidOptionException("geometry",
+                _("Use the format WIDTHxHEIGHT (eg. 80x24)"))
+        return width, height
+
+    def get_time(self):
+        """
+        Returns the current time, which is virtual while frames are exported
+        (see `export`).
+        """
+        if self.virtual_clock is not None:
+            return self.virtual_clock.time()
+        return time.time()
+
+    def get_pass_frames(self):
+        """
+        Returns the number of frames of a full pass of the animation (to be
+        overridden by screens, as this is just one frame).
+        """
+        return 1
+
+    def export(self):
+        """
+        Renders `export_count` frames (or a full pass, see `get_pass_frames`)
+        of the screen into `export_file`, with the terminal size fixed in
+        `export_geometry`, instead of displaying them.
+
+        Nothing is displayed or waited for: the frames are rendered as fast as
+        possible, on a virtual clock, and the random numbers are always the
+        same, so exports are reproducible.
+
+        The frames are saved as an asciicast recording, or in the delta format
+        (see `recording` module), which can be replayed with `replay`.
+        """
+        from termsaverlib.plugins.figlet import recording
+        from termsaverlib.plugins.figlet.sink import AsciicastSink
+
+        width, height = self.export_geometry
+        self.geometry = {'x': width, 'y': height}
+        self.position = {'x': 0, 'y': 0}
+        self.geometry_fixed = True
+        self.virtual_clock = timing.VirtualClock()
+        self.frame_clock = None
+        random.seed(0)
+        try:
+            fd = os.open(self.export_file,
+                         os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0644)
+        except OSError, e:
+            raise exception.PathNotFoundException(self.export_file,
+                _("Could not write the exported frames: %s") % e)
+        try:
+            if self.export_format == 'delta':
+                self.output = FrameSink(os.open(os.devnull, os.O_WRONLY))
+                self.recorder = recording.FrameRecorder(fd, width,
+                    height, self.virtual_clock.time)
+            else:
+                self.output = AsciicastSink(fd, width, height,
+                                            self.virtual_clock.time)
+            for __ in xrange(self.export_count or self.get_pass_frames()):
+                self._run_cycle()
+            if self.recorder is not None:
+                self.recorder.close()
+            self.display_restore()
+        finally:
+            if self.recorder is not None:
+                os.close(self.output.fd)
+                self.recorder = None
+            os.close(fd)
+            self.output = None
+
+    def replay(self):
+        """
+        Displays the recording in `replay_file` (exported with the delta
+        format, see `export`) in a loop, instead of running the screen, so
+        nothing is rendered at all. It is centered in the terminal, and
+        clipped to it (see `display_recording`).
+        """
+        from termsaverlib.plugins.figlet import recording
+
+        try:
+            width, height, duration, events = \
+                recording.load_recording(self.replay_file)
+        except IOError, e:
+            raise exception.PathNotFoundException(self.replay_file,
+                _("Could not read the recording: %s") % e)
+        self.get_terminal_size()
+        self.display_reset()
+        try:
+            self.display_recording(events, duration, width, height)
+        except KeyboardInterrupt:
+            self._on_keyboard_interrupt()
+            raise
+
+    def add_words(self, words):
+        """
+        Adds `words` to the `playlist` (the first ones replace the default
+        word), so they are displayed in turns.
+        """
+        if self.playlist is None:
+            self.playlist = []
+        self.playlist.extend(words)
+        self.word = self.playlist[self.playlist_index]
+
+    def load_words(self, path):
+        """
+        Adds the words in the file `path` (one per line, blank lines are
+        ignored) to the `playlist`.
+        """
+        try:
+            f = open(path, 'r')
+            try:
+                words = [l.strip() for l in f if l.strip()]
+            finally:
+                f.close()
+        except IOError, e:
+            raise exception.PathNotFoundException(path,
+                _("Could not read the words: %s") % e)
+        if not words:
+            raise exception.InvalidOptionException("word-file",
+                _("There are no words in the file."))
+        self.add_words(words)
+
+    def next_word(self):
+        """
+        Moves `word` to the next one in the `playlist`, if any, returning
+        True if it changed.
+
+        If the next word is still being rendered in background (see
+        `prerender_words`), the current one is kept instead, so the screen
+        never waits for it. Returns False in that case.
+        """
+        if not self.playlist:
+            return False
+        index = (self.playlist_index + 1) % len(self.playlist)
+        if self.prerenderer is not None and self.prerenderer.busy() and \
+                (self.font, self.geometry['x'], self.playlist[index]) \
+                not in self.render_cache:
+            return False
+        self.playlist_index = index
+        self.word = self.playlist[index]
+        return True
+
+    def prerender_words(self):
+        """
+        Schedules the next `queue_depth` words of the `playlist` to be
+        rendered in background (see `prerender_figlet_text`), for the
+        current font and terminal width, starting the `prerenderer` if
+        needed.
+
+        This is cheap enough to be called every cycle: nothing is done if
+        the current word and the terminal size did not change since last
+        time. Nothing is rendered in background while frames are exported,
+        as it would make them differ between exports.
+        """
+        if not self.playlist or len(self.playlist) < 2 \
+                or self.queue_depth <= 0 or self.virtual_clock is not None:
+            return
+        if self.prerenderer is not None:
+            # account what was rendered in background since last time
+            for how in self.prerenderer.results():
+                if how in ('remote', 'spawns') and self.stats is not None:
+                    self.stats.count(how)
+        key = (self.playlist_index, self.geometry_generation)
+        if key == self.prerender_key:
+            return
+        self.prerender_key = key
+        if self.prerenderer is None:
+            from termsaverlib.plugins.figlet import prerender
+            self.prerenderer = prerender.Prerenderer(
+                self.prerender_figlet_text)
+        count = min(self.queue_depth, len(self.playlist) - 1)
+        client = self.get_render_daemon()
+        # locate and load the font here, as it changes the screen (see
+        # `load_font`), which the prerenderer thread must not do
+        figlet_font = self.load_font()
+        for i in range(1, count + 1):
+            self.prerenderer.schedule(self.font, figlet_font,
+                self.geometry['x'],
+                self.playlist[(self.playlist_index + i) % len(self.playlist)],
+                client)
+
+    def prerender_figlet_text(self, font, figlet_font, width, text, client):
+        """
+        Renders the figlet output of `text` into `render_cache` (see
+        `build_figlet_text`), if not there yet, with the renderer daemon
+        `client` (if any), or the already loaded `figlet_font`. This is
+        called from the `prerenderer` thread, so it only uses what is
+        informed (see `render_font_text`), and errors are left to be
+        reported by `build_figlet_text` itself.
+
+        Returns how the text was rendered, to be accounted by the screen
+        (see `prerender_words`), or None if it was not.
+        """
+        key = (font, width, text)
+        if key in self.render_cache:
+            return None
+        output = None
+        if self.shared_cache is not None:
+            output = self.shared_cache.get(key)
+        how = None
+        if output is None:
+            output, how = self.render_font_text(font, figlet_font, width,
+                                                text, client)
+            if self.shared_cache is not None:
+                self.shared_cache.put(key, output)
+        self.store_figlet_text(key, output)
+        return how
+
+    def autorun(self, args, loop=True):
+        """
+        Runs the screen (see `ScreenBase.autorun`), watching terminal size
+        changes with SIGWINCH, so the size is not read again every cycle,
+        and waiting with an `event_waiter`, so a key pressed in the terminal
+        (if `Settings.DISMISS_ON_KEY` is set) dismisses the screen, and a
+        resize draws it again, without waiting for the delay to finish.
+        """
+        previous = None
+        if hasattr(signal, 'SIGWINCH'):
+            previous = signal.signal(signal.SIGWINCH, self._on_resize)
+            # do not interrupt system calls (writes, subprocesses) on resize
+            if hasattr(signal, 'siginterrupt'):
+                signal.siginterrupt(signal.SIGWINCH, False)
+            self.geometry_watched = True
+        if self.event_waiter is None:
+            fd = None
+            if constants.Settings.DISMISS_ON_KEY and sys.stdin.isatty():
+                fd = sys.stdin.fileno()
+            self.event_waiter = events.EventWaiter(fd)
+            self.event_waiter.start()
+        try:
+            ScreenBase.autorun(self, args, loop)
+        finally:
+            self.event_waiter.stop()
+            self.event_waiter = None
+            if self.geometry_watched:
+                self.geometry_watched = False
+                signal.signal(signal.SIGWINCH, previous or signal.SIG_DFL)
+            if self.prerenderer is not None:
+                self.prerenderer.stop()
+            if self.stats_file is not None:
+                self.save_stats()
+
+    def _on_resize(self, signum, frame):
+        """
+        Handles SIGWINCH, flagging the terminal size to be read again by
+        `update_geometry` (at the beginning of the next cycle, so a resize
+        never happens in the middle of a frame).
+        """
+        self.geometry_pending = True
+
+    def update_geometry(self):
+        """
+        Reads the terminal size into `geometry` (see `get_terminal_size`), if
+        it may have changed since last time, increasing `geometry_generation`
+        if it actually did. Returns True if the terminal size changed.
+        """
+        if self.geometry_fixed or not self.geometry_pending:
+            return False
+        self.geometry_pending = not self.geometry_watched
+        previous = (self.geometry['x'], self.geometry['y'])
+        self.get_terminal_size()
+        if previous == (self.geometry['x'], self.geometry['y']):
+            return False
+        self.geometry_generation += 1
+        return True
+
+    def _on_keyboard_interrupt(self):
+        """
+        Restores the terminal cursor hidden by `DisplayHelperBase`.
+        """
+        self.display_restore()
+
+    def wait_frame(self, period):
+        """
+        Waits for the deadline of the next frame, `period` seconds after the
+        previous one (not after the work done in between), and returns the
+        number of frames the animation should advance, which is more than 1
+        if frames had to be skipped to keep up.
+
+        Refer to `frame_clock` for the achieved frame rate.
+        """
+        if self.frame_clock is None or self.frame_clock.period != period:
+            if self.virtual_clock is not None:
+                self.frame_clock = timing.FrameClock(period,
+                    sleep=self.virtual_clock.sleep,
+                    now=self.virtual_clock.time)
+            else:
+                self.frame_clock = timing.FrameClock(period,
+                    sleep=self.wait_events)
+        steps = self.frame_clock.tick()
+        if self.stats is not None:
+            self.stats.lap('sleep')
+            if self.stats.end_frame():
+                self.refresh_stats()
+        return steps
+
+    def refresh_stats(self):
+        """
+        Updates the runtime statistics displayed on screen (if enabled), and
+        calls `stats_hook`, if any.
+        """
+        if self.stats_overlay:
+            # figlet texts built again are hits as well (see last_build)
+            cache = self.render_cache.stats()
+            hits = cache['hits'] + self.stats.counters['reused']
+            self.overlay = self.stats.report(
+                1.0 / max(self.frame_clock.period, 0.001),
+                float(hits) / max(1, hits + cache['misses']))
+        if self.stats_hook is not None:
+            self.stats_hook(self, self.get_stats())
+
+    def display_flush(self, end_frame=True):
+        """
+        Writes the frame to the terminal (see `DisplayHelperBase`), also
+        accounting the time taken to compose and write it, if runtime
+        statistics are enabled.
+        """
+        if self.stats is None:
+            DisplayHelperBase.display_flush(self, end_frame)
+        else:
+            self.stats.lap('compose')
+            DisplayHelperBase.display_flush(self, end_frame)
+            self.stats.lap('write')
+
+    def display_sleep(self, seconds):
+        """
+        Pauses the drawing (see `DisplayHelperBase`), also accounting it if
+        runtime statistics are enabled (or just moves the virtual clock, if
+        frames are being exported).
+        """
+        if self.virtual_clock is not None:
+            self.virtual_clock.sleep(seconds)
+        elif self.stats is None:
+            self.wait_events(seconds)
+        else:
+            self.stats.lap('compose')
+            self.wait_events(seconds)
+            self.stats.lap('sleep')
+
+    def wait_events(self, seconds):
+        """
+        Waits for `seconds` (see `events.EventWaiter.sleep`), returning
+        earlier if the terminal is resized, and raising `KeyboardInterrupt`
+        if a key is pressed meanwhile. Without an `event_waiter` (the screen
+        is not run by `autorun`), this is just `time.sleep`.
+        """
+        if self.event_waiter is not None:
+            self.event_waiter.sleep(seconds)
+        else:
+            time.sleep(seconds)
+
     def execute_shell(self, cmd):
         """
         Simple routine to execute shell commands
         """
+        if self.stats is not None:
+            self.stats.count('spawns')
+        return self.run_command(cmd)
+
+    def run_command(self, cmd):
+        """
+        Executes the command `cmd`, the same way `execute_shell` does, but
+        without accounting it (so it can be called from any thread).
+        """
         try:
             return common.execute_shell(cmd, False)
         except Exception, e:
@@ -92,26 +1035,96 @@ class FigletScreenBase(ScreenBase, PositionHelperBase):
                  }
             )
 
+    def get_font_index(self):
+        """
+        Retrieves the `fontindex.FontIndex` of all fonts available (shared by
+        all screens), loading it from the cache directory, if possible.
+
+        If no fonts are found in the known font paths, figlet binary is asked
+        for its font directory (with `figlet -I2`), which is then kept in the
+        index for next executions.
+        """
+        if FigletScreenBase.font_index is None:
+            from termsaverlib.plugins.figlet import fontindex
+            cache_file = None
+            cache_dir = figlet_common.get_cache_dir()
+            if cache_dir is not None:
+                cache_file = os.path.join(cache_dir, 'fonts.idx')
+            index = fontindex.FontIndex(self.get_font_paths(), cache_file)
+            if not index.fonts:
+                try:
+                    index.add_path(self.execute_shell(["figlet", "-I2"]))
+                except exception.TermSaverException:
+                    pass
+            FigletScreenBase.font_index = index
+        return FigletScreenBase.font_index
+
     def get_fonts(self):
         """
-        Retrieve a list of all available figlet fonts,
-        by executing the command:
-            figlet -I2
+        Retrieve a sorted list of all available figlet fonts, from the
+        font index (see `get_font_index`).
+        """
+        return self.get_font_index().font_names()
+
+    def has_font(self, name):
+        """
+        Returns True if the font `name` (or font file path) is available.
+        """
+        return self.find_font_file(name) is not None
 
-        See figlet man pages for detailed documentation on this.
+    def find_font_file(self, name):
         """
+        Locates the font file of the font `name` (or font file path),
+        returning None if it is not available.
 
-        font_path = self.execute_shell(["figlet", "-I2"])
+        Fonts right within the font paths (see `get_font_paths`) are found
+        with a direct lookup, so the font index (see `get_font_index`) is
+        only loaded, or built, for fonts elsewhere (such as sub-directories,
+        or the figlet binary font directory).
+        """
+        from termsaverlib.plugins.figlet import figfont
+        if os.path.dirname(name):
+            return figfont.find_font(name, [])
+        return figfont.find_font(name, self.get_font_paths()) \
+            or self.get_font_index().get_font(name)
+
+    def get_font_paths(self):
+        """
+        Retrieves the list of directories where font files are searched for,
+        based on FIGLET_FONTDIR environment variable, `Settings.FONT_PATHS` and
+        `Settings.EXTRA_FONT_PATHS`.
+        """
+        paths = []
+        if os.environ.get('FIGLET_FONTDIR'):
+            paths.append(os.environ['FIGLET_FONTDIR'])
+        paths.extend(constants.Settings.FONT_PATHS)
+        paths.extend([os.path.expanduser(p)
+                      for p in constants.Settings.EXTRA_FONT_PATHS])
+        return paths
 
-        # get the font files installed in font_path,
-        # and clean them up for printing
-        fonts = [os.path.split(x)[1].split(".")[0] \
-                 for x in self.execute_shell(["find",
-                 font_path, "-iname", "*.flf"]).split("\n")]
+    def get_font_file(self, font=None):
+        """
+        Locates the font file of `font` (default is the current `font`),
+        returning None if it could not be found (or could not be handled
+        without figlet binary).
+        """
+        if font is None:
+            font = self.font
+        if font in self.font_files:
+            return self.font_files[font] or None
 
-        return fonts
+        path = self.find_font_file(font)
+        self.font_files[font] = path or False
+        return path
 
     def help_fonts(self):
+        """
+        Displays the available fonts, or a sample rendered in each of them,
+        if `preview` is set (see `help_fonts_preview`).
+        """
+        if self.preview:
+            self.help_fonts_preview()
+            return
 
         fonts = self.get_fonts()
         ScreenBase.usage_header()
@@ -129,26 +1142,279 @@ on how to deal with fonts.
         }
         ScreenBase.usage_footer()
 
+    def help_fonts_preview(self):
+        """
+        Displays the `preview_text` (or the font name) rendered in every
+        available font, as each sample gets ready (see `gallery` module).
+        Samples are rendered in parallel, and kept in the cache directory,
+        so they are only rendered again if the font files change.
+        """
+        from termsaverlib.plugins.figlet import gallery
+
+        index = self.get_font_index()
+        fonts = [(name, index.get_font(name)) for name in index.font_names()]
+        cache_file = None
+        cache_dir = figlet_common.get_cache_dir()
+        if cache_dir is not None:
+            cache_file = os.path.join(cache_dir, 'previews.idx')
+        self.get_terminal_size()
+        width = self.geometry['x']
+
+        ScreenBase.usage_header()
+        for name, output in gallery.iter_previews(fonts, self.preview_text,
+                                                  width, cache_file):
+            print "%s\n%s\n" % (name, "-" * len(name))
+            print (output or _("(this font could not be rendered)")) + "\n"
+            sys.stdout.flush()
+        print _("""There are %(count)d figlet fonts available in your system.
+
+You may try to use them with the option -f/--font. See --help for details.
+""") % {'count': len(fonts)}
+        ScreenBase.usage_footer()
+
+    def get_metrics_index(self):
+        """
+        Retrieves the `fontmetrics.MetricsIndex` of all fonts available
+        (shared by all screens), loading it from the cache directory, if
+        possible (otherwise, fonts are only loaded as their metrics are
+        needed, see `fontmetrics.MetricsIndex`).
+        """
+        if FigletScreenBase.metrics_index is None:
+            from termsaverlib.plugins.figlet import fontmetrics
+            index = self.get_font_index()
+            cache_file = None
+            cache_dir = figlet_common.get_cache_dir()
+            if cache_dir is not None:
+                cache_file = os.path.join(cache_dir, 'metrics.idx')
+            FigletScreenBase.metrics_index = fontmetrics.MetricsIndex(
+                [(name, index.get_font(name))
+                 for name in index.font_names()], cache_file)
+        return FigletScreenBase.metrics_index
+
+    def get_font_metrics(self):
+        """
+        Retrieves the `fontmetrics.FontMetrics` of the current `font`, or
+        None if it can not be calculated (the font is handled by the figlet
+        binary), or should not (the font is only loaded by the renderer
+        daemon).
+        """
+        if self.font not in self.font_metrics:
+            metrics = None
+            if self.metrics_index is not None:
+                metrics = self.metrics_index.get_metrics(self.font)
+            if metrics is None and self.get_render_daemon() is None:
+                font = self.load_font()
+                if font is not None:
+                    from termsaverlib.plugins.figlet import fontmetrics
+                    metrics = fontmetrics.FontMetrics(font)
+            self.font_metrics[self.font] = metrics
+        return self.font_metrics[self.font]
+
+    def measure_figlet_text(self, text):
+        """
+        Returns the size (a tuple of columns and rows) `figlet_geometry` would
+        have after building `text` (see `build_figlet_text`), calculated from
+        the font metrics, without rendering it. Returns None if it can not be
+        calculated (see `fontmetrics.FontMetrics.measure`).
+        """
+        key = (self.font, text, self.geometry_generation)
+        if self.last_measure is None or self.last_measure[0] != key:
+            metrics = self.get_font_metrics()
+            size = None
+            if metrics is not None:
+                size = metrics.measure(text, self.geometry['x'])
+            self.last_measure = (key, size)
+        return self.last_measure[1]
+
+    def fit_font(self, text):
+        """
+        Changes the `font` to the tallest one in which `text` fits the screen
+        in a single line, based on the font metrics (see `get_metrics_index`),
+        so nothing is rendered to find it. The current font is kept if none
+        fits.
+
+        The font is only picked again if the text or the terminal size
+        changed since last time.
+        """
+        key = (text, self.geometry_generation)
+        if key == self.auto_font_key:
+            return
+        self.auto_font_key = key
+        index = self.get_metrics_index()
+        font = index.fit(text, self.geometry['x'], self.geometry['y'])
+        # persist the metrics of the fonts loaded to pick it
+        index.save()
+        if font is not None:
+            self.font = font
+
+    def load_font(self, font=None):
+        """
+        Loads `font` (default is the current `font`, see
+        `fontcache.load_font`), returning None if it could not be found or
+        parsed, and should be handled by the figlet binary instead.
+        """
+        if font is None:
+            font = self.font
+        path = self.get_font_file(font)
+        if path is not None:
+            from termsaverlib.plugins.figlet import fontcache
+            try:
+                return fontcache.load_font(path)
+            except exception.TermSaverException:
+                # leave this font to the figlet binary from now on
+                self.font_files[font] = False
+        return None
+
+    def render_figlet_text(self, font, width, text):
+        """
+        Renders the figlet output of `text` in `font`, for a terminal with
+        `width` columns (see `render_text`).
+
+        If the renderer daemon is running, it renders the text instead (see
+        `render_remote`), so the font is not even loaded.
+        """
+        output = self.render_remote(font, width, text)
+        if output is not None:
+            return output
+
+        output, how = self.render_text(font, width, text)
+        if how == 'spawns' and self.stats is not None:
+            self.stats.count('spawns')
+        return output
+
+    def render_text(self, font, width, text):
+        """
+        Renders the figlet output of `text` in `font`, for a terminal with
+        `width` columns (see `render_font_text`), loading the font first
+        (see `load_font`), so this must be called from the main thread.
+        """
+        return self.render_font_text(font, self.load_font(font), width, text)
+
+    def render_font_text(self, font, figlet_font, width, text, client=None):
+        """
+        Renders the figlet output of `text` in `font`, for a terminal with
+        `width` columns. The rendering is done by `figfont` module with the
+        already loaded `figlet_font`, without spawning any processes, and
+        the figlet binary is only used if it is None (fonts that could not
+        be located or parsed). If a `daemon.RenderClient` is informed, the
+        renderer daemon is asked first.
+
+        Nothing in the screen is changed (or accounted), and fonts are not
+        looked for, so this can be called from any thread. Returns a tuple
+        with the output and how it was rendered: 'remote' (by the daemon),
+        'local' or 'spawns' (by the figlet binary).
+        """
+        if client is not None and isinstance(text, str):
+            if os.path.dirname(font):
+                # font files are informed relative to this process
+                font = os.path.abspath(font)
+            try:
+                output = client.render(font, width, text)
+            except EnvironmentError:
+                # given up by the main thread on its own (see render_remote)
+                output = None
+            if output is not None:
+                return output, 'remote'
+
+        if figlet_font is not None:
+            from termsaverlib.plugins.figlet import figfont
+            # strip it the same way the shell output is
+            return figfont.render(figlet_font, text, width).rstrip(), 'local'
+
+        return self.run_command(["figlet", "-f", font, '-w', str(width),
+                                 text]), 'spawns'
+
+    def compose_figlet_text(self, text):
+        """
+        Populates `figlet_text`, `figlet_lines` and `figlet_geometry` with the
+        figlet output of `text` (a single line), the same way
+        `build_figlet_text` does, but laying out only the characters after
+        the prefix it shares with the previous text composed (refer to
+        `figfont.LineComposer`).
+
+        Texts that do not fit the terminal width, or fonts handled by the
+        figlet binary, are just built with `build_figlet_text`.
+        """
+        key = (self.font, self.geometry['x'])
+        if key != self.composer_key:
+            self.composer_key = key
+            self.composer = None
+            font = self.load_font()
+            if font is not None:
+                from termsaverlib.plugins.figlet import figfont
+                self.composer = figfont.LineComposer(font, self.geometry['x'])
+
+        lines = None
+        if self.composer is not None:
+            lines = self.composer.compose(text)
+        if not lines:
+            self.build_figlet_text(text)
+            return
+
+        # strip and pad it the same way built texts are
+        temp = u"\n".join(lines).rstrip().split(u"\n")
+        width = max([len(x) for x in temp])
+        self.figlet_lines = tuple([l + u" " * (width - len(l)) for l in temp])
+        self.figlet_text = u"\n".join(self.figlet_lines).encode('utf-8')
+        self.figlet_geometry = {'x': width, 'y': len(self.figlet_lines)}
+        self.last_build = None
+
     def build_figlet_text(self, text):
         """
-        Executes the shell command to get the figlet output, based on
-        the defined font, and terminal geometry.
+        Populates `figlet_text`, `figlet_lines` and `figlet_geometry` with the
+        figlet output of `text`, with all lines padded to the same length.
+
+        Results are kept in `render_cache` (see `get_figlet_text`), so
+        building the same text, with same font and terminal width, does not
+        render anything again. And nothing is done at all if the same text
+        was last built, and the terminal was not resized since then.
         """
+        build = (self.font, text, self.geometry_generation)
+        if build == self.last_build:
+            if self.stats is not None:
+                self.stats.count('reused')
+            return
+        self.last_build = build
 
-        self.figlet_text = self.execute_shell(["figlet", "-f", self.font, '-w',
-                                          str(self.geometry['x']), text])
+        self.figlet_text, self.figlet_lines, geometry = \
+            self.get_figlet_text(self.font, self.geometry['x'], text)
+        self.figlet_geometry = dict(geometry)
 
-        temp = self.figlet_text.split("\n")
-        if len(temp) > 0:
-            self.figlet_geometry['x'] = max([len(x) for x in temp])
-        self.figlet_geometry['y'] = len(temp)
+    def get_figlet_text(self, font, width, text):
+        """
+        Returns the `render_cache` entry (text, lines and geometry, see
+        `store_figlet_text`) of the figlet output of `text` in `font`, for a
+        terminal with `width` columns, rendering it (see
+        `render_figlet_text`) only if it is not cached, nor in the
+        `shared_cache` (if enabled). The screen properties are not changed.
+        """
+        key = (font, width, text)
+        cached = self.render_cache.get(key)
+        if cached is None:
+            output = None
+            if self.shared_cache is not None:
+                output = self.shared_cache.get(key)
+            if output is None:
+                output = self.render_figlet_text(font, width, text)
+                if self.shared_cache is not None:
+                    self.shared_cache.put(key, output)
+            cached = self.store_figlet_text(key, output)
+        return cached
+
+    def store_figlet_text(self, key, output):
+        """
+        Keeps the figlet `output` in `render_cache`, with all lines padded to
+        the same length, and returns the entry (text, lines and geometry).
+        The lines are decoded (see `common.decode_output`), so they are
+        measured, and displayed, by character.
+        """
+        temp = figlet_common.decode_output(output).split(u"\n")
+        width = max([len(x) for x in temp])
 
         # fix trailing spaces
-        new_text = []
-        for l in temp:
-            if len(l) < self.figlet_geometry['x']:
-                new_text.append(
-                    l + " " * (self.figlet_geometry['x'] - len(l)))
-            else:
-                new_text.append(l)
-        self.figlet_text = "\n".join(new_text)
+        lines = tuple([l + u" " * (width - len(l)) for l in temp])
+        cached = (u"\n".join(lines).encode('utf-8'), lines,
+                  {'x': width, 'y': len(lines)})
+        self.render_cache.put(key, cached,
+                              6 * len(cached[0]) + 64 * len(lines) + 256)
+        return cached
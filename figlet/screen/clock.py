@@ -0,0 +1,192 @@
+###############################################################################
+#
+# file:     clock.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Simple screensaver that displays a clock in the center of the screen.
+
+See additional information in the class itself.
+
+The screen class available here is:
+
+    * `FigletClockScreen`
+"""
+
+#
+# Python built-in modules
+#
+import time
+
+#
+# Termsaver modules
+#
+from termsaverlib.screen.base import ScreenBase
+from termsaverlib import constants, exception
+from termsaverlib.i18n import _, set_app
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import timing
+from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
+
+#
+# Override termsavr default i18n (reuired for plugins with own i18n files)
+#
+set_app("termsaver-figlet")
+
+
+class FigletClockScreen(FigletScreenBase):
+    """
+    Simple screensaver that displays a clock in the center of the screen.
+
+    The clock text is composed incrementally (see `compose_figlet_text`), so
+    every second only the digits that changed are laid out again, and only
+    the characters that changed on screen are written (see
+    `DisplayHelperBase`).
+
+    This screen offers the additional options to customize its behavior:
+
+        * `time_format`: the format of the clock (see `time.strftime`)
+    """
+
+    time_format = '%H:%M:%S'
+    """
+    Holds the format of the clock text (see `time.strftime`).
+    """
+
+    TICK_OFFSET = 0.01
+    """
+    The time (in seconds) after each whole second when the clock is updated
+    (so it is never updated before the second actually changes).
+    """
+
+    def __init__(self):
+        """
+        Creates a new instance of this class.
+        """
+        ScreenBase.__init__(self,
+            "figlet-clock",
+            _("displays a clock in the center of the screen"),
+            {'opts': 'ht:f:', 'long_opts': ['help', 'time-format=',
+                                           'help-fonts', 'preview', 'font=',
+                                           'stats', 'stats-file=',
+                                           'color=', 'gradient=', 'rainbow']},
+        )
+        self.cleanup_per_cycle = False
+
+    def _run_cycle(self):
+        """
+        Executes a cycle of this screen.
+
+        The actions taken here, for each cycle, are as follows:
+
+            * compose the current time (only the characters that changed)
+            * draw it in the center of the screen with `display_frame`
+            * wait until the next second
+        """
+        # read the screen size again, only if it was resized
+        self.update_geometry()
+        if self.stats is not None:
+            self.stats.lap('geometry')
+
+        self.compose_figlet_text(time.strftime(self.time_format,
+            time.localtime(self.get_time())))
+        if self.stats is not None:
+            self.stats.lap('render')
+
+        self.position['x'] = (self.geometry['x']
+                              - self.figlet_geometry['x']) // 2
+        self.position['y'] = (self.geometry['y']
+                              - self.figlet_geometry['y']) // 2
+        self.display_frame(self.figlet_lines, self.position['x'],
+                           self.position['y'])
+
+        # wait for the next second (even after a suspension)
+        if self.frame_clock is None:
+            self.frame_clock = timing.FrameClock(1.0,
+                                                 sleep=self.wait_events)
+        self.frame_clock.align(self.TICK_OFFSET)
+        self.wait_frame(1.0)
+
+    def _usage_options_example(self):
+        """
+        Describe here the options and examples of this screen.
+
+        The method `_parse_args` will be handling the parsing of the options
+        documented here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        print _("""
+Options:
+
+ -t, --time-format
+              Sets the format of the clock, as in `date` command
+              default is %(default_format)s (hours, minutes and seconds)
+%(common_options)s
+Example:
+
+    $ %(app_name)s %(screen)s
+    This will trigger the screensaver to display the current time in
+    the center of the screen
+
+    $ %(app_name)s %(screen)s -t "%%H:%%M" -f lean
+    This will trigger the screensaver to display the current time,
+    without seconds, using the "lean" figlet font.
+""") % {
+        'app_name': constants.App.NAME,
+        'screen': self.name,
+        'common_options': self._usage_common_options(),
+        'default_format': self.time_format,
+       }
+
+    def _parse_args(self, prepared_args):
+        """
+        Handles the special command-line arguments available for this screen.
+        Although this is a base screen, having these options prepared here
+        can save coding for screens that will not change the default options.
+
+        See `_usage_options_example` method for documentation on each of the
+        options being parsed here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        for o, a in prepared_args[0]:  # optlist, args
+            if o in ("-t", "--time-format"):
+                # make sure argument is a valid value
+                if a in (None, '') or not time.strftime(a).strip():
+                    raise exception.InvalidOptionException("time-format",
+                        _("Use the format of `date` command (eg. %H:%M)"))
+                self.time_format = a
+            elif not self._parse_common_option(o, a, prepared_args[1]):
+                # this should never happen!
+                raise Exception(_("Unhandled option. See --help for details."))
+
+        self._apply_common_options()
@@ -0,0 +1,224 @@
+###############################################################################
+#
+# file:     daemon.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A daemon that renders the texts of the other termsaver-figlet screens, so
+many of them (such as in many terminal sessions) share the fonts loaded and
+the texts rendered.
+
+See additional information in the class itself.
+
+The screen class available here is:
+
+    * `FigletDaemonScreen`
+"""
+
+#
+# Python built-in modules
+#
+import signal
+
+#
+# Termsaver modules
+#
+from termsaverlib.screen.base import ScreenBase
+from termsaverlib import constants, exception
+from termsaverlib.i18n import _, set_app
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
+
+#
+# Override termsavr default i18n (reuired for plugins with own i18n files)
+#
+set_app("termsaver-figlet")
+
+
+class FigletDaemonScreen(FigletScreenBase):
+    """
+    A daemon, instead of an actual screen, that renders the texts of the
+    other screens: while it runs, screens started afterwards connect to it
+    (see `FigletScreenBase.get_render_daemon`), and ask it for their figlet
+    outputs over a local Unix socket (see `daemon.RenderServer`), instead of
+    loading the fonts and rendering on their own.
+
+    So the fonts are loaded, and each distinct text is rendered, only once
+    (kept in `render_cache`), whatever the number of screens running. Only
+    the figlet outputs are served, not frames: the screens still compose,
+    color, diff and write their frames, as these depend on each terminal
+    (its size, colors and timing), and render on their own if the daemon
+    stops.
+
+    Nothing is displayed, so this is usually started in background, and
+    stopped with SIGTERM (or Ctrl+C).
+    """
+
+    server = None
+    """
+    Holds the `daemon.RenderServer` serving the screens, once started.
+    """
+
+    SERVE_TIMEOUT = 1.0
+    """
+    The maximum time (in seconds) each cycle waits for requests.
+    """
+
+    MAX_WIDTH = 1024
+    """
+    The maximum terminal width (in columns) texts are rendered for.
+    """
+
+    def __init__(self):
+        """
+        Creates a new instance of this class.
+        """
+        ScreenBase.__init__(self,
+            "figlet-daemon",
+            _("renders the text of other figlet screens (in background)"),
+            {'opts': 'h', 'long_opts': ['help']},
+        )
+        self.cleanup_per_cycle = False
+        # never ask itself to render
+        self.render_daemon_checked = True
+
+    def autorun(self, args, loop=True):
+        """
+        Runs the daemon (see `ScreenBase.autorun`), without the terminal
+        handling of other screens (it is usually started in background),
+        removing the socket when it stops, including by SIGTERM.
+        """
+        previous = signal.signal(signal.SIGTERM, self._on_terminate)
+        try:
+            ScreenBase.autorun(self, args, loop)
+        finally:
+            signal.signal(signal.SIGTERM, previous or signal.SIG_DFL)
+            if self.server is not None:
+                self.server.close()
+                self.server = None
+
+    def clear_screen(self):
+        """
+        Does nothing, as nothing is displayed by this screen.
+        """
+
+    def _on_terminate(self, signum, frame):
+        """
+        Handles SIGTERM, stopping the daemon.
+        """
+        raise SystemExit(0)
+
+    def _run_cycle(self):
+        """
+        Executes a cycle of this screen.
+
+        The actions taken here, for each cycle, are as follows:
+
+            * listen on the socket, on first cycle
+            * serve the requests arriving within `SERVE_TIMEOUT`
+        """
+        if self.server is None:
+            from termsaverlib.plugins.figlet import daemon
+            path = daemon.get_socket_path()
+            if path is None:
+                raise exception.PathNotFoundException(
+                    constants.App.NAME,
+                    _("Could not create the runtime directory"))
+            try:
+                self.server = daemon.RenderServer(path, self.render_request)
+            except EnvironmentError, e:
+                raise exception.PathNotFoundException(path,
+                    _("Could not listen on the socket: %s") % e)
+        self.server.serve(self.SERVE_TIMEOUT)
+
+    def render_request(self, font, width, text):
+        """
+        Returns the figlet output of `text` in `font`, for a terminal with
+        `width` columns (see `get_figlet_text`), for the `server`.
+        """
+        if not 0 < width <= self.MAX_WIDTH:
+            raise ValueError("invalid width: %d" % width)
+        if font not in self.font_files and not self.has_font(font):
+            raise ValueError("font not available: %s" % font)
+        return self.get_figlet_text(font, width, text)[0]
+
+    def get_stats(self):
+        """
+        Returns a dictionary with all runtime statistics of the screen (see
+        `FigletScreenBase.get_stats`), including the `server` usage.
+        """
+        result = FigletScreenBase.get_stats(self)
+        if self.server is not None:
+            result['server'] = self.server.stats()
+        return result
+
+    def _usage_options_example(self):
+        """
+        Describe here the options and examples of this screen.
+
+        The method `_parse_args` will be handling the parsing of the options
+        documented here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        print _("""
+Options:
+
+%(common_options)s
+
+Example:
+
+    $ %(app_name)s %(screen)s &
+    This will start the daemon in background, so the figlet screens
+    started afterwards (in any terminal of the same user) ask it to
+    render their texts, instead of loading the fonts on their own.
+    They render on their own again if the daemon is stopped.
+""") % {
+        'app_name': constants.App.NAME,
+        'screen': self.name,
+        'common_options': self._usage_common_options(),
+       }
+
+    def _parse_args(self, prepared_args):
+        """
+        Handles the special command-line arguments available for this screen.
+        Although this is a base screen, having these options prepared here
+        can save coding for screens that will not change the default options.
+
+        See `_usage_options_example` method for documentation on each of the
+        options being parsed here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        for o, a in prepared_args[0]:  # optlist, args
+            if not self._parse_common_option(o, a, prepared_args[1]):
+                # this should never happen!
+                raise Exception(_("Unhandled option. See --help for details."))
@@ -37,7 +37,6 @@ The screen class available here is:
 # Python mobdules
 #
 import random
-import time
 
 #
 # Internal modules
@@ -49,6 +48,7 @@ from termsaverlib.i18n import _, set_app
 #
 # Internal modules
 #
+from termsaverlib.plugins.figlet.compositor import Sprite
 from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
 
 #
@@ -64,9 +64,13 @@ class FigletFlyScreen(FigletScreenBase):
     From its base classes, the functionality provided here bases on the
     settings defined below:
 
-        * clean up each cycle: True
-          this will force the screen to be cleaned (cleared) before each new
-          cycle is displayed
+        * clean up each cycle: False
+          frames are drawn with `display_frame`, which only writes what
+          changed since the previous one
+
+    When more than one word flies at once (see `banners`), each of them is
+    a sprite drawn with `display_sprites`, so only the areas they moved
+    from or to are composed and written, whatever the terminal size is.
     """
 
     word = ''
@@ -74,6 +78,59 @@ class FigletFlyScreen(FigletScreenBase):
     Holds the word to be displayed on screen
     """
 
+    frames = None
+    """
+    Holds the ring of frames of the animation, indexed by the horizontal
+    position of the text (see `get_frame`).
+    """
+
+    frames_key = None
+    """
+    Holds the figlet text and `geometry_generation` the `frames` were built
+    for.
+    """
+
+    frame_steps = 1
+    """
+    Holds the number of positions the text moves in the next frame (more
+    than 1 when frames were skipped to keep up with `delay`).
+    """
+
+    banners = 1
+    """
+    Holds the number of words flying at once, each at its own speed and
+    row (see `move_banners`).
+    """
+
+    MIN_SPEED = 0.5
+    """
+    The minimum speed (columns per frame) of the words flying, when more
+    than one flies at once.
+    """
+
+    MAX_SPEED = 2.0
+    """
+    The maximum speed (columns per frame) of the words flying, when more
+    than one flies at once.
+    """
+
+    flying = None
+    """
+    Holds the words flying, when more than one flies at once, each as a
+    dictionary with its `compositor.Sprite` (sprite), word, speed (columns
+    per frame) and horizontal position (x, fractional).
+    """
+
+    flying_key = None
+    """
+    Holds the `geometry_generation` the `flying` words were laid out for.
+    """
+
+    flying_index = 0
+    """
+    Holds the index (in the playlist) of the next word to fly.
+    """
+
     def __init__(self):
         """
         The constructor of this class.
@@ -83,49 +140,178 @@ class FigletFlyScreen(FigletScreenBase):
             _("displays flying text"),
 
             {'opts': 'hw:d:f:', 'long_opts': ['help', 'word=', 'delay=',
-                                            'help-fonts', 'font=']},
+                                            'help-fonts', 'preview', 'font=',
+                                            'stats', 'stats-file=',
+                                            'export=', 'frames=',
+                                            'geometry=', 'format=',
+                                            'replay=', 'word-file=',
+                                            'queue-depth=', 'auto-font',
+                                            'banners=', 'color=', 'gradient=',
+                                            'rainbow', 'shared-cache']},
         )
         self.word = constants.App.TITLE
         self.delay = 0.05
-        self.cleanup_per_cycle = True
+        self.cleanup_per_cycle = False
 
     def _run_cycle(self):
         """
         Executes a cycle of this screen.
         """
-        # calculate random position based on screen size
-        self.get_terminal_size()
+        # read the screen size again, only if it was resized
+        self.update_geometry()
+        if self.stats is not None:
+            self.stats.lap('geometry')
 
-        self.build_figlet_text(self.word)
+        if self.banners > 1:
+            self.move_banners()
+            if self.stats is not None:
+                self.stats.lap('render')
+            self.display_sprites([b['sprite'] for b in self.flying])
+            self.frame_steps = self.wait_frame(self.delay)
+            return
+
+        # a new pass (with the next word, if any) starts when the text
+        # is gone from the screen
+        new_pass = self.position['x'] >= self.geometry['x'] \
+            + self.figlet_geometry['x']
+        if new_pass:
+            self.next_word()
+        if self.auto_font:
+            self.fit_font(self.word)
 
         # make sure the figlet output can be printed on available screen
-        if len(self.figlet_text.split("\n")) > self.geometry['y']:
+        # (calculated from the font metrics, before rendering it at all)
+        size = self.measure_figlet_text(self.word)
+        if size is not None and size[1] > self.geometry['y']:
             raise exception.InvalidOptionException("word",
                 _("The word you are trying to print is just too big."))
 
-        if self.position['x'] == self.geometry['x'] \
-                + self.figlet_geometry['x']:
+        self.build_figlet_text(self.word)
+        self.prerender_words()
+        if self.stats is not None:
+            self.stats.lap('render')
+
+        # (fonts without metrics can only be checked after rendering)
+        if self.figlet_geometry['y'] > self.geometry['y']:
+            raise exception.InvalidOptionException("word",
+                _("The word you are trying to print is just too big."))
+
+        if new_pass:
             self.position['x'] = 1
             self.position['y'] = random.randint(1,
                 self.geometry['y'] - self.figlet_geometry['y'])
 
-        self.position['x'] += 1
-        new_text = ""
-        for l in self.figlet_text.split("\n"):
+        self.position['x'] = min(self.position['x'] + self.frame_steps,
+            self.geometry['x'] + self.figlet_geometry['x'])
+
+        self.display_frame(self.get_frame(self.position['x']), 0,
+                           self.position['y'])
+        self.frame_steps = self.wait_frame(self.delay)
+
+    def move_banners(self):
+        """
+        Moves the `flying` words (creating them, in the first frame), each
+        by its own speed. Words gone from the screen start over from the
+        left, with the next word of the playlist, in a random row and speed.
+        """
+        if self.flying is None:
+            self.flying = []
+            for __ in range(self.banners):
+                banner = {'sprite': Sprite()}
+                # spread them, so they do not enter the screen all at once
+                self.launch_banner(banner,
+                                   -random.randint(0, self.geometry['x']))
+                self.flying.append(banner)
+            self.flying_key = self.geometry_generation
+
+        if self.flying_key != self.geometry_generation:
+            # rendered again for the new width, and kept within the screen
+            self.flying_key = self.geometry_generation
+            for banner in self.flying:
+                sprite = banner['sprite']
+                sprite.lines = self.get_banner_lines(banner['word'])
+                if sprite.y + len(sprite.lines) > self.geometry['y']:
+                    sprite.y = random.randint(0,
+                        self.geometry['y'] - len(sprite.lines))
+
+        for banner in self.flying:
+            banner['x'] += banner['speed'] * self.frame_steps
+            banner['sprite'].x = int(banner['x'])
+            if banner['sprite'].x >= self.geometry['x']:
+                self.launch_banner(banner)
+
+    def launch_banner(self, banner, offset=0):
+        """
+        Starts the flying `banner` (see `flying`) over from the left edge
+        of the screen (or `offset` columns further left), with the next word
+        of the playlist, in a random row and speed.
+        """
+        words = self.playlist or [self.word]
+        word = words[self.flying_index % len(words)]
+        self.flying_index += 1
+
+        sprite = banner['sprite']
+        sprite.lines = self.get_banner_lines(word)
+        sprite.y = random.randint(0, self.geometry['y'] - len(sprite.lines))
+        banner['word'] = word
+        banner['speed'] = random.uniform(self.MIN_SPEED, self.MAX_SPEED)
+        banner['x'] = offset - len(sprite.lines[0])
+        sprite.x = int(banner['x'])
+
+    def get_banner_lines(self, word):
+        """
+        Returns the figlet lines of `word` (see `build_figlet_text`), making
+        sure they can be displayed on the screen.
+        """
+        self.build_figlet_text(word)
+        if self.figlet_geometry['y'] > self.geometry['y']:
+            raise exception.InvalidOptionException("word",
+                _("The word you are trying to print is just too big."))
+        return self.figlet_lines
+
+    def get_pass_frames(self):
+        """
+        Returns the number of frames the text takes to fly through the
+        screen, from left to right.
+        """
+        self.update_geometry()
+        self.build_figlet_text(self.word)
+        return self.geometry['x'] + self.figlet_geometry['x']
+
+    def get_frame(self, x):
+        """
+        Retrieves the frame (the figlet text cut/padded to be displayed) for
+        the horizontal position `x`, from the `frames` ring. Frames are only
+        built the first time they are displayed, and the ring is discarded
+        when the figlet text changes or the terminal is resized.
+        """
+        key = (self.figlet_text, self.geometry_generation)
+        if key != self.frames_key:
+            self.frames_key = key
+            self.frames = [None] * (self.geometry['x'] \
+                                    + self.figlet_geometry['x'] + 2)
 
-            # print start/end in pieces
-            if self.position['x'] < self.figlet_geometry['x']:
-                txt = l[self.figlet_geometry['x'] - self.position['x']:]
-            elif self.position['x'] > self.geometry['x']:
-                txt = " " * (self.position['x'] - self.figlet_geometry['x']) \
-                    + l[:self.geometry['x'] - self.position['x']]
-            else:
-                txt = " " * (self.position['x'] - self.figlet_geometry['x']) \
-                    + l
-            new_text += "\n" + txt
+        frame = self.frames[x]
+        if frame is None:
+            frame = self.frames[x] = self.build_frame(x)
+        return frame
 
-        print "\n" * self.position['y'] + new_text
-        time.sleep(self.delay)
+    def build_frame(self, x):
+        """
+        Builds the frame (a tuple of lines) for the horizontal position `x`,
+        cutting the figlet text where it does not fit the screen.
+        """
+        width = self.figlet_geometry['x']
+        if x < width:
+            lines = [l[width - x:] for l in self.figlet_lines]
+        elif x > self.geometry['x']:
+            pad = " " * (x - width)
+            cut = self.geometry['x'] - x
+            lines = [pad + l[:cut] for l in self.figlet_lines]
+        else:
+            pad = " " * (x - width)
+            lines = [pad + l for l in self.figlet_lines]
+        return tuple(lines)
 
     def _usage_options_example(self):
         """
@@ -143,16 +329,16 @@ Options:
 
  -w, --word   Sets the word to be displayed
               default is the name of this application (if you need to use
-              spaces, don't forget to place the word with quotes)
+              spaces, don't forget to place the word with quotes). Use
+              it more than once to display several words in turns
  -d, --delay  Sets the speed of the displaying characters
               default is 0.05 of a second (advised to keep
               between 0.1 and 0.01).
- -f, --font   the figlet font to be used, default is the figlet default
-              (see `figlet -I3` command for details or figler man pages)
- -h, --help   Displays this help message
-     --help-fonts
-              Displays the available fonts that can be used with
-              the -f/--font option.
+     --banners=N
+              The number of words flying at once, each at its own speed
+              and row (taking the words in turns), default is 1.
+              The option --auto-font only applies to a single word
+%(common_options)s
 Example:
 
     $ %(app_name)s %(screen)s
@@ -163,9 +349,24 @@ Example:
     This will trigger the screensaver to display the word FooBar
     in random locations of the screen, using the "lean" figlet font with
     a delay of 0.005 seconds (fast).
+
+    $ %(app_name)s %(screen)s -w Coffee -w Break --word-file=words.txt
+    This will trigger the screensaver to display the words Coffee, Break
+    and the ones in words.txt, in turns, flying through the screen.
+
+    $ %(app_name)s %(screen)s -w Coffee -w Break -f small --banners=5
+    This will trigger the screensaver to display five words at once
+    (Coffee and Break, in turns), flying at different speeds and rows.
+
+    $ %(app_name)s %(screen)s --gradient=blue,cyan,green
+    This will trigger the screensaver to display the default word in
+    colors blending from blue to green, across the screen.
 """) % {
         'app_name': constants.App.NAME,
+        'app_title': constants.App.TITLE,
         'screen': self.name,
+        'common_options': self._usage_common_options(
+            _("a full pass of the text through the screen")),
        }
 
     def _parse_args(self, prepared_args):
@@ -182,29 +383,28 @@ Example:
         configured there will be accepted here.
         """
         for o, a in prepared_args[0]:  # optlist, args
-            if o in ("-h", "--help"):
-                self.usage()
-                self.screen_exit()
-            elif o == "--help-fonts":
-                self.help_fonts()
-                self.screen_exit()
-            elif o in ("-d", "--delay"):
+            if o in ("-d", "--delay"):
                 try:
                     # make sure argument is a valid value (float)
-                    self.freeze_delay = float(a)
+                    self.delay = float(a)
                 except:
                     raise exception.InvalidOptionException("delay")
             elif o in ("-w", "--word"):
                 # make sure argument is a valid value
                 if a in (None, ''):
                     raise exception.InvalidOptionException("word")
-                self.word = a
-            elif o in ("-f", "--font"):
-                # make sure argument is a valid value (exists)
-                self.font = str(a)
-                if self.font not in self.get_fonts():
-                    raise exception.InvalidOptionException("font",
-                        _("Font does not exist"))
-            else:
+                self.add_words([a])
+            elif o == "--banners":
+                try:
+                    # make sure argument is a valid value (int)
+                    self.banners = int(a)
+                    if self.banners < 1:
+                        raise ValueError
+                except:
+                    raise exception.InvalidOptionException("banners",
+                        _("Use a number of words (1 or more)"))
+            elif not self._parse_common_option(o, a, prepared_args[1]):
                 # this should never happen!
                 raise Exception(_("Unhandled option. See --help for details."))
+
+        self._apply_common_options()
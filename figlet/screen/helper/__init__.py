@@ -0,0 +1,37 @@
+###############################################################################
+#
+# file:     __init__.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be used
+#           or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+This package holds helper classes used by termsaver-figlet screens, following
+the same concept of termsaver's own `termsaverlib.screen.helper` package (all
+of them inherit from `ScreenHelperBase`).
+
+The available classes in this package are:
+
+    * `display.DisplayHelperBase`: helper functionality to draw frames on
+      the terminal, writing only what changed since the previous frame.
+
+"""
@@ -0,0 +1,521 @@
+###############################################################################
+#
+# file:     display.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A helper class that draws frames on the terminal by comparing them with what
+is already on screen, and writing only the changed parts (with cursor
+positioning escape sequences), instead of clearing and printing it all again.
+
+See additional information in the class itself.
+
+The helper class available here is:
+
+    * `DisplayHelperBase`
+
+"""
+#
+# Python built-in modules
+#
+import time
+import atexit
+
+#
+# Internal modules
+#
+from termsaverlib.screen.helper import ScreenHelperBase
+from termsaverlib.plugins.figlet.common import decode_output
+from termsaverlib.plugins.figlet.sink import FrameSink
+from termsaverlib.plugins.figlet.compositor import Compositor, Sprite
+
+ESC_CLEAR = "\x1b[2J"
+"""
+Escape sequence to clear the terminal.
+"""
+
+ESC_MOVE = "\x1b[%d;%dH"
+"""
+Escape sequence to move the cursor to a row and column (1-based).
+"""
+
+ESC_HIDE_CURSOR = "\x1b[?25l"
+"""
+Escape sequence to hide the cursor.
+"""
+
+ESC_SHOW_CURSOR = "\x1b[?25h"
+"""
+Escape sequence to show the cursor.
+"""
+
+RUN_GAP = 8
+"""
+The number of unchanged columns, between two changed ones, that are worth
+the cost of a new cursor positioning (otherwise, they are just written
+again along with the changed ones).
+"""
+
+
+class DisplayHelperBase(ScreenHelperBase):
+    """
+    This helper class keeps a copy of what is displayed on the terminal (the
+    back buffer, in `screen_rows`), so every new frame is compared with it and
+    only the runs of changed characters are written, each prefixed with a
+    cursor positioning escape sequence.
+
+    The main methods available here are:
+
+        * `display_frame`: draws a block of lines at a given position of an
+          otherwise blank screen
+
+        * `display_rows`: draws a whole screen (list of rows)
+
+        * `display_sprites`: draws blocks of lines moving independently
+          (see `compositor` module), composing only the areas they moved
+          from or to
+
+        * `display_reset`: clears the terminal and the back buffer (this is
+          done automatically when the terminal size changes)
+
+    Screens using this should set `cleanup_per_cycle` to False, and rely on
+    the property `geometry` (see `PositionHelperBase`) for the terminal size.
+
+    Everything is written through `output` (a `sink.FrameSink`), so each
+    frame results in a single write to the terminal.
+
+    If `colorizer` is set, the text written is colored by it (see
+    `color.Colorizer`). Colors belong to screen columns, so the back buffer
+    still tells what changed, and everything is only written again when the
+    colors themselves change (such as a rainbow moving, every frame).
+    """
+
+    output = None
+    """
+    Holds the `sink.FrameSink` where frames are written (created on first
+    use, for the standard output, if not set by the screen).
+    """
+
+    screen_rows = None
+    """
+    Holds the rows currently displayed on screen (the back buffer), all with
+    the terminal width.
+    """
+
+    cursor_hidden = False
+    """
+    Defines if the cursor was hidden by this helper (to be restored when the
+    application exits).
+    """
+
+    restore_registered = False
+    """
+    Defines if `display_restore` was registered to run when the application
+    exits (it is only registered once).
+    """
+
+    overlay = None
+    """
+    Holds a list of lines displayed on the top right corner, over every
+    frame (such as runtime statistics), or None.
+    """
+
+    recorder = None
+    """
+    Holds a `recording.FrameRecorder` where every change on the screen is
+    recorded, or None.
+    """
+
+    compositor = None
+    """
+    Holds the `compositor.Compositor` with the cells displayed on screen,
+    while drawing with `display_sprites` (instead of `screen_rows`).
+    """
+
+    overlay_sprite = None
+    """
+    Holds the `compositor.Sprite` the `overlay` is drawn with, on top of the
+    ones drawn with `display_sprites`.
+    """
+
+    colorizer = None
+    """
+    Holds the `color.Colorizer` the text is colored with, or None (for the
+    default color of the terminal).
+    """
+
+    color_generation = None
+    """
+    Holds the `color.Colorizer.generation` of the colors displayed on screen.
+    """
+
+    def display_reset(self):
+        """
+        Clears the terminal (with escape sequences, no processes involved)
+        and the back buffer, hiding the cursor.
+        """
+        data = ESC_CLEAR
+        if not self.cursor_hidden:
+            DisplayHelperBase.cursor_hidden = True
+            if not DisplayHelperBase.restore_registered:
+                DisplayHelperBase.restore_registered = True
+                atexit.register(self.display_restore)
+            data = ESC_HIDE_CURSOR + data
+        self.screen_rows = [u" " * self.geometry['x']] * self.geometry['y']
+        self.compositor = None
+        self.display_write(data)
+        if self.recorder is not None:
+            self.recorder.clear()
+
+    def display_restore(self):
+        """
+        Shows the cursor again, if it was hidden by `display_reset`, and
+        restores the default colors, if changed by the `colorizer`.
+        """
+        data = self.colorizer is not None and self.colorizer.reset() or ""
+        if self.cursor_hidden:
+            DisplayHelperBase.cursor_hidden = False
+            data += ESC_SHOW_CURSOR
+        if data:
+            self.display_write(data)
+            self.display_flush()
+
+    def display_frame(self, lines, x=0, y=0, delay=0, line_delay=0):
+        """
+        Draws the `lines` at column `x` and row `y` (0-based, and can be
+        partially out of the screen), blanking everything else. Encoded
+        lines are decoded first (see `common.decode_output`), so they are
+        positioned by character.
+
+        See `display_rows` for details on `delay` and `line_delay`.
+        """
+        width = self.geometry['x']
+        height = self.geometry['y']
+        blank = u" " * width
+        rows = [blank] * height
+        for i in range(max(0, -y), min(len(lines), height - y)):
+            line = lines[i]
+            if isinstance(line, str):
+                line = decode_output(line)
+            if x > 0:
+                line = u" " * x + line
+            elif x < 0:
+                line = line[-x:]
+            if len(line) < width:
+                line += u" " * (width - len(line))
+            rows[y + i] = line[:width]
+        self.display_rows(rows, delay, line_delay)
+
+    def display_rows(self, rows, delay=0, line_delay=0, end_frame=True):
+        """
+        Draws a whole screen (a list of rows, with the terminal width and
+        height), writing only the runs of characters that differ from the
+        back buffer. Rows are compared and positioned by character, so
+        anything but plain ASCII must be informed as unicode (it is only
+        encoded when written, see `sink.FrameSink`).
+
+        If `delay` is informed, the changes are written character by
+        character, pausing after each non-blank one (a typing writer effect,
+        see `TypingHelperBase`), and `line_delay` pauses after each row.
+
+        If `end_frame` is False, the output is written, but it is accounted
+        as part of the next frame.
+
+        The `overlay` lines, if any, are drawn over the rows.
+        """
+        if self.overlay:
+            rows = list(rows)
+            for i in range(min(len(self.overlay), len(rows))):
+                row = rows[i]
+                text = self.overlay[i][:len(row)]
+                rows[i] = row[:len(row) - len(text)] + text
+
+        if self.screen_rows is None \
+                or len(self.screen_rows) != len(rows) \
+                or (rows and len(self.screen_rows[0]) != len(rows[0])):
+            self.display_reset()
+
+        if delay:
+            # erase what is gone at once, and only type what is new
+            erased = []
+            for row in range(len(rows)):
+                old = self.screen_rows[row]
+                new = rows[row]
+                if new is old or new == old:
+                    erased.append(old)
+                else:
+                    erased.append("".join([n == ' ' and ' ' or o
+                                           for o, n in zip(old, new)]))
+            self.display_rows(erased, end_frame=False)
+
+        chunks = []
+        colored = []
+        old_rows = self.screen_rows
+        recorder = self.recorder
+        colorizer = self.colorizer
+        repaint = self.update_colors(self.geometry['x'])
+        for row in range(len(rows)):
+            new = rows[row]
+            old = old_rows[row]
+            if not repaint and (new is old or new == old):
+                continue
+            for start, end in self.diff_row(old, new, repaint):
+                if delay:
+                    self._display_typing(row, start, new[start:end], delay)
+                    continue
+                if colorizer is None:
+                    chunks.append(ESC_MOVE % (row + 1, start + 1))
+                    chunks.append(new[start:end])
+                else:
+                    colored.append((row, start, new[start:end]))
+                if recorder is not None:
+                    recorder.add(row, start, new[start:end])
+            if line_delay:
+                self.display_sleep(line_delay)
+        self.screen_rows = list(rows)
+        if colored:
+            chunks.extend(self.encode_colors(colored))
+        if chunks:
+            self.display_write("".join(chunks))
+        self.display_flush(end_frame)
+
+    def display_sprites(self, sprites, end_frame=True):
+        """
+        Draws the `sprites` (a list of `compositor.Sprite`, the last one on
+        top) over an otherwise blank screen, with the `overlay` lines, if
+        any, on top of them all.
+
+        Only the areas the sprites moved from or to, since the previous
+        frame, are composed (see `compositor.Compositor`), and only the runs
+        of characters that changed within them are written, so the cost of
+        a frame depends on the area that moved, instead of the terminal size.
+
+        The cells on screen are kept by the compositor, instead of the back
+        buffer, so switching between this and `display_rows` clears the
+        terminal.
+        """
+        width = self.geometry['x']
+        height = self.geometry['y']
+        if self.compositor is None or self.compositor.width != width \
+                or self.compositor.height != height:
+            self.display_reset()
+            self.compositor = Compositor(width, height)
+            # the back buffer is not kept up to date from now on
+            self.screen_rows = None
+
+        if self.overlay:
+            size = max([len(line) for line in self.overlay])
+            if self.overlay_sprite is None:
+                self.overlay_sprite = Sprite()
+            self.overlay_sprite.lines = tuple([line.rjust(size)[:width]
+                                               for line in self.overlay])
+            self.overlay_sprite.x = max(0, width - size)
+            sprites = list(sprites) + [self.overlay_sprite]
+
+        chunks = []
+        colored = []
+        recorder = self.recorder
+        colorizer = self.colorizer
+        repaint = self.update_colors(width)
+        if repaint:
+            # everything on screen is written again, in the new colors
+            cells = self.compositor.cells
+            old_rows = ["".join(cells[row]) for row in range(height)]
+            self.compositor.compose(sprites)
+            changes = [(row, 0, old_rows[row], "".join(cells[row]))
+                       for row in range(height)]
+        else:
+            changes = self.compositor.compose(sprites)
+        for row, col, old, new in changes:
+            for start, end in self.diff_row(old, new, repaint):
+                if colorizer is None:
+                    chunks.append(ESC_MOVE % (row + 1, col + start + 1))
+                    chunks.append(new[start:end])
+                else:
+                    colored.append((row, col + start, new[start:end]))
+                if recorder is not None:
+                    recorder.add(row, col + start, new[start:end])
+        if colored:
+            chunks.extend(self.encode_colors(colored))
+        if chunks:
+            self.display_write("".join(chunks))
+        self.display_flush(end_frame)
+
+    def diff_row(self, old, new, repaint=False):
+        """
+        Returns the list of (start, end) column runs that differ between the
+        rows `old` and `new` (of same length), merging runs separated by less
+        than `RUN_GAP` unchanged columns. If `repaint` is True, the non-blank
+        characters of `new` are considered changed as well.
+        """
+        runs = []
+        start = last = -1
+        for i in xrange(len(new)):
+            if old[i] != new[i] or repaint and new[i] != ' ':
+                if start < 0:
+                    start = i
+                elif i - last > RUN_GAP:
+                    runs.append((start, last + 1))
+                    start = i
+                last = i
+        if start >= 0:
+            runs.append((start, last + 1))
+        return runs
+
+    def encode_colors(self, runs):
+        """
+        Returns the chunks of output for the `runs` (row, column and text),
+        colored by the `colorizer`. Runs do not overlap, so they are written
+        in the order of their colors (instead of their positions), and runs
+        of the same color share a single escape sequence.
+        """
+        colorizer = self.colorizer
+        columns = colorizer.columns
+
+        def first_color(run):
+            blanks = len(run[2]) - len(run[2].lstrip(' '))
+            if blanks == len(run[2]):
+                return (False, "")
+            color = columns[run[1] + blanks]
+            return (color is not colorizer.current, color)
+
+        chunks = []
+        for row, col, text in sorted(runs, key=first_color):
+            chunks.append(ESC_MOVE % (row + 1, col + 1))
+            chunks.append(colorizer.encode(col, text))
+        return chunks
+
+    def update_colors(self, width):
+        """
+        Prepares the `colorizer` (if any) for a screen with `width` columns,
+        and returns True if the colors changed since they were displayed (so
+        everything must be written again).
+        """
+        if self.colorizer is None:
+            return False
+        self.colorizer.set_width(width)
+        if self.colorizer.generation == self.color_generation:
+            return False
+        self.color_generation = self.colorizer.generation
+        return True
+
+    def _display_typing(self, row, col, text, delay):
+        """
+        Writes the `text` at `row` and `col` (0-based), pausing after each
+        non-blank character.
+        """
+        pending = ESC_MOVE % (row + 1, col + 1)
+        start = 0
+        colorizer = self.colorizer
+        for i in xrange(len(text)):
+            if text[i] != ' ':
+                if colorizer is not None:
+                    self.display_write(pending + text[start:i]
+                                       + colorizer.encode(col + i, text[i]))
+                else:
+                    self.display_write(pending + text[start:i + 1])
+                if self.recorder is not None:
+                    self.recorder.add(row, col + start, text[start:i + 1])
+                self.display_flush(False)
+                pending = ""
+                start = i + 1
+                self.display_sleep(delay)
+        if start < len(text):
+            self.display_write(pending + text[start:])
+            if self.recorder is not None:
+                self.recorder.add(row, col + start, text[start:])
+
+    def display_recording(self, events, duration, width, height):
+        """
+        Plays recorded `events` (see `recording.load_recording`) over and
+        over, each loop taking `duration` seconds. Events are converted into
+        terminal output only once, so playing them is just a matter of
+        waiting and writing.
+
+        The recording (of a screen of `width` x `height`) is centered in the
+        terminal, and clipped to it if the terminal is smaller, as the runs
+        are positioned absolutely (moving the cursor past the edges would
+        draw them on the last row and column instead).
+        """
+        left = (self.geometry['x'] - width) // 2
+        top = (self.geometry['y'] - height) // 2
+        frames = []
+        for when, clear, runs in events:
+            data = [clear and ESC_CLEAR or ""]
+            for row, col, text in runs:
+                row += top
+                col += left
+                if not 0 <= row < self.geometry['y']:
+                    continue
+                if col < 0:
+                    text = text[-col:]
+                    col = 0
+                text = text[:self.geometry['x'] - col]
+                if text:
+                    data.append(ESC_MOVE % (row + 1, col + 1))
+                    data.append(text)
+            frames.append((when, "".join(data).encode('utf-8')))
+        if not frames or not events[0][1]:
+            # make sure every loop starts on a clean screen
+            frames.insert(0, (0, ESC_CLEAR))
+        duration = max(duration, frames[-1][0], 0.001)
+
+        while True:
+            started = time.time()
+            for when, data in frames:
+                wait = started + when - time.time()
+                if wait > 0:
+                    self.display_sleep(wait)
+                self.display_write(data)
+                self.display_flush()
+            wait = started + duration - time.time()
+            if wait > 0:
+                self.display_sleep(wait)
+
+    def display_sleep(self, seconds):
+        """
+        Pauses the drawing for `seconds` (for typing effects).
+        """
+        time.sleep(seconds)
+
+    def display_write(self, data):
+        """
+        Adds `data` to the frame being written to the terminal.
+        """
+        if self.output is None:
+            self.output = FrameSink()
+        self.output.write(data)
+
+    def display_flush(self, end_frame=True):
+        """
+        Writes the frame to the terminal (see `sink.FrameSink.flush`).
+        """
+        if self.output is None:
+            self.output = FrameSink()
+        self.output.flush(end_frame)
+        if self.recorder is not None:
+            self.recorder.flush()
+        if end_frame and self.colorizer is not None:
+            # the rainbow moves on for the next frame
+            self.colorizer.advance()
@@ -38,13 +38,12 @@ The screen class available here is:
 #
 # Python built-in modules
 #
-import time
+import random
 
 #
 # Termsaver modules
 #
 from termsaverlib.screen.base import ScreenBase
-from termsaverlib.screen.helper.typing import TypingHelperBase
 from termsaverlib import constants, exception
 from termsaverlib.i18n import _, set_app
 
@@ -59,8 +58,7 @@ from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
 set_app("termsaver-figlet")
 
 
-class FigletStatScreen(FigletScreenBase,
-                       TypingHelperBase):
+class FigletStatScreen(FigletScreenBase):
     """
     Simple screensaver that displays a text in random position on screen.
 
@@ -107,12 +105,19 @@ class FigletStatScreen(FigletScreenBase,
             "figlet-stat",
             _("displays word in random places on screen"),
             {'opts': 'hw:d:f:', 'long_opts': ['help', 'word=', 'delay=',
-                                            'help-fonts', 'font=']},
+                                            'help-fonts', 'preview', 'font=',
+                                            'stats', 'stats-file=',
+                                            'export=', 'frames=',
+                                            'geometry=', 'format=',
+                                            'replay=', 'word-file=',
+                                            'queue-depth=', 'auto-font',
+                                            'color=', 'gradient=', 'rainbow',
+                                            'shared-cache']},
         )
         self.word = constants.App.TITLE
         self.delay = 0.005
         self.line_delay = 0
-        self.cleanup_per_cycle = True
+        self.cleanup_per_cycle = False
         self.freeze_delay = self.FREEZE_WORD_DELAY
 
     def _run_cycle(self):
@@ -122,19 +127,37 @@ class FigletStatScreen(FigletScreenBase,
         The actions taken here, for each cycle, are as follows:
 
             * randomize text position vertically and horizontally
-            * print using `typing_print`
+            * draw it with `display_frame` in typing style (only the
+              previous text is erased, instead of clearing the screen)
+            * move to the next word, if there is more than one
         """
-        # calculate random position based on screen size
-        self.get_terminal_size()
+        # read the screen size again, only if it was resized
+        self.update_geometry()
+        if self.stats is not None:
+            self.stats.lap('geometry')
 
+        if self.auto_font:
+            self.fit_font(self.word)
         self.build_figlet_text(self.word)
-
-        txt = self.randomize_text_vertically(
-            self.randomize_text_horizontally(self.figlet_text))
-
-        self.typing_print(txt)
-
-        time.sleep(self.freeze_delay)
+        self.prerender_words()
+        if self.stats is not None:
+            self.stats.lap('render')
+
+        self.position['x'] = random.randint(0,
+            max(0, self.geometry['x'] - self.figlet_geometry['x']))
+        self.position['y'] = random.randint(0,
+            max(0, self.geometry['y'] - self.figlet_geometry['y']))
+
+        started = self.get_time()
+        self.display_frame(self.figlet_lines, self.position['x'],
+            self.position['y'], self.delay, self.line_delay)
+        if self.frame_clock is not None and (self.delay or self.line_delay):
+            # the word is frozen only after it is completely typed
+            self.frame_clock.hold(self.get_time() - started)
+
+        # the next word (if any) is displayed in the next cycle
+        self.next_word()
+        self.wait_frame(self.freeze_delay)
 
     def _usage_options_example(self):
         """
@@ -152,15 +175,11 @@ Options:
 
  -w, --word   Sets the word to be displayed
               default is the name of this application (if you need to use
-              spaces, don't forget to place the word with quotes)
+              spaces, don't forget to place the word with quotes). Use
+              it more than once to display several words in turns
  -d, --delay  Sets how long the word will be displayed before
               randomized again. Default is %(default_delay)s second(s)
- -f, --font   the figlet font to be used, default is the figlet default
-              (see `figlet -I3` command for details or figler man pages)
- -h, --help   Displays this help message
-     --help-fonts
-              Displays the available fonts that can be used with
-              the -f/--font option.
+%(common_options)s
 Example:
 
     $ %(app_name)s %(screen)s
@@ -172,11 +191,16 @@ Example:
     This will trigger the screensaver to display the word FooBar
     in random locations of the screen, using the "lean" figlet font with
     a delay of 5 seconds.
+
+    $ %(app_name)s %(screen)s -w Coffee -w Break --word-file=words.txt
+    This will trigger the screensaver to display the words Coffee, Break
+    and the ones in words.txt, in turns, in random locations of the screen.
 """) % {
         'app_name': constants.App.NAME,
         'app_title': constants.App.TITLE,
         'screen': self.name,
         'default_delay': self.FREEZE_WORD_DELAY,
+        'common_options': self._usage_common_options(_("a single word")),
        }
 
     def _parse_args(self, prepared_args):
@@ -193,13 +217,7 @@ Example:
         configured there will be accepted here.
         """
         for o, a in prepared_args[0]:  # optlist, args
-            if o in ("-h", "--help"):
-                self.usage()
-                self.screen_exit()
-            elif o == "--help-fonts":
-                self.help_fonts()
-                self.screen_exit()
-            elif o in ("-d", "--delay"):
+            if o in ("-d", "--delay"):
                 try:
                     # make sure argument is a valid value (float)
                     self.freeze_delay = float(a)
@@ -209,13 +227,9 @@ Example:
                 # make sure argument is a valid value
                 if a in (None, ''):
                     raise exception.InvalidOptionException("word")
-                self.word = a
-            elif o in ("-f", "--font"):
-                # make sure argument is a valid value (exists)
-                self.font = str(a)
-                if self.font not in self.get_fonts():
-                    raise exception.InvalidOptionException("font",
-                        _("Font does not exist"))
-            else:
+                self.add_words([a])
+            elif not self._parse_common_option(o, a, prepared_args[1]):
                 # this should never happen!
                 raise Exception(_("Unhandled option. See --help for details."))
+
+        self._apply_common_options()
@@ -0,0 +1,434 @@
+###############################################################################
+#
+# file:     ticker.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Simple screensaver that scrolls a text (such as the lines piped into it) from
+right to left, as a news ticker.
+
+See additional information in the class itself.
+
+The screen class available here is:
+
+    * `FigletTickerScreen`
+"""
+
+#
+# Python built-in modules
+#
+import os
+import sys
+import select
+from collections import deque
+
+#
+# Termsaver modules
+#
+from termsaverlib.screen.base import ScreenBase
+from termsaverlib import constants, exception
+from termsaverlib.i18n import _, set_app
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet.screen.base import FigletScreenBase
+
+#
+# Override termsavr default i18n (reuired for plugins with own i18n files)
+#
+set_app("termsaver-figlet")
+
+
+class FigletTickerScreen(FigletScreenBase):
+    """
+    Simple screensaver that scrolls a text from right to left, as a news
+    ticker. The text is read from the standard input, when it is not a
+    terminal (eg. `tail -f events.log | termsaver figlet-ticker`), or the
+    word informed is displayed over and over.
+
+    The input is read without blocking the frames, and only the characters
+    that arrive are laid out (see `figfont.StreamComposer`), into a buffer of
+    figlet columns (`ring`) that feeds the screen, one column per frame.
+    Reading stops while the buffer holds more than `PENDING_SCREENS` screens
+    of columns, so memory is bounded, however long the input is. Fonts
+    handled by the figlet binary are rendered a whole line at a time
+    instead (see `append_text`).
+
+    This screen offers the additional options to customize its behavior:
+
+        * `delay`: the time between frames (each moves the text by one
+          column)
+
+        * `word`: the text displayed when there is no input
+    """
+
+    word = ''
+    """
+    Holds the word to be displayed on screen, when there is no input.
+    """
+
+    SEPARATOR = u"   "
+    """
+    The text placed between lines of input (and repetitions of the word).
+    """
+
+    PENDING_SCREENS = 4
+    """
+    The maximum number of screens (widths) of columns waiting to be
+    displayed, before the input stops being read.
+    """
+
+    READ_SIZE = 256
+    """
+    The maximum number of bytes read from the input at once.
+    """
+
+    LINE_LIMIT = 256
+    """
+    The maximum number of characters of a line rendered at once by the
+    figlet binary (longer lines are rendered in parts, cut at spaces).
+    """
+
+    LINE_WIDTH = 65535
+    """
+    The width informed to the figlet binary, so lines are never wrapped.
+    """
+
+    input_fd = None
+    """
+    Holds the file descriptor of the input, or None if it is not read (a
+    terminal, or finished).
+    """
+
+    repeat_word = False
+    """
+    Defines if the word is displayed over and over (when there is no input
+    to read).
+    """
+
+    ring = None
+    """
+    Holds the columns waiting to be displayed, as one `deque` of characters
+    per row.
+    """
+
+    view = None
+    """
+    Holds the columns displayed on screen, as one `deque` (as long as the
+    terminal width) of characters per row.
+    """
+
+    stream_composer = None
+    """
+    Holds the `figfont.StreamComposer` laying out the characters of the
+    input, or None if the font is handled by the figlet binary.
+    """
+
+    undecoded = ""
+    """
+    Holds the bytes of a character split between reads of the input, not
+    decoded yet (see `decode_input`).
+    """
+
+    pending = u""
+    """
+    Holds the characters read (or the repetition of the word) not laid out
+    yet.
+    """
+
+    line = u""
+    """
+    Holds the characters of the current line, not rendered yet by the
+    figlet binary (see `append_text`).
+    """
+
+    frame_steps = 1
+    """
+    Holds the number of columns the text moves in the next frame (more than
+    1 when frames were skipped to keep up with `delay`).
+    """
+
+    def __init__(self):
+        """
+        Creates a new instance of this class.
+        """
+        ScreenBase.__init__(self,
+            "figlet-ticker",
+            _("scrolls the piped text (or a word) as a news ticker"),
+            {'opts': 'hw:d:f:', 'long_opts': ['help', 'word=', 'delay=',
+                                            'help-fonts', 'preview', 'font=',
+                                            'stats', 'stats-file=',
+                                            'color=', 'gradient=', 'rainbow']},
+        )
+        self.word = constants.App.TITLE
+        self.delay = 0.03
+        self.cleanup_per_cycle = False
+
+    def _run_cycle(self):
+        """
+        Executes a cycle of this screen.
+
+        The actions taken here, for each cycle, are as follows:
+
+            * read (without waiting) any input available, laying out the
+              new characters into `ring`
+            * move the columns on screen by one (or more, if frames were
+              skipped), taking the next ones from `ring`
+            * draw them on the vertical center of the screen
+        """
+        # read the screen size again, only if it was resized
+        if self.update_geometry() or self.ring is None:
+            self.reset_ticker()
+        if self.stats is not None:
+            self.stats.lap('geometry')
+
+        self.read_input()
+        if self.stats is not None:
+            self.stats.lap('render')
+
+        ring = self.ring
+        view = self.view
+        for __ in xrange(self.frame_steps):
+            for row in xrange(len(ring)):
+                view[row].popleft()
+                if ring[row]:
+                    view[row].append(ring[row].popleft())
+                else:
+                    view[row].append(u' ')
+
+        lines = [u"".join(row) for row in view]
+        self.display_frame(lines, 0,
+                           max(0, (self.geometry['y'] - len(lines)) // 2))
+        self.frame_steps = self.wait_frame(self.delay)
+
+    def reset_ticker(self):
+        """
+        Prepares the input, the layout and the buffers of columns (keeping
+        what is on screen, if the terminal was just resized).
+        """
+        if self.ring is None:
+            self.repeat_word = sys.stdin.isatty()
+            if not self.repeat_word:
+                self.input_fd = sys.stdin.fileno()
+            self.undecoded = ""
+            self.pending = u""
+            self.line = u""
+            self.stream_composer = None
+            font = self.load_font()
+            if font is not None:
+                from termsaverlib.plugins.figlet import figfont
+                self.stream_composer = figfont.StreamComposer(font)
+                height = font.height
+            else:
+                # figlet binary renders whole lines (see `append_text`)
+                height = len(self.render_line(
+                    self.word.decode('utf-8', 'replace')))
+            self.ring = [deque() for __ in range(height)]
+            self.view = [[] for __ in range(height)]
+
+        width = self.geometry['x']
+        self.view = [deque((u" " * width + u"".join(row))[-width:])
+                     for row in self.view]
+
+    def read_input(self):
+        """
+        Reads the input available (if any), laying out its characters, while
+        there are less than `PENDING_SCREENS` screens of columns waiting.
+        Without input, the word is used.
+        """
+        limit = self.PENDING_SCREENS * self.geometry['x']
+        while len(self.ring[0]) < limit:
+            if not self.pending:
+                if self.input_fd is None:
+                    if not self.repeat_word:
+                        break
+                    self.pending = self.word.decode('utf-8', 'replace') \
+                        + self.SEPARATOR
+                    continue
+                if not select.select([self.input_fd], [], [], 0)[0]:
+                    break
+                data = os.read(self.input_fd, self.READ_SIZE)
+                if not data:
+                    # end of input, just finish scrolling it
+                    self.input_fd = None
+                    data = "\n"
+                self.pending = self.decode_input(data)
+            self.append_text(self.pending[:16])
+            self.pending = self.pending[16:]
+
+        if not self.ring[0] and not self.pending:
+            # input is idle, so nothing is left behind
+            if self.stream_composer is not None:
+                self.append_columns(self.stream_composer.flush())
+            elif self.line:
+                self.append_columns(self.render_line(self.line))
+                self.line = u""
+
+    def decode_input(self, data):
+        """
+        Decodes the `data` read from the input (utf-8), keeping the bytes of
+        a character it ends in the middle of in `undecoded`, to be decoded
+        with the next read (`codecs` incremental decoders are not available
+        on Python 2.4).
+        """
+        data = self.undecoded + data
+        end = len(data)
+        for i in range(1, min(4, len(data)) + 1):
+            c = ord(data[-i])
+            if c < 0x80:
+                break
+            if c >= 0xc0:
+                # the lead byte of the last character, and its length
+                if i < (c >= 0xf0 and 4 or c >= 0xe0 and 3 or 2):
+                    end = len(data) - i
+                break
+        self.undecoded = data[end:]
+        return data[:end].decode('utf-8', 'replace')
+
+    def append_text(self, text):
+        """
+        Lays out `text` at the end of `ring`. Line breaks are replaced by the
+        `SEPARATOR`.
+
+        The figlet binary renders whole lines instead, so nothing is lost
+        between the characters of a line (such as smushing): characters are
+        kept in `line` until a `SEPARATOR` arrives, or the line gets longer
+        than `LINE_LIMIT`.
+        """
+        text = text.replace(u"\r", u"").replace(u"\n", self.SEPARATOR)
+        if self.stream_composer is not None:
+            self.append_columns(self.stream_composer.add(text))
+            return
+
+        self.line += text
+        cut = self.line.rfind(self.SEPARATOR)
+        if cut >= 0:
+            cut += len(self.SEPARATOR)
+        elif len(self.line) > self.LINE_LIMIT:
+            cut = self.line.rfind(u" ") + 1 or len(self.line)
+        else:
+            return
+        text, self.line = self.line[:cut], self.line[cut:]
+        self.append_columns(self.render_line(text))
+
+    def render_line(self, text):
+        """
+        Returns the figlet lines of `text` rendered by the figlet binary in
+        a single line (`LINE_WIDTH`), however long it is. These are kept in
+        the `render_cache` (so the word is rendered only once).
+        """
+        text = text.encode('utf-8')
+        key = (self.font, self.LINE_WIDTH, text)
+        cached = self.render_cache.get(key)
+        if cached is None:
+            output, how = self.render_text(self.font, self.LINE_WIDTH, text)
+            if how == 'spawns' and self.stats is not None:
+                self.stats.count('spawns')
+            cached = self.store_figlet_text(key, output)
+        return cached[1]
+
+    def append_columns(self, columns):
+        """
+        Adds the `columns` (one string per row) at the end of `ring`, adding
+        rows to it if there are more columns (the figlet binary strips the
+        blank rows at the bottom of its output).
+        """
+        if not columns:
+            return
+        while len(self.ring) < len(columns):
+            self.ring.append(deque(u" " * len(self.ring[0])))
+            self.view.append(deque(u" " * self.geometry['x']))
+        width = max([len(c) for c in columns])
+        for row in range(len(self.ring)):
+            if row < len(columns):
+                self.ring[row].extend(columns[row].ljust(width))
+            else:
+                self.ring[row].extend(u" " * width)
+
+    def _usage_options_example(self):
+        """
+        Describe here the options and examples of this screen.
+
+        The method `_parse_args` will be handling the parsing of the options
+        documented here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        print _("""
+Options:
+
+ -w, --word   Sets the word to be displayed, if nothing is piped into
+              the screen (default is the name of this application)
+ -d, --delay  Sets the time between each column moved, default is
+              0.03 of a second
+%(common_options)s
+Example:
+
+    $ %(app_name)s %(screen)s
+    This will trigger the screensaver to scroll the default word
+    %(app_title)s through the screen
+
+    $ tail -f events.log | %(app_name)s %(screen)s -f lean
+    This will trigger the screensaver to scroll the lines written
+    into events.log, as they arrive, using the "lean" figlet font.
+""") % {
+        'app_name': constants.App.NAME,
+        'app_title': constants.App.TITLE,
+        'screen': self.name,
+        'common_options': self._usage_common_options(),
+       }
+
+    def _parse_args(self, prepared_args):
+        """
+        Handles the special command-line arguments available for this screen.
+        Although this is a base screen, having these options prepared here
+        can save coding for screens that will not change the default options.
+
+        See `_usage_options_example` method for documentation on each of the
+        options being parsed here.
+
+        Additionally, this is dependent on the values exposed in `cli_opts`,
+        passed to this class during its instantiation. Only values properly
+        configured there will be accepted here.
+        """
+        for o, a in prepared_args[0]:  # optlist, args
+            if o in ("-d", "--delay"):
+                try:
+                    # make sure argument is a valid value (float)
+                    self.delay = float(a)
+                except:
+                    raise exception.InvalidOptionException("delay")
+            elif o in ("-w", "--word"):
+                # make sure argument is a valid value
+                if a in (None, ''):
+                    raise exception.InvalidOptionException("word")
+                self.word = a
+            elif not self._parse_common_option(o, a, prepared_args[1]):
+                # this should never happen!
+                raise Exception(_("Unhandled option. See --help for details."))
+
+        self._apply_common_options()
@@ -0,0 +1,373 @@
+###############################################################################
+#
+# file:     sharedcache.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+A render cache shared by all termsaver-figlet processes of a user, so screens
+running at once (such as in several terminal panes) render each text only
+once.
+
+The classes and functions available here are:
+
+    * `SharedRenderCache`: figlet outputs kept in a memory-mapped file, read
+      without locks
+
+    * `get_filename`: the name of the file for a given cache size
+"""
+
+#
+# Python built-in modules
+#
+import os
+import mmap
+import zlib
+import fcntl
+import struct
+import threading
+
+MAGIC = 'TSFR'
+"""
+The first bytes of shared cache files.
+"""
+
+VERSION = 1
+"""
+The version of the layout of shared cache files.
+"""
+
+FILE_HEADER_FORMAT = '<4sIIII'
+"""
+The header of shared cache files: magic, version, number of slots, size of
+each slot, and a counter of entries stored (the clock of their stamps).
+"""
+
+FILE_HEADER_SIZE = struct.calcsize(FILE_HEADER_FORMAT)
+"""
+The size (in bytes) of the header of shared cache files.
+"""
+
+SLOT_HEADER_FORMAT = '<IIII'
+"""
+The header of each slot: sequence (odd while being written), stamp (when it
+was stored), hash of the key, and length of the data.
+"""
+
+SLOT_HEADER_SIZE = struct.calcsize(SLOT_HEADER_FORMAT)
+"""
+The size (in bytes) of the header of each slot.
+"""
+
+SLOT_SIZE = 8192
+"""
+The size (in bytes) of each slot, including its header. Entries larger than
+this are not shared.
+"""
+
+PROBES = 4
+"""
+The number of slots (starting at the one the key hashes to) where each key
+can be stored. When all are taken, the oldest entry among them is replaced.
+"""
+
+RETRIES = 8
+"""
+The number of times a slot is read again while it is being written, before
+the lookup is given up.
+"""
+
+
+def get_slots(size):
+    """
+    Returns the number of slots of a shared cache file of `size` bytes.
+    """
+    return max(PROBES, size // SLOT_SIZE)
+
+
+def get_filename(size):
+    """
+    Returns the name of the shared cache file of `size` bytes.
+    """
+    return 'render-%d.v%d' % (get_slots(size), VERSION)
+
+
+class SharedRenderCache(object):
+    """
+    Keeps figlet outputs (by font, width and text) in a file mapped into the
+    memory of every process using it, so a text rendered by one of them is
+    available to all the others. The file is laid out as a fixed number of
+    slots of `SLOT_SIZE` bytes, and each key can be stored in `PROBES`
+    slots, so nothing but the file size bounds the memory used.
+
+    Lookups take no locks on the file (several processes read at once):
+    each slot has a sequence number, which writers make odd while changing
+    the slot, and even again when done, so readers copy the slot, and only
+    take it if the sequence was even and did not change meanwhile (a
+    seqlock). Writers are serialized with `fcntl.flock` on the file (and a
+    lock between threads, which also guards the usage counters of this
+    process). This relies on the stores of writers being seen by other
+    processes in order, as on the platforms termsaver runs on.
+
+    The usage is accounted in the following properties:
+
+        * `hits`: the number of successful lookups
+
+        * `misses`: the number of lookups for entries not in the cache
+
+        * `stores`: the number of entries stored
+
+        * `evictions`: the number of entries replaced by others
+    """
+
+    path = None
+    """
+    The path of the shared cache file.
+    """
+
+    slots = 0
+    """
+    The number of slots of the file.
+    """
+
+    hits = 0
+    """
+    The number of successful lookups.
+    """
+
+    misses = 0
+    """
+    The number of lookups for entries not in the cache.
+    """
+
+    stores = 0
+    """
+    The number of entries stored.
+    """
+
+    evictions = 0
+    """
+    The number of entries replaced by others.
+    """
+
+    def __init__(self, path, size):
+        """
+        Opens the shared cache file `path`, holding up to `size` bytes,
+        creating it (or starting it over, if it is not valid, see `_create`)
+        if needed. Raises OSError or IOError if it can not be used.
+
+        Processes using different sizes must use different files (see
+        `get_filename`).
+        """
+        self.path = path
+        self.slots = get_slots(size)
+        self._lock = threading.Lock()
+        header = struct.pack(FILE_HEADER_FORMAT, MAGIC, VERSION, self.slots,
+                             SLOT_SIZE, 0)
+        length = FILE_HEADER_SIZE + self.slots * SLOT_SIZE
+        for __ in range(RETRIES):
+            fd = os.open(path, os.O_RDWR | os.O_CREAT, 0600)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                if os.fstat(fd).st_ino != os.stat(path).st_ino:
+                    # replaced by another process meanwhile, open it again
+                    os.close(fd)
+                    continue
+                if os.fstat(fd).st_size != length or \
+                        os.read(fd, 16) != header[:16]:
+                    fd = self._create(fd, header, length)
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                self.map = mmap.mmap(fd, length)
+            except:
+                os.close(fd)
+                raise
+            self.fd = fd
+            return
+        raise OSError("Could not open the shared cache file %s" % path)
+
+    def _create(self, fd, header, length):
+        """
+        Replaces the shared cache file (opened, but not valid, in `fd`) with
+        an empty one of `length` bytes, starting with `header`, returning its
+        descriptor. The new file is written aside and renamed over the old
+        one, which is never resized in place, as other processes may have
+        it mapped (accessing a mapping past the end of its file crashes).
+        """
+        import tempfile
+        new_fd, temp = tempfile.mkstemp(dir=os.path.dirname(self.path))
+        try:
+            os.ftruncate(new_fd, length)
+            os.write(new_fd, header)
+            os.rename(temp, self.path)
+        except:
+            os.close(new_fd)
+            os.unlink(temp)
+            raise
+        os.close(fd)
+        return new_fd
+
+    def close(self):
+        """
+        Unmaps and closes the shared cache file.
+        """
+        self.map.close()
+        os.close(self.fd)
+
+    def get(self, key):
+        """
+        Retrieves the figlet output of `key` (font, width and text), or None
+        if it is not in the cache.
+        """
+        name = repr(key)
+        hashed = zlib.crc32(name) & 0xffffffff
+        found = None
+        for offset in self._probe(hashed):
+            found = self._read(offset, name, hashed)
+            if found is not None:
+                break
+        self._lock.acquire()
+        try:
+            if found is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        finally:
+            self._lock.release()
+        return found
+
+    def put(self, key, output):
+        """
+        Stores the figlet `output` of `key` (font, width and text), replacing
+        the oldest entry of its slots, if they are all taken. Returns False
+        if it could not be stored (too large, or not a byte string).
+        """
+        if not isinstance(output, str):
+            return False
+        name = repr(key)
+        data = name + '\0' + output
+        if len(data) > SLOT_SIZE - SLOT_HEADER_SIZE:
+            return False
+        hashed = zlib.crc32(name) & 0xffffffff
+        mapped = self.map
+
+        self._lock.acquire()
+        try:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                # the same key, an empty slot, or the oldest one
+                chosen = None
+                for offset in self._probe(hashed):
+                    sequence, stamp, other, length = self._read_slot(offset)
+                    if other == hashed and length and \
+                            self._read(offset, name, hashed) is not None:
+                        chosen = (-1, offset)
+                        break
+                    if chosen is None or (length and stamp) < chosen[0]:
+                        chosen = ((length and stamp), offset)
+                offset = chosen[1]
+                sequence, stamp, other, length = self._read_slot(offset)
+                if chosen[0] > 0:
+                    self.evictions += 1
+
+                header = struct.unpack(FILE_HEADER_FORMAT,
+                                       mapped[:FILE_HEADER_SIZE])
+                clock = header[4] + 1
+                mapped[:FILE_HEADER_SIZE] = struct.pack(
+                    FILE_HEADER_FORMAT, *(header[:4] + (clock,)))
+
+                # odd sequence while the slot is being written
+                self._write_slot(offset, sequence | 1, 0, 0, 0)
+                start = offset + SLOT_HEADER_SIZE
+                mapped[start:start + len(data)] = data
+                self._write_slot(offset, sequence | 1, clock, hashed,
+                                 len(data))
+                self._write_slot(offset, (sequence | 1) + 1, clock, hashed,
+                                 len(data))
+                self.stores += 1
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+        finally:
+            self._lock.release()
+        return True
+
+    def stats(self):
+        """
+        Returns a dictionary with the usage counters of this cache.
+        """
+        total = self.hits + self.misses
+        return {
+            'slots': self.slots,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stores': self.stores,
+            'evictions': self.evictions,
+            'hit_rate': total and float(self.hits) / total or 0.0,
+        }
+
+    def _probe(self, hashed):
+        """
+        Returns the offsets of the slots where a key with hash `hashed` can
+        be stored.
+        """
+        first = hashed % self.slots
+        return [FILE_HEADER_SIZE + (first + i) % self.slots * SLOT_SIZE
+                for i in range(PROBES)]
+
+    def _read_slot(self, offset):
+        """
+        Returns the header of the slot at `offset` (sequence, stamp, hash and
+        length), unpacked from a copy (`struct.unpack_from` is not available
+        on Python 2.4).
+        """
+        return struct.unpack(SLOT_HEADER_FORMAT,
+                             self.map[offset:offset + SLOT_HEADER_SIZE])
+
+    def _write_slot(self, offset, *header):
+        """
+        Writes the `header` of the slot at `offset`.
+        """
+        self.map[offset:offset + SLOT_HEADER_SIZE] = \
+            struct.pack(SLOT_HEADER_FORMAT, *header)
+
+    def _read(self, offset, name, hashed):
+        """
+        Reads the slot at `offset`, returning its output if it holds the key
+        `name` (with hash `hashed`), or None otherwise.
+        """
+        mapped = self.map
+        for __ in xrange(RETRIES):
+            sequence, stamp, other, length = self._read_slot(offset)
+            if sequence & 1:
+                # being written right now
+                continue
+            if other != hashed or not length:
+                return None
+            start = offset + SLOT_HEADER_SIZE
+            data = mapped[start:start + length]
+            if self._read_slot(offset)[0] != sequence:
+                continue
+            stored, output = (data.split('\0', 1) + [None])[:2]
+            if stored != name or output is None:
+                return None
+            return output
+        return None
@@ -0,0 +1,225 @@
+###############################################################################
+#
+# file:     sink.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Output sinks used by termsaver-figlet screens to write their frames.
+
+The classes available here are:
+
+    * `FrameSink`: assembles the output of a frame in a list of strings,
+      and writes it with a single system call (accounting bytes and system
+      calls per frame)
+
+    * `AsciicastSink`: writes the frames as an asciicast (version 2)
+      recording, with the time of each frame
+"""
+
+#
+# Python built-in modules
+#
+import os
+import sys
+import time
+import errno
+import select
+
+try:
+    import json
+except ImportError:
+    json = None
+
+#
+# Termsaver modules
+#
+from termsaverlib import exception
+
+
+class FrameSink(object):
+    """
+    Collects everything written during a frame into a buffer, and writes it
+    all at once into a file descriptor when the frame is flushed, instead of
+    leaving it to `sys.stdout` (which may write, and flush, every line
+    separately).
+
+    The usage is accounted in the following properties:
+
+        * `frames`: the number of frames written
+
+        * `bytes`: the total number of bytes written
+
+        * `syscalls`: the total number of write system calls
+
+        * `frame_bytes` and `frame_syscalls`: the same, for the last frame
+    """
+
+    fd = None
+    """
+    The file descriptor where frames are written.
+    """
+
+    frames = 0
+    """
+    The number of frames written.
+    """
+
+    bytes = 0
+    """
+    The total number of bytes written.
+    """
+
+    syscalls = 0
+    """
+    The total number of write system calls.
+    """
+
+    frame_bytes = 0
+    """
+    The number of bytes written for the last frame.
+    """
+
+    frame_syscalls = 0
+    """
+    The number of write system calls for the last frame.
+    """
+
+    def __init__(self, fd=None):
+        """
+        Creates a new sink writing into file descriptor `fd` (defaults to the
+        standard output, which is flushed first, so nothing printed before is
+        written after the frames).
+        """
+        if fd is None:
+            sys.stdout.flush()
+            fd = sys.stdout.fileno()
+        self.fd = fd
+        self._buffer = []
+        self._bytes = 0
+        self._syscalls = 0
+
+    def write(self, data):
+        """
+        Adds `data` to the frame being assembled.
+        """
+        if isinstance(data, unicode):
+            data = data.encode('utf-8')
+        self._buffer.append(data)
+
+    def flush(self, end_frame=True):
+        """
+        Writes the assembled data. If `end_frame` is True (default), this also
+        finishes the frame (for accounting purposes); frames can be flushed
+        more than once when drawn progressively.
+        """
+        if self._buffer:
+            data = "".join(self._buffer)
+            del self._buffer[:]
+            if data:
+                self._write(data)
+        if end_frame:
+            self.frames += 1
+            self.frame_bytes = self._bytes
+            self.frame_syscalls = self._syscalls
+            self._bytes = self._syscalls = 0
+
+    def _write(self, data):
+        """
+        Writes all `data` into the file descriptor, retrying on partial
+        writes and interruptions.
+        """
+        done = 0
+        while done < len(data):
+            try:
+                if done:
+                    written = os.write(self.fd, buffer(data, done))
+                else:
+                    written = os.write(self.fd, data)
+            except OSError, e:
+                if e.errno == errno.EINTR:
+                    continue
+                if e.errno == errno.EAGAIN:
+                    try:
+                        select.select([], [self.fd], [])
+                    except select.error, e:
+                        if e.args[0] != errno.EINTR:
+                            raise
+                    continue
+                raise
+            self.syscalls += 1
+            self._syscalls += 1
+            self.bytes += written
+            self._bytes += written
+            done += written
+
+    def stats(self):
+        """
+        Returns a dictionary with the usage counters of this sink.
+        """
+        frames = max(1, self.frames)
+        return {
+            'frames': self.frames,
+            'bytes': self.bytes,
+            'syscalls': self.syscalls,
+            'bytes_per_frame': float(self.bytes) / frames,
+            'syscalls_per_frame': float(self.syscalls) / frames,
+            'last_frame_bytes': self.frame_bytes,
+            'last_frame_syscalls': self.frame_syscalls,
+        }
+
+
+class AsciicastSink(FrameSink):
+    """
+    Writes the frames into a file descriptor as an asciicast recording
+    (version 2, as used by asciinema): a JSON header line with the terminal
+    size, followed by one JSON line per output event, with the time it
+    happened (taken from the `clock` function), instead of the raw output.
+    """
+
+    def __init__(self, fd, width, height, clock=time.time):
+        """
+        Creates a new sink writing the recording into file descriptor `fd`,
+        for a terminal of `width` columns and `height` rows. The time of
+        each event is relative to the first call to `clock`.
+        """
+        if json is None:
+            raise exception.TermSaverException(
+                help="Asciicast recordings require Python 2.6 or newer.")
+        FrameSink.__init__(self, fd)
+        self.clock = clock
+        self.started = clock()
+        FrameSink._write(self, json.dumps({
+            'version': 2,
+            'width': width,
+            'height': height,
+            'env': {'TERM': os.environ.get('TERM', 'xterm')},
+        }) + "\n")
+
+    def _write(self, data):
+        """
+        Writes `data` as an output event of the recording.
+        """
+        FrameSink._write(self, json.dumps([
+            round(self.clock() - self.started, 6), "o",
+            str(data).decode('utf-8', 'replace')]) + "\n")
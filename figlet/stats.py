@@ -0,0 +1,169 @@
+###############################################################################
+#
+# file:     stats.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Runtime statistics of termsaver-figlet screens (only collected on demand, see
+`FigletScreenBase.enable_stats`).
+
+The classes available here are:
+
+    * `RuntimeStats`: accounts the time spent in each phase of the frames,
+      and a few event counters
+"""
+
+#
+# Python built-in modules
+#
+import timeit
+
+PHASES = ('geometry', 'render', 'compose', 'write', 'sleep')
+"""
+The phases of a frame, in the order they happen:
+
+    * geometry: reading the terminal size
+    * render: building the figlet text
+    * compose: building the frame and comparing it with the screen
+    * write: writing the frame to the terminal
+    * sleep: waiting for the next frame (including typing effects)
+"""
+
+
+class RuntimeStats(object):
+    """
+    Accounts the time spent in each phase of the frames (see `PHASES`), by
+    laps: every call to `lap` attributes the time passed since the previous
+    one to the given phase, so the screens only need to mark where each
+    phase ends.
+
+    The averages per frame are recalculated every `interval` seconds (in
+    `recent`), in addition to the totals since the beginning.
+    """
+
+    interval = 0.5
+    """
+    The time (in seconds) between recalculations of `recent`.
+    """
+
+    frames = 0
+    """
+    The number of frames accounted.
+    """
+
+    totals = None
+    """
+    The total time (in seconds) spent in each phase.
+    """
+
+    counters = None
+    """
+    The event counters (such as process spawns), by name.
+    """
+
+    recent = None
+    """
+    The average time (in seconds) per frame spent in each phase, and the
+    frame rate, during the last `interval`.
+    """
+
+    def __init__(self, interval=0.5):
+        """
+        Creates a new instance of this class, recalculating the recent
+        averages every `interval` seconds.
+        """
+        self.interval = interval
+        self.totals = dict([(p, 0.0) for p in PHASES])
+        self.counters = {'spawns': 0, 'reused': 0, 'remote': 0}
+        self.recent = dict([(p, 0.0) for p in PHASES])
+        self.recent['fps'] = 0.0
+        self._timer = timeit.default_timer
+        self._mark = self._started = self._recent_started = self._timer()
+        self._recent_totals = dict(self.totals)
+        self._recent_frames = 0
+
+    def lap(self, phase):
+        """
+        Attributes the time passed since the last lap to `phase`.
+        """
+        now = self._timer()
+        self.totals[phase] += now - self._mark
+        self._mark = now
+
+    def count(self, name, value=1):
+        """
+        Increments the counter `name` by `value`.
+        """
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def end_frame(self):
+        """
+        Accounts the end of a frame, returning True if the recent averages
+        were recalculated.
+        """
+        self.frames += 1
+        elapsed = self._mark - self._recent_started
+        if elapsed < self.interval:
+            return False
+        frames = self.frames - self._recent_frames
+        for phase in PHASES:
+            self.recent[phase] = (self.totals[phase]
+                - self._recent_totals[phase]) / frames
+        self.recent['fps'] = frames / elapsed
+        self._recent_totals = dict(self.totals)
+        self._recent_frames = self.frames
+        self._recent_started = self._mark
+        return True
+
+    def as_dict(self):
+        """
+        Returns a dictionary with the totals, averages per frame (in seconds)
+        and counters.
+        """
+        frames = max(1, self.frames)
+        elapsed = self._mark - self._started
+        result = dict(self.counters)
+        result.update({
+            'frames': self.frames,
+            'elapsed': elapsed,
+            'fps': elapsed > 0 and self.frames / elapsed or 0.0,
+            'totals': dict(self.totals),
+            'per_frame': dict([(p, self.totals[p] / frames)
+                               for p in PHASES]),
+        })
+        return result
+
+    def report(self, target_fps=0, hit_rate=0):
+        """
+        Returns the recent figures as a short list of lines, to be displayed
+        on screen, along with the `target_fps` and the render cache
+        `hit_rate`.
+        """
+        lines = ["fps %5.1f/%.1f" % (self.recent['fps'], target_fps)]
+        for phase in PHASES:
+            lines.append("%-9s%6.2fms" % (phase, self.recent[phase] * 1000))
+        lines.append("cache %10.1f%%" % (hit_rate * 100))
+        lines.append("spawns %10d" % self.counters['spawns'])
+        width = max([len(l) for l in lines])
+        return [" " + l.ljust(width) for l in lines]
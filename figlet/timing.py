@@ -0,0 +1,196 @@
+###############################################################################
+#
+# file:     timing.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Frame timing used by termsaver-figlet screens.
+
+The classes available here are:
+
+    * `FrameClock`: schedules frames at absolute deadlines, so the time
+      spent rendering is discounted from the waiting, and frames are skipped
+      when the screen falls behind
+
+    * `VirtualClock`: a clock that only moves when slept on (for rendering
+      frames as fast as possible, such as when exporting)
+"""
+
+#
+# Python built-in modules
+#
+import time
+
+
+class FrameClock(object):
+    """
+    Schedules frames on a fixed cadence (`period` seconds), based on absolute
+    deadlines instead of sleeping a fixed amount after each frame. This way
+    the time taken to render a frame is discounted from the waiting, and the
+    animation speed does not depend on how fast the host is.
+
+    When a frame finishes after the deadline of the next one, the frames in
+    between are skipped: `tick` returns how many frames the animation should
+    advance, so it keeps its speed even if not all frames are displayed.
+
+    Large gaps (such as the system being suspended, or the clock being
+    changed) are not compensated: the schedule just starts over.
+    """
+
+    period = 0
+    """
+    The time (in seconds) between frames.
+    """
+
+    max_skip = 0
+    """
+    The maximum number of frames skipped at once, beyond which the schedule
+    starts over.
+    """
+
+    frames = 0
+    """
+    The number of frames displayed (ticks).
+    """
+
+    skipped = 0
+    """
+    The number of frames skipped to keep up with the schedule.
+    """
+
+    slept = 0.0
+    """
+    The total time (in seconds) spent waiting for deadlines.
+    """
+
+    def __init__(self, period, max_skip=100, sleep=time.sleep, now=time.time):
+        """
+        Creates a new clock for frames every `period` seconds, skipping up to
+        `max_skip` frames at once. The `sleep` and `now` functions can be
+        replaced to wait for deadlines differently (see `VirtualClock`).
+        """
+        self.period = period
+        self.max_skip = max_skip
+        self.sleep = sleep
+        self.now = now
+        self.reset()
+
+    def reset(self):
+        """
+        Starts the schedule over (and the statistics), from now on.
+        """
+        self.started = self.now()
+        self.deadline = self.started + self.period
+        self.frames = 0
+        self.skipped = 0
+        self.slept = 0.0
+
+    def align(self, offset=0):
+        """
+        Moves the next deadline to the next multiple of `period` (in the time
+        of the clock), plus `offset` seconds, so frames happen at round times
+        (such as every whole second).
+        """
+        if self.period > 0:
+            self.deadline = (int(self.now() / self.period) + 1) \
+                * self.period + offset
+
+    def hold(self, seconds):
+        """
+        Postpones the next deadline by `seconds`, for time intentionally
+        spent by the screen while drawing (such as typing effects), which
+        should not be discounted from the waiting.
+        """
+        self.deadline += seconds
+        self.started += seconds
+
+    def tick(self):
+        """
+        Waits until the deadline of the next frame, and returns the number
+        of frames the animation should advance (1, plus any skipped frames).
+        """
+        self.frames += 1
+        steps = 1
+        now = self.now()
+        if self.period <= 0:
+            # no waiting at all, as fast as possible
+            return steps
+        if now > self.deadline + self.period:
+            late = int((now - self.deadline) / self.period)
+            if late > self.max_skip:
+                # too far behind (or clock changed), start over
+                self.deadline = now
+            else:
+                steps += late
+                self.skipped += late
+                self.deadline += late * self.period
+        elif now < self.deadline - 2 * self.period:
+            # clock went backwards
+            self.deadline = now + self.period
+
+        wait = self.deadline - now
+        if wait > 0:
+            self.sleep(wait)
+            self.slept += wait
+        self.deadline += self.period
+        return steps
+
+    def stats(self):
+        """
+        Returns a dictionary with the achieved and target frame rates, and
+        the counters of this clock.
+        """
+        elapsed = self.now() - self.started
+        return {
+            'target_fps': self.period and 1.0 / self.period or 0.0,
+            'fps': elapsed > 0 and self.frames / elapsed or 0.0,
+            'frames': self.frames,
+            'skipped': self.skipped,
+            'slept': self.slept,
+        }
+
+
+class VirtualClock(object):
+    """
+    A clock that starts at zero, and only moves forward when slept on, so
+    anything scheduled with it runs as fast as possible, while still keeping
+    track of the time it would have taken.
+    """
+
+    current = 0.0
+    """
+    The current time of this clock (in seconds).
+    """
+
+    def time(self):
+        """
+        Returns the current time of this clock.
+        """
+        return self.current
+
+    def sleep(self, seconds):
+        """
+        Moves this clock forward by `seconds`, without waiting.
+        """
+        self.current += max(0, seconds)
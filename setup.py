@@ -76,6 +76,7 @@ setup(name='termsaver-figlet',
             'figlet',
             'figlet.screen',
             'figlet.screen.base',
+            'figlet.screen.helper',
       ],
       license='Apache License v2',
       data_files=data_files,
@@ -0,0 +1,174 @@
+###############################################################################
+#
+# file:     test_compositor.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Tests of the composition of sprites (see `compositor`): frame by frame,
+with sprites moving (partially or completely off screen), changing,
+overlapping, reordered, added and removed at random, what
+`compositor.Compositor.compose` keeps (and the changes it returns) must
+match the whole screen composed naively.
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python -m unittest discover -s tests
+"""
+
+#
+# Python built-in modules
+#
+import random
+import unittest
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import compositor
+
+SCREENS = [(1, 1), (7, 3), (40, 12), (80, 24)]
+"""
+The screen sizes (columns and rows) tested.
+"""
+
+FRAMES = 300
+"""
+The number of frames composed for each screen size.
+"""
+
+SEED = 2012
+"""
+The seed of the random changes, so failures can be reproduced.
+"""
+
+
+def naive_compose(sprites, width, height):
+    """
+    Returns the screen of `width` and `height` (one string per row) with
+    the `sprites` drawn over a blank background, in order, character by
+    character.
+    """
+    screen = [[" "] * width for __ in range(height)]
+    for sprite in sprites:
+        for i, line in enumerate(sprite.lines):
+            for j, char in enumerate(line):
+                row, col = sprite.y + i, sprite.x + j
+                if 0 <= row < height and 0 <= col < width:
+                    screen[row][col] = char
+    return ["".join(row) for row in screen]
+
+
+class CompositorTestCase(unittest.TestCase):
+    """
+    Compares the compositor with `naive_compose`, over random frames.
+    """
+
+    def setUp(self):
+        """
+        Seeds the random changes.
+        """
+        self.random = random.Random(SEED)
+
+    def random_lines(self):
+        """
+        Returns random lines for a sprite (possibly none, or blank).
+        """
+        rows = self.random.randint(0, 5)
+        cols = self.random.randint(1, 12)
+        chars = self.random.choice([" ", "#", "ab ", "xyz*"])
+        return tuple(["".join([self.random.choice(chars)
+                               for __ in range(cols)])
+                      for __ in range(rows)])
+
+    def random_sprite(self, width, height):
+        """
+        Returns a sprite at a random position, around the screen.
+        """
+        return compositor.Sprite(self.random_lines(),
+                                 self.random.randint(-15, width + 2),
+                                 self.random.randint(-6, height + 2))
+
+    def change(self, sprites, width, height):
+        """
+        Changes the `sprites` (in place) at random, the way screens do.
+        """
+        action = self.random.random()
+        if action < 0.1 and len(sprites) < 8:
+            sprites.insert(self.random.randint(0, len(sprites)),
+                           self.random_sprite(width, height))
+        elif action < 0.15 and sprites:
+            del sprites[self.random.randrange(len(sprites))]
+        elif action < 0.25:
+            self.random.shuffle(sprites)
+        elif action < 0.3:
+            # nothing changed at all
+            pass
+        for sprite in sprites:
+            action = self.random.random()
+            if action < 0.5:
+                sprite.x += self.random.randint(-3, 3)
+                sprite.y += self.random.randint(-1, 1)
+            elif action < 0.6:
+                sprite.lines = self.random_lines()
+            elif action < 0.7:
+                # the same lines, but not the same object
+                sprite.lines = tuple(list(sprite.lines))
+            elif action < 0.75:
+                # jump far away, or back
+                sprite.x = self.random.randint(-40, width + 40)
+                sprite.y = self.random.randint(-20, height + 20)
+
+    def test_compose(self):
+        """
+        After every frame, the cells kept and the changes returned match the
+        screen composed naively.
+        """
+        for width, height in SCREENS:
+            comp = compositor.Compositor(width, height)
+            screen = [" " * width] * height
+            sprites = [self.random_sprite(width, height) for __ in range(3)]
+            for frame in range(FRAMES):
+                self.change(sprites, width, height)
+                changes = comp.compose(sprites)
+                expected = naive_compose(sprites, width, height)
+                for row, col, old, new in changes:
+                    self.assertEqual(len(old), len(new))
+                    self.assertNotEqual(old, new)
+                    line = screen[row]
+                    self.assertEqual(line[col:col + len(old)], old)
+                    screen[row] = line[:col] + new + line[col + len(new):]
+                self.assertEqual(screen, expected,
+                                 "%dx%d, frame %d" % (width, height, frame))
+                self.assertEqual(["".join(row) for row in comp.cells],
+                                 expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
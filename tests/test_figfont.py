@@ -0,0 +1,140 @@
+###############################################################################
+#
+# file:     test_figfont.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Tests of the incremental composition of lines (see `figfont.LineComposer`):
+the times displayed by a clock, one after the other, composed with the
+fonts in `FONTS_DIR`, must come out exactly as rendered from scratch (see
+`figfont.FigletRenderer`).
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python -m unittest discover -s tests
+"""
+
+#
+# Python built-in modules
+#
+import os
+import time
+import unittest
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import figfont, fontcache
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'fonts')
+"""
+The directory of the fonts tested.
+"""
+
+FONTS = ['standard.flf', 'small.flf', 'ubox.tlf']
+"""
+The fonts tested: two FIGfonts, and a TOIlet font (encoded as utf-8).
+"""
+
+TIME_FORMATS = ['%H:%M:%S', '%H:%M', '%I:%M %p', '%a %d %b %H:%M:%S']
+"""
+The formats of the times composed (see `time.strftime`), the last one too
+long for the narrower widths.
+"""
+
+WIDTHS = [20, 80, 200]
+"""
+The terminal widths (in columns) the times are composed for.
+"""
+
+START = 1349049590
+"""
+The time (seconds since the epoch) of the first text composed, a few
+seconds before minutes, hours and days change.
+"""
+
+STEPS = [1] * 15 + [59, 3541, 86399, 1, -86400, 7, 0]
+"""
+The seconds between the times composed: the clock ticking, jumping ahead,
+going back, and not changing at all.
+"""
+
+
+class LineComposerTestCase(unittest.TestCase):
+    """
+    Compares the lines composed incrementally with the ones rendered from
+    scratch, for every font (parsed and compiled).
+    """
+
+    def load_fonts(self, name):
+        """
+        Returns the font `name` parsed, and compiled in memory.
+        """
+        parsed = figfont.load_font(os.path.join(FONTS_DIR, name))
+        packed = fontcache.CompiledFont(parsed.path, None,
+                                        fontcache.pack_font(parsed))
+        return parsed, packed
+
+    def test_compose(self):
+        """
+        The times composed one after the other are the same rendered from
+        scratch, and the ones not composed (too wide) are wrapped when
+        rendered.
+        """
+        for name in FONTS:
+            for font in self.load_fonts(name):
+                for width in WIDTHS:
+                    for fmt in TIME_FORMATS:
+                        self.check_clock(font, width, fmt)
+
+    def check_clock(self, font, width, fmt):
+        """
+        Composes the times of a clock displayed with `font`, `width` and the
+        time format `fmt`, checking each one.
+        """
+        composer = figfont.LineComposer(font, width)
+        when = START
+        for step in STEPS:
+            when += step
+            text = time.strftime(fmt, time.gmtime(when))
+            lines = composer.compose(text)
+            expected = figfont.FigletRenderer(font, width).render(text)
+            if lines is None:
+                self.failUnless(len(expected) > font.height,
+                                "%s (%d): %r not composed" % (
+                                    font.path, width, text))
+            else:
+                self.assertEqual(lines, expected, "%s (%d): %r" % (
+                    font.path, width, text))
+
+
+if __name__ == '__main__':
+    unittest.main()
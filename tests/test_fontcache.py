@@ -0,0 +1,181 @@
+###############################################################################
+#
+# file:     test_fontcache.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Tests of compiled fonts (see `fontcache`): the fonts in `FONTS_DIR` are
+loaded parsed (`figfont.load_font`), and compiled, both in a mapped file
+(`fontcache.load_font`) and in memory, which must render exactly the same
+outputs, the compiled in memory taking at most `MAX_MEMORY_RATIO` of the
+memory of the parsed.
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python -m unittest discover -s tests
+"""
+
+#
+# Python built-in modules
+#
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import constants, figfont, fontcache
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'fonts')
+"""
+The directory of the fonts tested.
+"""
+
+FONTS = ['standard.flf', 'small.flf', 'ubox.tlf']
+"""
+The fonts tested: two FIGfonts, and a TOIlet font (encoded as utf-8).
+"""
+
+TEXTS = ['TermSaver', 'Hello, World!', '12:34:56', u'\xc4rger \xfcber',
+         u'\u2500\u2502 \u0100', 'the quick brown fox jumps over the lazy dog']
+"""
+The texts rendered with each font (with characters each font lacks, and
+long enough to be wrapped).
+"""
+
+WIDTHS = [20, 80, 200]
+"""
+The terminal widths (in columns) the texts are rendered for.
+"""
+
+MAX_MEMORY_RATIO = 0.5
+"""
+The maximum memory a compiled font (kept in memory) may take, relative to
+the same font parsed (the same as extras/benchmark.py checks).
+"""
+
+
+def deep_size(obj, seen=None):
+    """
+    Returns the memory (in bytes) taken by `obj` and all objects it refers
+    to (through containers, instance dictionaries and slots), counting each
+    object only once. Memory mappings are not included.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.iteritems():
+            size += deep_size(key, seen) + deep_size(value, seen)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += deep_size(item, seen)
+    if hasattr(obj, '__dict__'):
+        size += deep_size(obj.__dict__, seen)
+    for name in getattr(obj.__class__, '__slots__', ()):
+        if hasattr(obj, name):
+            size += deep_size(getattr(obj, name), seen)
+    return size
+
+
+class CompiledFontTestCase(unittest.TestCase):
+    """
+    Compares the fonts compiled with the same fonts parsed, with a cache
+    directory of its own (so compiled files are always written anew).
+    """
+
+    def setUp(self):
+        """
+        Points the cache directory to a temporary one.
+        """
+        self.cache_dir = constants.Settings.CACHE_DIR
+        constants.Settings.CACHE_DIR = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """
+        Removes the temporary cache directory, restoring the previous one.
+        """
+        shutil.rmtree(constants.Settings.CACHE_DIR)
+        constants.Settings.CACHE_DIR = self.cache_dir
+
+    def load_fonts(self, name):
+        """
+        Returns the font `name` parsed, compiled in memory, and compiled in a
+        mapped file.
+        """
+        path = os.path.join(FONTS_DIR, name)
+        parsed = figfont.load_font(path)
+        packed = fontcache.CompiledFont(path, None,
+                                        fontcache.pack_font(parsed))
+        mapped = fontcache.load_font(path)
+        self.failUnless(isinstance(mapped, fontcache.CompiledFont))
+        return parsed, packed, mapped
+
+    def test_render(self):
+        """
+        The compiled fonts render the same outputs the parsed ones do.
+        """
+        for name in FONTS:
+            parsed, packed, mapped = self.load_fonts(name)
+            self.assertEqual(parsed.codes(), packed.codes())
+            self.assertEqual(parsed.codes(), mapped.codes())
+            for text in TEXTS:
+                for width in WIDTHS:
+                    expected = figfont.render(parsed, text, width)
+                    self.assertEqual(figfont.render(packed, text, width),
+                                     expected)
+                    self.assertEqual(figfont.render(mapped, text, width),
+                                     expected)
+
+    def test_memory(self):
+        """
+        The fonts compiled in memory take at most `MAX_MEMORY_RATIO` of the
+        memory of the parsed ones, after rendering with them.
+        """
+        for name in FONTS:
+            parsed, packed, mapped = self.load_fonts(name)
+            for font in (parsed, packed):
+                for text in TEXTS:
+                    figfont.render(font, text)
+            ratio = float(deep_size(packed)) / deep_size(parsed)
+            self.failUnless(ratio <= MAX_MEMORY_RATIO,
+                            "%s: compiled takes %.1f%% of parsed" % (
+                                name, ratio * 100))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+###############################################################################
+#
+# file:     test_fontmetrics.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Tests of the metrics of fonts (see `fontmetrics`): the sizes measured by
+`fontmetrics.FontMetrics.measure`, for the fonts in `FONTS_DIR`, must be
+the sizes of the outputs actually rendered (stripped, the same way
+`FigletScreenBase.store_figlet_text` measures them), and what
+`fontmetrics.FontMetrics.fits` tells must agree with them.
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python -m unittest discover -s tests
+"""
+
+#
+# Python built-in modules
+#
+import os
+import unittest
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import common, figfont, fontmetrics
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                         'fonts')
+"""
+The directory of the fonts tested.
+"""
+
+FONTS = ['standard.flf', 'small.flf', 'ubox.tlf']
+"""
+The fonts tested: two FIGfonts, and a TOIlet font (encoded as utf-8).
+"""
+
+TEXTS = ['TermSaver', 'Hello, World!', '12:34:56', u'\xc4rger \xfcber',
+         u'\u2500\u2502 \u0100', 'the quick brown fox jumps over the lazy dog',
+         '', ' ', '  a  ', '...', 'i', 'WWWWWWWW', 'ab\tc', 'Tj_/|\\',
+         '"Quoted" {braces} [brackets] ~tilde~']
+"""
+The texts measured with each font (blank, narrow, wide, with characters
+each font lacks, and long enough to be wrapped).
+"""
+
+WIDTHS = [1, 5, 12, 20, 40, 80, 200]
+"""
+The terminal widths (in columns) the texts are measured for.
+"""
+
+
+class FontMetricsTestCase(unittest.TestCase):
+    """
+    Compares the sizes measured with the outputs rendered, for every font.
+    """
+
+    def rendered_size(self, font, text, width):
+        """
+        Returns the size (columns and rows) of the output of `text` rendered
+        with `font` at `width` columns, stripped and measured by character.
+        """
+        output = figfont.render(font, text, width).rstrip()
+        lines = common.decode_output(output).split(u"\n")
+        return max([len(line) for line in lines]), len(lines)
+
+    def test_measure(self):
+        """
+        The sizes measured are the sizes of the outputs rendered (most of
+        the texts can be measured).
+        """
+        for name in FONTS:
+            font = figfont.load_font(os.path.join(FONTS_DIR, name))
+            metrics = fontmetrics.FontMetrics(font)
+            measured = 0
+            for text in TEXTS:
+                for width in WIDTHS:
+                    size = metrics.measure(text, width)
+                    if size is None:
+                        continue
+                    measured += 1
+                    self.assertEqual(size,
+                                     self.rendered_size(font, text, width),
+                                     "%s (%d): %r" % (name, width, text))
+            self.failUnless(measured >= len(TEXTS) * len(WIDTHS) / 2,
+                            "%s: only %d measured" % (name, measured))
+
+    def test_fits(self):
+        """
+        Texts that fit are rendered in a single line, and the ones that do
+        not are wrapped.
+        """
+        for name in FONTS:
+            font = figfont.load_font(os.path.join(FONTS_DIR, name))
+            metrics = fontmetrics.FontMetrics(font)
+            for text in TEXTS:
+                for width in WIDTHS:
+                    fits = metrics.fits(text, width)
+                    if fits is None:
+                        continue
+                    lines = figfont.FigletRenderer(font, width).render(text)
+                    self.assertEqual(fits, len(lines) <= font.height,
+                                     "%s (%d): %r" % (name, width, text))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,197 @@
+###############################################################################
+#
+# file:     test_recording.py
+#
+# Purpose:  refer to module documentation for details
+#
+# Note:     This file is part of Termsaver-Figlet plugin, and should not be
+#           used or executed separately.
+#
+###############################################################################
+#
+# Copyright 2012 Termsaver
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+#
+###############################################################################
+"""
+Tests of recordings (see `recording`): what a `recording.FrameRecorder`
+writes is read back the same by `recording.load_recording`, which refuses
+truncated files and files that are not recordings.
+
+The plugin must be installed (or linked) as `termsaverlib.plugins.figlet`.
+Usage:
+
+    python -m unittest discover -s tests
+"""
+
+#
+# Python built-in modules
+#
+import os
+import struct
+import tempfile
+import unittest
+
+#
+# Termsaver modules (screens first, plugins are loaded through them)
+#
+import termsaverlib.screen
+from termsaverlib import exception
+
+#
+# Internal modules
+#
+from termsaverlib.plugins.figlet import recording
+
+FRAMES = [
+    (True, [(0, 0, 'TermSaver'), (1, 4, u'\xc4rger \u2500\u2502')]),
+    (False, [(1, 4, ' ')]),
+    (False, []),
+    (True, []),
+    (False, [(29, 0, 'x' * 120), (0, 119, '|')]),
+]
+"""
+The frames recorded: if the screen is cleared first, and the runs (row,
+column and text) drawn. Frames without changes are not recorded.
+"""
+
+WIDTH, HEIGHT = 120, 30
+"""
+The size of the screen recorded.
+"""
+
+FRAME_TIME = 0.25
+"""
+The time (in seconds) between the frames recorded.
+"""
+
+
+class FakeClock(object):
+    """
+    A clock only moved by the test itself (see `now`), so the times
+    recorded are known.
+    """
+
+    now = 0.0
+    """
+    The time (in seconds) returned by the clock.
+    """
+
+    def __call__(self):
+        """
+        Returns the time.
+        """
+        return self.now
+
+
+class RecordingTestCase(unittest.TestCase):
+    """
+    Writes the `FRAMES` into a temporary recording, and reads it back.
+    """
+
+    def setUp(self):
+        """
+        Records the `FRAMES` into a temporary file.
+        """
+        fd, self.path = tempfile.mkstemp()
+        try:
+            clock = FakeClock()
+            recorder = recording.FrameRecorder(fd, WIDTH, HEIGHT, clock)
+            for clear, runs in FRAMES:
+                clock.now += FRAME_TIME
+                if clear:
+                    recorder.clear()
+                for row, col, text in runs:
+                    recorder.add(row, col, text)
+                recorder.flush()
+            clock.now += FRAME_TIME
+            recorder.close()
+        finally:
+            os.close(fd)
+
+    def tearDown(self):
+        """
+        Removes the temporary recording.
+        """
+        os.remove(self.path)
+
+    def rewrite(self, data):
+        """
+        Replaces the contents of the temporary recording with `data`.
+        """
+        f = open(self.path, 'wb')
+        try:
+            f.write(data)
+        finally:
+            f.close()
+
+    def read(self):
+        """
+        Returns the contents of the temporary recording.
+        """
+        f = open(self.path, 'rb')
+        try:
+            return f.read()
+        finally:
+            f.close()
+
+    def test_round_trip(self):
+        """
+        The recording is read back with the size, the duration and the
+        runs (as unicode) written, skipping frames without changes.
+        """
+        width, height, duration, events = \
+            recording.load_recording(self.path)
+        self.assertEqual((width, height), (WIDTH, HEIGHT))
+        self.assertEqual(duration, (len(FRAMES) + 1) * FRAME_TIME)
+        expected = []
+        for i, (clear, runs) in enumerate(FRAMES):
+            if clear or runs:
+                expected.append(((i + 1) * FRAME_TIME, clear,
+                                 [(row, col, unicode(text))
+                                  for row, col, text in runs]))
+        self.assertEqual(events, expected)
+        for __, __, runs in events:
+            for __, __, text in runs:
+                self.failUnless(isinstance(text, unicode))
+
+    def test_truncated(self):
+        """
+        A recording cut in the middle of the header, of an event header or
+        of a run is refused.
+        """
+        data = self.read()
+        header_size = struct.calcsize(recording.HEADER_FORMAT)
+        event_size = struct.calcsize(recording.EVENT_FORMAT)
+        for size in (0, header_size - 1, header_size + event_size - 1,
+                     len(data) - 1):
+            self.rewrite(data[:size])
+            self.assertRaises(exception.TermSaverException,
+                              recording.load_recording, self.path)
+
+    def test_bad_magic(self):
+        """
+        A file that is not a recording (or of another version) is refused.
+        """
+        data = self.read()
+        self.rewrite('XXXX' + data[4:])
+        self.assertRaises(exception.TermSaverException,
+                          recording.load_recording, self.path)
+        self.rewrite(data[:4] + '\xff\xff' + data[6:])
+        self.assertRaises(exception.TermSaverException,
+                          recording.load_recording, self.path)
+
+
+if __name__ == '__main__':
+    unittest.main()